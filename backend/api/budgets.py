@@ -0,0 +1,139 @@
+import logging
+import os
+import re
+import traceback
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+PROJECT_DIR = settings.BASE_DIR + os.sep
+IN_LIST = re.compile(r'\(\s*%s(?:\s*,\s*%s)*\s*\)')
+LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def sql_shape(sql):
+    """SQL без параметров: IN (%s, %s, ...) и литералы схлопываются."""
+    return LITERAL.sub('?', IN_LIST.sub('(...)', sql))
+
+
+def project_stack():
+    return [
+        frame for frame in traceback.extract_stack()
+        if frame.filename.startswith(PROJECT_DIR)
+        and frame.filename != __file__
+        and 'site-packages' not in frame.filename
+    ]
+
+
+class QueryBudget:
+    """Ограничение числа запросов к БД для блока кода или функции.
+
+    При QUERY_BUDGETS=raise превышение бюджета поднимает
+    QueryBudgetExceeded с SQL и стеком каждого запроса, при log - пишет
+    предупреждение. Повторы одного и того же SQL (N+1) попадают в отчёт
+    в обоих режимах, даже если бюджет не задан.
+    """
+
+    def __init__(self, limit=None, name=None):
+        self.limit = limit
+        self.name = name
+
+    def __call__(self, function):
+        name = self.name or function.__qualname__
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with QueryBudget(self.limit, name):
+                return function(*args, **kwargs)
+        return wrapper
+
+    def __enter__(self):
+        self.queries = []
+        self.mode = settings.QUERY_BUDGETS
+        self.stack = ExitStack()
+        if self.mode in ('log', 'raise'):
+            for connection in connections.all():
+                self.stack.enter_context(
+                    connection.execute_wrapper(self.execute_wrapper)
+                )
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.stack.close()
+        if exc_type is None and self.queries:
+            self.check()
+
+    @contextmanager
+    def excluded(self):
+        """Разовая работа внутри блока не входит в бюджет."""
+        count = len(self.queries)
+        try:
+            yield
+        finally:
+            del self.queries[count:]
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        self.queries.append((sql, project_stack()))
+        return execute(sql, params, many, context)
+
+    def repeated(self):
+        """Один и тот же SELECT из одной строки кода - признак N+1."""
+        shapes = defaultdict(list)
+        for sql, stack in self.queries:
+            if not sql.lstrip().upper().startswith('SELECT'):
+                continue
+            line = [(frame.filename, frame.lineno) for frame in stack[-1:]]
+            shapes[sql_shape(sql), tuple(line)].append(stack)
+        return [
+            (shape, stacks) for shape, stacks in shapes.items()
+            if len(stacks) >= settings.QUERY_BUDGETS_REPEAT_THRESHOLD
+        ]
+
+    def format_stack(self, stack):
+        return ''.join(traceback.format_list(stack)).rstrip()
+
+    def check(self):
+        repeated = self.repeated()
+        if repeated:
+            logger.warning('%s: возможный N+1\n%s', self.name, '\n'.join(
+                f'{len(stacks)} x {shape}\n{self.format_stack(stacks[0])}'
+                for (shape, _), stacks in repeated
+            ))
+        if self.limit is None or len(self.queries) <= self.limit:
+            return
+        message = (
+            f'{self.name}: {len(self.queries)} запросов к БД при бюджете '
+            f'{self.limit}\n' + '\n'.join(
+                f'{number}. {sql}\n{self.format_stack(stack)}'
+                for number, (sql, stack) in enumerate(self.queries, 1)
+            )
+        )
+        if self.mode == 'raise':
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
+
+class QueryBudgetMixin:
+    """Бюджет запросов к БД на действие вьюсета: query_budgets."""
+
+    query_budgets = {}
+
+    def dispatch(self, request, *args, **kwargs):
+        with QueryBudget(name=type(self).__name__) as budget:
+            self.query_budget = budget
+            return super().dispatch(request, *args, **kwargs)
+
+    def initial(self, request, *args, **kwargs):
+        action = getattr(self, 'action', None) or request.method.lower()
+        self.query_budget.limit = self.query_budgets.get(action)
+        self.query_budget.name = f'{type(self).__name__}.{action}'
+        super().initial(request, *args, **kwargs)
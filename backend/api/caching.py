@@ -0,0 +1,88 @@
+from django.conf import settings
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                patch_vary_headers)
+from django.utils.http import http_date, parse_etags
+from rest_framework.permissions import SAFE_METHODS
+
+from .exceptions import PreconditionFailed
+from recipes.versions import get_version
+
+
+class HttpCacheMixin:
+    """Cache-Control, ETag и Last-Modified по версии набора данных.
+
+    Если If-None-Match или If-Modified-Since совпадают с текущей версией,
+    304 отдаётся без запроса к самим данным.
+    """
+
+    content_version = None
+    cache_control = {'public': True}
+
+    def get_cache_control(self):
+        return dict(self.cache_control, max_age=settings.HTTP_CACHE_MAX_AGE)
+
+    def conditional(self, handler, request, *args, **kwargs):
+        if request.method not in SAFE_METHODS:
+            return handler(request, *args, **kwargs)
+        version = get_version(self.content_version)
+        etag = (f'"{version.name}-{version.version}-'
+                f'{request.accepted_renderer.format}"')
+        last_modified = int(version.updated.timestamp())
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+            patch_cache_control(response, **self.get_cache_control())
+            patch_vary_headers(response, ('Accept',))
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(super().retrieve, request, *args, **kwargs)
+
+
+class ObjectVersionMixin:
+    """ETag по полю version объекта и проверка If-Match при изменении.
+
+    Сама запись условная (UPDATE ... WHERE version = ожидаемая), поэтому
+    из двух одновременных изменений одной версии второе получит 412.
+    """
+
+    etag = None
+
+    def get_etag(self, instance):
+        return (f'"{instance._meta.model_name}-{instance.pk}-'
+                f'{instance.version}"')
+
+    def get_object(self):
+        instance = super().get_object()
+        self.etag = self.get_etag(instance)
+        return instance
+
+    def check_if_match(self, instance):
+        header = self.request.META.get('HTTP_IF_MATCH')
+        if header is None:
+            return
+        etags = parse_etags(header)
+        if '*' not in etags and self.get_etag(instance) not in etags:
+            raise PreconditionFailed()
+
+    def perform_update(self, serializer):
+        self.check_if_match(serializer.instance)
+        instance = serializer.save(version=serializer.instance.version)
+        self.etag = self.get_etag(instance)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        if self.etag and response.status_code == 200:
+            response['ETag'] = self.etag
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
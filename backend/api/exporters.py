@@ -0,0 +1,22 @@
+from datetime import datetime
+
+from recipes.units import format_quantity
+
+
+def shopping_list_lines(user, ingredients, period=None):
+    """Текст списка покупок по частям."""
+    yield (
+        f'{user.username}, Ваш список покупок готов!\n'
+        f'Дата: {datetime.today():%Y-%m-%d}\n'
+    )
+    if period is not None:
+        yield f'Период: {period[0]:%Y-%m-%d} - {period[1]:%Y-%m-%d}\n'
+    yield '\n'
+    separator = ''
+    for ingredient in ingredients:
+        yield (
+            f'{separator}- {ingredient["ingredient__name"]} '
+            f'({ingredient["measurement_unit"]})'
+            f' - {format_quantity(ingredient["quantity"])}'
+        )
+        separator = '\n'
@@ -0,0 +1,34 @@
+def parse_list(value):
+    return [item.strip() for item in (value or '').split(',') if item.strip()]
+
+
+def get_fieldset(request, default_fields):
+    """Поля из ?fields= и раскрываемые связи из ?expand=.
+
+    Без ?fields= отдаётся полное представление со всеми связями.
+    """
+    if request is None:
+        return set(default_fields), set(default_fields)
+    requested = parse_list(request.query_params.get('fields'))
+    if not requested:
+        return set(default_fields), set(default_fields)
+    return (
+        set(requested) & set(default_fields),
+        set(parse_list(request.query_params.get('expand'))),
+    )
+
+
+class SparseFieldsMixin:
+    """Оставляет запрошенные поля; нераскрытые связи отдаются как id."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields, expand = get_fieldset(
+            self.context.get('request'), self.Meta.fields
+        )
+        for name in set(self.fields) - fields:
+            self.fields.pop(name)
+        collapsed = getattr(self.Meta, 'collapsed_fields', {})
+        for name, field in collapsed.items():
+            if name in self.fields and name not in expand:
+                self.fields[name] = field()
@@ -1,14 +1,28 @@
+from django.conf import settings
 from django_filters.rest_framework import FilterSet, filters
 from rest_framework.filters import SearchFilter
 
 from recipes.models import Recipe, Tag
+from recipes.pantry import MATCH_ALL, MATCH_CHOICES, MATCH_COVERAGE
+from recipes.pantry import filter_recipes as filter_by_pantry
+from recipes.user_sets import get_recipe_set
 
 
 class IngredientSearchFilter(SearchFilter):
     search_param = 'name'
 
 
+MAX_ID = 2 ** 31 - 1
+
+
+class NumberInFilter(filters.BaseInFilter, filters.NumberFilter):
+    pass
+
+
 class RecipeFilterSet(FilterSet):
+    # Число, а не ModelChoiceFilter: проверка автора - лишний запрос к БД
+    # в бюджете списка, неизвестный автор просто даёт пустой список.
+    author = filters.NumberFilter(field_name='author_id')
     tags = filters.ModelMultipleChoiceFilter(
         field_name='tags__slug',
         to_field_name='slug',
@@ -20,17 +34,64 @@ class RecipeFilterSet(FilterSet):
     is_in_shopping_cart = filters.BooleanFilter(
         method='get_is_in_shopping_cart'
     )
+    # Границы id проверяются формой (400), до поиска по индексу в NumPy.
+    ingredients = NumberInFilter(
+        method='get_ingredients', min_value=1, max_value=MAX_ID,
+        decimal_places=0
+    )
+    match = filters.ChoiceFilter(choices=MATCH_CHOICES, method='skip')
+    min_coverage = filters.NumberFilter(method='skip')
+    min_calories = filters.NumberFilter(
+        field_name='calories', lookup_expr='gte'
+    )
+    max_calories = filters.NumberFilter(
+        field_name='calories', lookup_expr='lte'
+    )
+    min_proteins = filters.NumberFilter(
+        field_name='proteins', lookup_expr='gte'
+    )
+    max_cost = filters.NumberFilter(field_name='cost', lookup_expr='lte')
+    ordering = filters.OrderingFilter(
+        fields=('pub_date', 'calories', 'proteins', 'cost')
+    )
 
     class Meta:
-        fields = ('author', 'tags', 'is_favorited', 'is_in_shopping_cart')
+        fields = ('author', 'tags', 'is_favorited', 'is_in_shopping_cart',
+                  'ingredients', 'match', 'min_coverage', 'min_calories',
+                  'max_calories', 'min_proteins', 'max_cost')
         model = Recipe
 
+    def skip(self, queryset, name, value):
+        return queryset
+
+    def get_ingredients(self, queryset, name, value):
+        if not value:
+            return queryset
+        min_coverage = self.form.cleaned_data.get('min_coverage')
+        match = self.form.cleaned_data.get('match') or (
+            MATCH_COVERAGE if min_coverage is not None else MATCH_ALL
+        )
+        return filter_by_pantry(
+            queryset, sorted(set(int(pk) for pk in value)), match,
+            float(min_coverage if min_coverage is not None else 1)
+        )
+
+    def filter_user_recipes(self, queryset, kind, lookup):
+        user = self.request.user
+        if settings.USER_RECIPE_SETS:
+            recipes = get_recipe_set(kind, user.id)
+            if len(recipes) <= settings.USER_RECIPE_SETS_FILTER_LIMIT:
+                return queryset.filter(id__in=list(recipes))
+        return queryset.filter(**{lookup: user})
+
     def get_is_favorited(self, queryset, name, value):
         if self.request.user.is_authenticated and value:
-            return queryset.filter(favorite__user=self.request.user)
+            return self.filter_user_recipes(
+                queryset, 'favorites', 'favorite__user'
+            )
         return queryset
 
     def get_is_in_shopping_cart(self, queryset, name, value):
         if self.request.user.is_authenticated and value:
-            return queryset.filter(cart__user=self.request.user)
+            return self.filter_user_recipes(queryset, 'cart', 'cart__user')
         return queryset
@@ -0,0 +1,291 @@
+import json
+import time
+from contextlib import ExitStack
+from datetime import date, datetime, timedelta
+from unittest import mock
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+from django.test import Client
+from django.urls import URLResolver, reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.throttling import SimpleRateThrottle
+
+from api.metrics import RequestMetrics
+from api.urls import urlpatterns
+from recipes.models import Cart, Favorite, Ingredient, MealPlan, Recipe, Tag
+from users.models import Subscription, User
+
+PASSWORD = 'benchmark-password'
+# Маршруты djoser, меняющие учётные данные или требующие писем.
+SKIPPED_ROUTES = {
+    'users-activation', 'users-resend-activation', 'users-reset-password',
+    'users-reset-password-confirm', 'users-reset-username',
+    'users-reset-username-confirm', 'users-set-password',
+    'users-set-username', 'logout', 'metrics',
+}
+
+
+def percentile(values, rank):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(rank / 100 * len(ordered)))]
+
+
+class Command(BaseCommand):
+    help = ('Бенчмарк маршрутов api/urls.py: задержка и число запросов к БД '
+            'с сохранением и сравнением базовой линии. Все изменения в БД '
+            'откатываются после прогона.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--save', metavar='PATH',
+                            help='Сохранить результаты как базовую линию.')
+        parser.add_argument('--compare', metavar='PATH',
+                            help='Сравнить с сохранённой базовой линией.')
+        parser.add_argument('--threshold', type=float, default=1.25,
+                            help='Допустимый рост p50 относительно базы.')
+        parser.add_argument('--only', nargs='+', default=None)
+
+    def handle(self, *args, **options):
+        # Прогон пишет в БД (пользователь, избранное, подписки), поэтому
+        # целиком идёт в транзакции, которая откатывается в конце.
+        # Итерации прогона превышают лимиты троттлинга (shopping_cart -
+        # 20/min), и замерялись бы ответы 429. Без частоты троттл
+        # пропускает запрос; override_settings тут не поможет: классы
+        # троттлинга читают DEFAULT_THROTTLE_RATES один раз при импорте.
+        rates = dict.fromkeys(SimpleRateThrottle.THROTTLE_RATES)
+        with mock.patch.dict(SimpleRateThrottle.THROTTLE_RATES, rates):
+            with transaction.atomic():
+                self.run(options)
+                transaction.set_rollback(True)
+
+    def run(self, options):
+        self.prepare()
+        cases = self.get_cases()
+        self.report_coverage(cases)
+        self.stdout.write(
+            f'{"case":<34} {"code":>4} {"p50,ms":>9} {"p95,ms":>9} {"SQL":>5}'
+        )
+        results = {}
+        for name, method, url_name, kwargs, data, *reset in cases:
+            if options['only'] and name not in options['only']:
+                continue
+            results[name] = self.measure(
+                method, reverse(url_name, kwargs=kwargs), data,
+                options['iterations'], options['warmup'], *reset
+            )
+            self.stdout.write(self.format_row(name, results[name]))
+        if options['save']:
+            self.save(options['save'], results)
+        if options['compare']:
+            self.compare(options['compare'], results, options['threshold'])
+
+    def prepare(self):
+        self.user, created = User.objects.get_or_create(
+            email='benchmark@example.com',
+            defaults={'username': 'benchmark', 'first_name': 'Benchmark',
+                      'last_name': 'Benchmark'},
+        )
+        if created:
+            self.user.set_password(PASSWORD)
+            self.user.save()
+            recipes = Recipe.objects.order_by('?')[:30]
+            Favorite.objects.bulk_create(
+                [Favorite(user=self.user, recipe=recipe)
+                 for recipe in recipes[:20]]
+            )
+            Cart.objects.bulk_create(
+                [Cart(user=self.user, recipe=recipe)
+                 for recipe in recipes[20:]]
+            )
+            Subscription.objects.bulk_create([
+                Subscription(user=self.user, author=author)
+                for author in User.objects.exclude(id=self.user.id)
+                .filter(recipes__isnull=False).distinct()[:10]
+            ])
+        token, _ = Token.objects.get_or_create(user=self.user)
+        self.client = Client(
+            SERVER_NAME='localhost', HTTP_AUTHORIZATION=f'Token {token.key}'
+        )
+        self.recipe = Recipe.objects.exclude(author=self.user).first()
+        self.author = self.recipe.author
+        Favorite.objects.filter(user=self.user, recipe=self.recipe).delete()
+        Cart.objects.filter(user=self.user, recipe=self.recipe).delete()
+        Subscription.objects.filter(
+            user=self.user, author=self.author
+        ).delete()
+        MealPlan.objects.filter(user=self.user).delete()
+        self.plan = MealPlan.objects.create(
+            user=self.user, recipe=self.recipe, date=date.today()
+        )
+
+    def new_plan(self):
+        """Сброс перед итерацией: плана на завтра, создаваемого POST, нет."""
+        MealPlan.objects.filter(user=self.user).exclude(
+            pk=self.plan.pk
+        ).delete()
+
+    def restore_plan(self):
+        """Сброс перед итерацией: удаляемый DELETE план снова есть."""
+        self.plan.save()
+
+    def get_cases(self):
+        recipe = self.recipe.id
+        ingredient = Ingredient.objects.first()
+        plan = {'pk': self.plan.pk}
+        today = self.plan.date.isoformat()
+        tomorrow = (self.plan.date + timedelta(days=1)).isoformat()
+        return [
+            ('api-root', 'get', 'api-root', None, None),
+            ('tags-list', 'get', 'tags-list', None, None),
+            ('tags-detail', 'get', 'tags-detail',
+             {'pk': Tag.objects.first().pk}, None),
+            ('ingredients-list', 'get', 'ingredients-list', None,
+             {'name': ingredient.name[:2]}),
+            ('ingredients-detail', 'get', 'ingredients-detail',
+             {'pk': ingredient.pk}, None),
+            ('recipes-list', 'get', 'recipes-list', None, {'limit': 6}),
+            ('recipes-list-page-10', 'get', 'recipes-list', None,
+             {'limit': 6, 'page': 10}),
+            ('recipes-list-favorited', 'get', 'recipes-list', None,
+             {'limit': 6, 'is_favorited': 1}),
+            ('recipes-list-in-cart', 'get', 'recipes-list', None,
+             {'limit': 6, 'is_in_shopping_cart': 1}),
+            ('recipes-list-author-tags', 'get', 'recipes-list', None,
+             {'limit': 6, 'author': self.author.id,
+              'tags': list(Tag.objects.values_list('slug', flat=True))}),
+            ('recipes-detail', 'get', 'recipes-detail', {'pk': recipe},
+             None),
+            ('recipes-favorite-post', 'post', 'recipes-favorite',
+             {'pk': recipe}, None),
+            ('recipes-favorite-delete', 'delete', 'recipes-favorite',
+             {'pk': recipe}, None),
+            ('recipes-shopping-cart-post', 'post', 'recipes-shopping-cart',
+             {'pk': recipe}, None),
+            ('recipes-shopping-cart-delete', 'delete',
+             'recipes-shopping-cart', {'pk': recipe}, None),
+            ('recipes-download-shopping-cart', 'get',
+             'recipes-download-shopping-cart', None, None),
+            ('users-list', 'get', 'users-list', None, {'limit': 6}),
+            ('users-detail', 'get', 'users-detail',
+             {'id': self.author.id}, None),
+            ('users-me', 'get', 'users-me', None, None),
+            ('users-subscriptions', 'get', 'users-subscriptions', None,
+             {'limit': 6, 'recipes_limit': 3}),
+            ('users-subscribe-post', 'post', 'users-subscribe',
+             {'id': self.author.id}, None),
+            ('users-subscribe-delete', 'delete', 'users-subscribe',
+             {'id': self.author.id}, None),
+            ('login', 'post', 'login', None,
+             {'email': self.user.email, 'password': PASSWORD}),
+            ('recipes-feed', 'get', 'recipes-feed', None, {'limit': 10}),
+            ('recipes-similar', 'get', 'recipes-similar', {'pk': recipe},
+             None),
+            ('recipes-recommended', 'get', 'recipes-recommended', None,
+             None),
+            ('recipes-shopping-cart-totals', 'get',
+             'recipes-shopping-cart-totals', None, None),
+            ('meal-plans-list', 'get', 'meal_plans-list', None, None),
+            ('meal-plans-post', 'post', 'meal_plans-list', None,
+             {'date': tomorrow, 'recipe': recipe, 'servings': 2},
+             self.new_plan),
+            ('meal-plans-detail', 'get', 'meal_plans-detail', plan, None),
+            ('meal-plans-put', 'put', 'meal_plans-detail', plan,
+             {'date': today, 'recipe': recipe, 'servings': 3}),
+            ('meal-plans-patch', 'patch', 'meal_plans-detail', plan,
+             {'servings': 4}),
+            ('meal-plans-download-shopping-list', 'get',
+             'meal_plans-download-shopping-list', None, None),
+            ('meal-plans-delete', 'delete', 'meal_plans-detail', plan,
+             None, self.restore_plan),
+        ]
+
+    def report_coverage(self, cases):
+        covered = {url_name for _, _, url_name, *_ in cases}
+        routes = set()
+        patterns = list(urlpatterns)
+        while patterns:
+            pattern = patterns.pop()
+            if isinstance(pattern, URLResolver):
+                patterns.extend(pattern.url_patterns)
+            elif pattern.name:
+                routes.add(pattern.name)
+        missing = routes - covered - SKIPPED_ROUTES
+        if missing:
+            self.stderr.write(
+                'Маршруты без сценария: ' + ', '.join(sorted(missing))
+            )
+
+    def request(self, method, path, data):
+        if method == 'get':
+            return self.client.get(path, data)
+        return getattr(self.client, method)(
+            path, json.dumps(data or {}), content_type='application/json'
+        )
+
+    def measure(self, method, path, data, iterations, warmup, reset=None):
+        timings = []
+        metrics = None
+        status = None
+        for number in range(warmup + iterations):
+            if reset is not None:
+                reset()
+            elif method == 'delete':
+                self.client.post(path)
+            metrics = RequestMetrics()
+            with ExitStack() as stack:
+                for db in connections.all():
+                    stack.enter_context(
+                        db.execute_wrapper(metrics.execute_wrapper)
+                    )
+                started = time.perf_counter()
+                status = self.request(method, path, data).status_code
+                elapsed = time.perf_counter() - started
+            if method == 'post' and data is None and reset is None:
+                self.client.delete(path)
+            if number >= warmup:
+                timings.append(elapsed * 1000)
+        return {
+            'status': status,
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p95_ms': round(percentile(timings, 95), 3),
+            'queries': metrics.db_queries,
+        }
+
+    def format_row(self, name, result):
+        return (f'{name:<34} {result["status"]:>4} '
+                f'{result["p50_ms"]:>9.2f} {result["p95_ms"]:>9.2f} '
+                f'{result["queries"]:>5}')
+
+    def save(self, path, results):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'created': datetime.now().isoformat(timespec='seconds'),
+                'vendor': connection.vendor,
+                'recipes': Recipe.objects.count(),
+                'users': User.objects.count(),
+                'results': results,
+            }, f, ensure_ascii=False, indent=2)
+        self.stdout.write(f'Базовая линия сохранена в {path}')
+
+    def compare(self, path, results, threshold):
+        with open(path, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+        regressions = []
+        for name, result in results.items():
+            base = baseline.get(name)
+            if base is None:
+                continue
+            ratio = result['p50_ms'] / max(base['p50_ms'], 0.001)
+            if ratio > threshold or result['queries'] > base['queries']:
+                regressions.append(
+                    f'{name}: p50 {base["p50_ms"]} -> {result["p50_ms"]} мс '
+                    f'(x{ratio:.2f}), запросов {base["queries"]} -> '
+                    f'{result["queries"]}'
+                )
+        if regressions:
+            raise CommandError(
+                'Регрессии производительности:\n' + '\n'.join(regressions)
+            )
+        self.stdout.write('Регрессий относительно базовой линии нет.')
@@ -0,0 +1,116 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count
+
+from recipes.feed import fan_out, get_feed, heavy_authors, rebuild_feeds
+from recipes.models import Recipe
+from users.models import User
+
+BUCKETS = (1, 10, 100, 1000, 10000)
+
+
+def percentile(values, rank):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(rank / 100 * len(ordered)))]
+
+
+def bucket(count):
+    return max([low for low in BUCKETS if low <= count], default=0)
+
+
+class Command(BaseCommand):
+    help = ('Бенчмарк ленты подписок: наивный запрос против гибридной '
+            'раскладки по лентам с чтением популярных авторов напрямую.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=20,
+                            help='Читателей в каждой группе по подпискам.')
+        parser.add_argument('--limit', type=int, default=10)
+        parser.add_argument('--rebuild', action='store_true',
+                            help='Пересобрать ленты перед замером.')
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            started = time.perf_counter()
+            rebuild_feeds()
+            self.stdout.write(
+                f'Ленты пересобраны за {time.perf_counter() - started:.1f} с'
+            )
+        self.stdout.write(
+            f'Популярных авторов (> {settings.FEED_FANOUT_LIMIT} '
+            f'подписчиков): {len(heavy_authors())}'
+        )
+        self.benchmark_reads(options['readers'], options['limit'])
+        self.benchmark_writes(options['readers'])
+
+    def grouped(self, annotation, readers):
+        users = User.objects.annotate(
+            count=Count(annotation)
+        ).filter(count__gt=0).order_by('-count').values_list('id', 'count')
+        groups = {}
+        for user_id, count in users:
+            group = groups.setdefault(bucket(count), [])
+            if len(group) < readers:
+                group.append(user_id)
+        if not groups:
+            raise CommandError('Нет подписок: запустите generate_dataset.')
+        return sorted(groups.items())
+
+    def timed(self, read):
+        started = time.perf_counter()
+        ids = read()
+        return (time.perf_counter() - started) * 1000, ids
+
+    def benchmark_reads(self, readers, limit):
+        self.stdout.write(
+            f'{"подписок от":>12} {"naive p50":>10} {"naive p95":>10} '
+            f'{"feed p50":>10} {"feed p95":>10}'
+        )
+        for low, user_ids in self.grouped('subscriber', readers):
+            naive, feed = [], []
+            for user_id in user_ids:
+                elapsed, expected = self.timed(lambda: list(
+                    Recipe.objects.filter(
+                        author__subscription__user=user_id
+                    ).order_by('-pub_date', '-id').values_list(
+                        'id', flat=True
+                    )[:limit]
+                ))
+                naive.append(elapsed)
+                elapsed, ids = self.timed(lambda: [
+                    recipe_id for _, recipe_id in get_feed(
+                        User(id=user_id), limit=limit
+                    )
+                ])
+                feed.append(elapsed)
+                if ids != expected:
+                    self.stderr.write(
+                        f'Лента пользователя {user_id} расходится с '
+                        'наивным запросом (пересоберите ленты: --rebuild).'
+                    )
+            self.stdout.write(
+                f'{low:>12} {percentile(naive, 50):>10.2f} '
+                f'{percentile(naive, 95):>10.2f} '
+                f'{percentile(feed, 50):>10.2f} {percentile(feed, 95):>10.2f}'
+            )
+
+    def benchmark_writes(self, readers):
+        self.stdout.write(f'{"подписчиков от":>15} {"fan-out p50,ms":>15}')
+        for low, author_ids in self.grouped('subscription', readers):
+            timings = []
+            for author_id in author_ids:
+                recipe = Recipe.objects.filter(author_id=author_id).first()
+                if recipe is None:
+                    continue
+                with transaction.atomic():
+                    started = time.perf_counter()
+                    fan_out(recipe)
+                    timings.append((time.perf_counter() - started) * 1000)
+                    transaction.set_rollback(True)
+            if timings:
+                self.stdout.write(
+                    f'{low:>15} {percentile(timings, 50):>15.2f}'
+                )
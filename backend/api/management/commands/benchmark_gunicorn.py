@@ -0,0 +1,125 @@
+import itertools
+import os
+import socket
+import subprocess
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+APPLICATIONS = {
+    'uvicorn': 'foodgram.asgi:application',
+}
+
+
+def children(pid):
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as file:
+            return [int(child) for child in file.read().split()]
+    except OSError:
+        return []
+
+
+def process_rss(pid):
+    """RSS процесса и его потомков в байтах (только Linux)."""
+    total = 0
+    try:
+        with open(f'/proc/{pid}/status') as file:
+            for line in file:
+                if line.startswith('VmRSS:'):
+                    total += int(line.split()[1]) * 1024
+    except OSError:
+        return 0
+    return total + sum(process_rss(child) for child in children(pid))
+
+
+class Command(BaseCommand):
+    help = ('Проверка настроек gunicorn.conf.py: запуск gunicorn с разными '
+            'классами воркеров, числом воркеров и потоков и нагрузочный '
+            'тест (load_test) каждого варианта.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--worker-class', nargs='+', dest='classes',
+                            default=['sync', 'gthread'])
+        parser.add_argument('--workers', type=int, nargs='+', default=[],
+                            help='По умолчанию — автоподбор по CPU.')
+        parser.add_argument('--threads', type=int, nargs='+', default=[])
+        parser.add_argument('--concurrency', type=int, nargs='+',
+                            default=[10, 50])
+        parser.add_argument('--duration', type=float, default=10.0)
+        parser.add_argument('--path', action='append', dest='paths')
+        parser.add_argument('--token', default=None)
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--startup-timeout', type=float, default=60.0)
+
+    def handle(self, *args, **options):
+        variants = itertools.product(
+            options['classes'], options['workers'] or [None],
+            options['threads'] or [None],
+        )
+        for kind, workers, threads in variants:
+            env = dict(
+                os.environ,
+                GUNICORN_WORKER_CLASS=kind,
+                GUNICORN_BIND=f'127.0.0.1:{options["port"]}',
+            )
+            if workers:
+                env['GUNICORN_WORKERS'] = str(workers)
+            if threads:
+                env['GUNICORN_THREADS'] = str(threads)
+            self.stdout.write(
+                f'\n== {kind}, воркеры: {workers or "авто"}, '
+                f'потоки: {threads or "авто"}'
+            )
+            with tempfile.TemporaryFile('w+') as log:
+                process = subprocess.Popen(
+                    ['gunicorn', '-c', 'gunicorn.conf.py',
+                     APPLICATIONS.get(kind, 'foodgram.wsgi:application')],
+                    cwd=settings.BASE_DIR, env=env,
+                    stdout=log, stderr=subprocess.STDOUT,
+                )
+                try:
+                    self.wait_ready(process, options, log)
+                    call_command(
+                        'load_test',
+                        url=f'http://localhost:{options["port"]}',
+                        concurrency=options['concurrency'],
+                        duration=options['duration'],
+                        paths=options['paths'],
+                        token=options['token'],
+                        stdout=self.stdout,
+                    )
+                    self.stdout.write(
+                        f'RSS мастера и воркеров: '
+                        f'{process_rss(process.pid) / 1024 / 1024:.0f} МБ'
+                    )
+                finally:
+                    self.stop(process)
+
+    def wait_ready(self, process, options, log):
+        deadline = time.monotonic() + options['startup_timeout']
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                log.seek(0)
+                raise CommandError(
+                    'gunicorn не запустился:\n' + log.read()[-2000:]
+                )
+            try:
+                socket.create_connection(
+                    ('127.0.0.1', options['port']), timeout=1
+                ).close()
+            except OSError:
+                time.sleep(0.2)
+                continue
+            return
+        raise CommandError('gunicorn не ответил за --startup-timeout.')
+
+    def stop(self, process):
+        process.terminate()
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
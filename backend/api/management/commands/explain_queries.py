@@ -0,0 +1,121 @@
+import re
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count, F, Sum
+
+from api.filters import RecipeFilterSet
+from recipes.models import (Cart, Favorite, Ingredient, IngredientInRecipe,
+                            Recipe, Tag)
+from users.models import Subscription, User
+
+SEQUENTIAL_SCAN = {
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    'sqlite': re.compile(r'\bSCAN (?:TABLE )?(\w+)(?!.*\bUSING\b)'),
+}
+# Справочники из десятков строк читаются целиком быстрее, чем по индексу.
+SMALL_TABLES = ('recipes_tag',)
+
+
+class Command(BaseCommand):
+    help = ('EXPLAIN для канонических запросов API и поиск '
+            'последовательных сканирований таблиц.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force-index', action='store_true',
+            help='PostgreSQL: enable_seqscan=off, чтобы проверить наличие '
+                 'подходящих индексов даже на маленькой базе.'
+        )
+        parser.add_argument('--allow', nargs='*', default=SMALL_TABLES)
+        parser.add_argument('--fail', action='store_true',
+                            help='Завершиться с ошибкой при seq scan.')
+        parser.add_argument('--verbose-plans', action='store_true')
+
+    def handle(self, *args, **options):
+        pattern = SEQUENTIAL_SCAN.get(connection.vendor)
+        if pattern is None:
+            raise CommandError(f'СУБД {connection.vendor} не поддерживается.')
+        flagged = []
+        with self.force_index(options['force_index']):
+            for name, queryset in self.get_queries():
+                plan = queryset.explain()
+                tables = sorted(
+                    set(pattern.findall(plan)) - set(options['allow'])
+                )
+                status = 'SEQ SCAN: ' + ', '.join(tables) if tables else 'ok'
+                self.stdout.write(f'{name:<36} {status}')
+                if options['verbose_plans'] or tables:
+                    self.stdout.write(plan + '\n')
+                if tables:
+                    flagged.append(name)
+        if flagged and options['fail']:
+            raise CommandError(
+                'Запросы без индекса: ' + ', '.join(flagged)
+            )
+
+    @contextmanager
+    def force_index(self, enabled):
+        enabled = enabled and connection.vendor == 'postgresql'
+        if enabled:
+            with connection.cursor() as cursor:
+                cursor.execute('SET enable_seqscan = off')
+        try:
+            yield
+        finally:
+            if enabled:
+                with connection.cursor() as cursor:
+                    cursor.execute('RESET enable_seqscan')
+
+    def filter_recipes(self, user, **params):
+        return RecipeFilterSet(
+            params, queryset=Recipe.objects.all(),
+            request=SimpleNamespace(user=user)
+        ).qs
+
+    def get_queries(self):
+        user = (User.objects.filter(cart__isnull=False).first()
+                or User.objects.first())
+        recipe = Recipe.objects.first()
+        if user is None or recipe is None:
+            raise CommandError('Нужны данные: запустите generate_dataset.')
+        author = recipe.author
+        tags = list(Tag.objects.values_list('slug', flat=True)[:2])
+        return [
+            ('recipes.list', Recipe.objects.all()[:6]),
+            ('recipes.list.page_100', Recipe.objects.all()[600:606]),
+            ('recipes.list.author',
+             self.filter_recipes(user, author=author.id)[:6]),
+            ('recipes.list.tags',
+             self.filter_recipes(user, tags=tags).distinct()[:6]),
+            ('recipes.list.is_favorited',
+             self.filter_recipes(user, is_favorited=True)[:6]),
+            ('recipes.list.is_in_shopping_cart',
+             self.filter_recipes(user, is_in_shopping_cart=True)[:6]),
+            ('recipe.ingredients',
+             recipe.ingredients.values(
+                 'id', 'name', 'measurement_unit',
+                 amount=F('ingredients_recipe__amount'))),
+            ('recipe.tags', recipe.tags.all()),
+            ('recipe.is_favorited',
+             Favorite.objects.filter(user=user, recipe__id=recipe.id)[:1]),
+            ('recipe.is_in_shopping_cart',
+             Cart.objects.filter(user=user, recipe__id=recipe.id)[:1]),
+            ('user.is_subscribed',
+             Subscription.objects.filter(user=user, author=author)[:1]),
+            ('users.subscriptions',
+             User.objects.filter(subscription__user=user)[:6]),
+            ('users.subscriptions.recipes',
+             Recipe.objects.filter(author=author)[:3]),
+            ('users.subscriptions.recipes_count',
+             Recipe.objects.filter(author=author).values('author')
+             .annotate(count=Count('id'))),
+            ('recipes.download_shopping_cart',
+             IngredientInRecipe.objects.filter(recipe__cart__user=user)
+             .values('ingredient__name', 'ingredient__measurement_unit')
+             .annotate(quantity=Sum('amount'))),
+            ('ingredients.search',
+             Ingredient.objects.filter(name__istartswith='мол')),
+        ]
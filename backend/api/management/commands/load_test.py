@@ -0,0 +1,144 @@
+import asyncio
+import time
+from urllib.parse import quote, urlsplit
+
+from django.core.management.base import BaseCommand
+
+DEFAULT_PATHS = (
+    '/api/recipes/',
+    '/api/ingredients/?name=а',
+    '/api/tags/',
+)
+
+
+def percentile(values, rank):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(rank / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def read_response(reader):
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('Соединение закрыто сервером')
+    status = int(status_line.split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    if headers.get('transfer-encoding') == 'chunked':
+        size = 0
+        while True:
+            chunk_size = int((await reader.readline()).strip() or b'0', 16)
+            await reader.readexactly(chunk_size + 2)
+            size += chunk_size
+            if not chunk_size:
+                break
+    elif 'content-length' in headers:
+        size = int(headers['content-length'])
+        await reader.readexactly(size)
+    else:
+        size = len(await reader.read())
+    return status, size, headers.get('connection') == 'close'
+
+
+class Command(BaseCommand):
+    help = ('Нагрузочный тест HTTP API: сравнение масштабирования '
+            'при разном числе одновременных соединений.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://localhost:8000')
+        parser.add_argument(
+            '--concurrency', type=int, nargs='+', default=[100, 1000]
+        )
+        parser.add_argument('--duration', type=float, default=10.0)
+        parser.add_argument('--path', action='append', dest='paths')
+        parser.add_argument('--token', default=None)
+        parser.add_argument('--timeout', type=float, default=30.0)
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['url'])
+        self.host = url.hostname
+        self.port = url.port or 80
+        self.paths = options['paths'] or DEFAULT_PATHS
+        self.token = options['token']
+        self.timeout = options['timeout']
+        self.stdout.write(
+            f'{"conn":>6} {"req":>8} {"err":>6} {"rps":>9} '
+            f'{"p50,ms":>8} {"p95,ms":>8} {"p99,ms":>8} {"max,ms":>8}'
+        )
+        for concurrency in options['concurrency']:
+            result = asyncio.get_event_loop().run_until_complete(
+                self.run_level(concurrency, options['duration'])
+            )
+            self.stdout.write(self.format_result(concurrency, *result))
+
+    def build_request(self, path):
+        lines = [
+            f'GET {quote(path, safe="/?=&,")} HTTP/1.1',
+            f'Host: {self.host}',
+            'Accept: application/json',
+            'Connection: keep-alive',
+        ]
+        if self.token:
+            lines.append(f'Authorization: Token {self.token}')
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode('utf-8')
+
+    async def worker(self, number, deadline, latencies, errors):
+        requests = [self.build_request(path) for path in self.paths]
+        reader = writer = None
+        sent = number
+        while time.monotonic() < deadline:
+            started = time.monotonic()
+            try:
+                if writer is None:
+                    reader, writer = await asyncio.wait_for(
+                        asyncio.open_connection(self.host, self.port),
+                        self.timeout
+                    )
+                writer.write(requests[sent % len(requests)])
+                sent += 1
+                status, _, close = await asyncio.wait_for(
+                    read_response(reader), self.timeout
+                )
+            except (OSError, asyncio.TimeoutError, ValueError,
+                    asyncio.IncompleteReadError):
+                errors.append(1)
+                if writer is not None:
+                    writer.close()
+                reader = writer = None
+                continue
+            if status >= 400:
+                errors.append(status)
+            else:
+                latencies.append(time.monotonic() - started)
+            if close:
+                writer.close()
+                reader = writer = None
+        if writer is not None:
+            writer.close()
+
+    async def run_level(self, concurrency, duration):
+        latencies, errors = [], []
+        started = time.monotonic()
+        deadline = started + duration
+        await asyncio.gather(*(
+            self.worker(number, deadline, latencies, errors)
+            for number in range(concurrency)
+        ))
+        return latencies, errors, time.monotonic() - started
+
+    def format_result(self, concurrency, latencies, errors, elapsed):
+        total = len(latencies) + len(errors)
+        ms = [latency * 1000 for latency in latencies]
+        return (
+            f'{concurrency:>6} {total:>8} {len(errors):>6} '
+            f'{len(latencies) / elapsed:>9.1f} '
+            f'{percentile(ms, 50):>8.1f} {percentile(ms, 95):>8.1f} '
+            f'{percentile(ms, 99):>8.1f} {max(ms, default=0):>8.1f}'
+        )
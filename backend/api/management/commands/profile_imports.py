@@ -0,0 +1,87 @@
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+IMPORT_TIME = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+STARTUP = (
+    'import {module}\n'
+    'from django.urls import get_resolver\n'
+    'get_resolver().url_patterns\n'
+)
+
+
+class Command(BaseCommand):
+    help = ('Профиль времени импорта при старте воркера (python -X '
+            'importtime): самые медленные модули и пакеты.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--module', default='foodgram.wsgi',
+                            help='Точка входа, импортируемая воркером.')
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument('--sort', choices=('self', 'cumulative'),
+                            default='cumulative')
+        parser.add_argument('--warmup', action='store_true',
+                            help='Учитывать прогрев (STARTUP_WARMUP).')
+
+    def handle(self, *args, **options):
+        env = dict(
+            os.environ,
+            DJANGO_SETTINGS_MODULE=os.environ.get(
+                'DJANGO_SETTINGS_MODULE', 'foodgram.settings'
+            ),
+            STARTUP_WARMUP=str(options['warmup']),
+        )
+        started = time.perf_counter()
+        process = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c',
+             STARTUP.format(module=options['module'])],
+            cwd=settings.BASE_DIR, env=env,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            universal_newlines=True,
+        )
+        elapsed = time.perf_counter() - started
+        rows, errors = self.parse(process.stderr)
+        if process.returncode:
+            raise CommandError('\n'.join(errors[-20:]))
+        self.stdout.write(
+            f'Старт {options["module"]}: {elapsed * 1000:.0f} мс, '
+            f'импорт {sum(row[0] for row in rows) / 1000:.0f} мс, '
+            f'модулей {len(rows)}'
+        )
+        self.report_modules(rows, options['sort'], options['limit'])
+        self.report_packages(rows, options['limit'])
+
+    def parse(self, output):
+        rows, errors = [], []
+        for line in output.splitlines():
+            match = IMPORT_TIME.match(line)
+            if match is None:
+                errors.append(line)
+                continue
+            own, cumulative, indent, module = match.groups()
+            rows.append((int(own), int(cumulative), len(indent) // 2, module))
+        return rows, errors
+
+    def report_modules(self, rows, sort, limit):
+        column = 0 if sort == 'self' else 1
+        self.stdout.write(f'\n{"self, мс":>9} {"всего, мс":>10}  модуль')
+        for own, cumulative, _, module in sorted(
+            rows, key=lambda row: row[column], reverse=True
+        )[:limit]:
+            self.stdout.write(
+                f'{own / 1000:>9.1f} {cumulative / 1000:>10.1f}  {module}'
+            )
+
+    def report_packages(self, rows, limit):
+        packages = Counter()
+        for own, _, _, module in rows:
+            packages[module.split('.')[0]] += own
+        self.stdout.write(f'\n{"self, мс":>9}  пакет')
+        for package, own in packages.most_common(limit):
+            self.stdout.write(f'{own / 1000:>9.1f}  {package}')
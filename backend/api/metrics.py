@@ -0,0 +1,167 @@
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+
+FIELDS = (
+    ('wall_time', 'foodgram_request_duration_seconds',
+     'Время обработки запроса'),
+    ('db_time', 'foodgram_db_duration_seconds', 'Время запросов к БД'),
+    ('db_queries', 'foodgram_db_queries', 'Число запросов к БД'),
+    ('serializer_time', 'foodgram_serializer_duration_seconds',
+     'Время сериализации'),
+    ('response_bytes', 'foodgram_response_bytes', 'Размер ответа'),
+)
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+class RequestMetrics:
+    __slots__ = ('db_time', 'db_queries', 'serializer_time')
+
+    def __init__(self):
+        self.db_time = 0.0
+        self.db_queries = 0
+        self.serializer_time = 0.0
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.db_queries += 1
+
+
+class EndpointStats:
+
+    def __init__(self, sample_size):
+        self.count = 0
+        self.sums = dict.fromkeys((name for name, _, _ in FIELDS), 0)
+        self.samples = deque(maxlen=sample_size)
+
+    def observe(self, values):
+        self.count += 1
+        for name, value in values.items():
+            self.sums[name] += value
+        self.samples.append(values)
+
+    def quantile(self, name, quantile):
+        ordered = sorted(sample[name] for sample in self.samples)
+        return ordered[min(len(ordered) - 1, int(quantile * len(ordered)))]
+
+
+class MetricsRegistry:
+    """Метрики эндпоинтов в памяти процесса с перцентилями по выборке."""
+
+    def __init__(self, sample_size=1024):
+        self.sample_size = sample_size
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def observe(self, endpoint, **values):
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = EndpointStats(
+                    self.sample_size
+                )
+            stats.observe(values)
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+    def render(self):
+        lines = []
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+            for name, metric, description in FIELDS:
+                lines.append(f'# HELP {metric} {description}')
+                lines.append(f'# TYPE {metric} summary')
+                for endpoint, stats in endpoints:
+                    label = f'view="{endpoint}"'
+                    for quantile in QUANTILES:
+                        lines.append(
+                            f'{metric}{{{label},quantile="{quantile}"}} '
+                            f'{stats.quantile(name, quantile)}'
+                        )
+                    lines.append(f'{metric}_sum{{{label}}} {stats.sums[name]}')
+                    lines.append(f'{metric}_count{{{label}}} {stats.count}')
+        return '\n'.join(
+            lines + render_pool_stats() + render_worker_stats()
+        ) + '\n'
+
+
+def render_pool_stats():
+    from foodgram.db.pool import get_pools_stats
+
+    lines = [
+        '# TYPE foodgram_db_pool_events_total counter',
+        '# TYPE foodgram_db_pool_connections gauge',
+    ]
+    for stats in get_pools_stats():
+        alias = stats.pop('alias')
+        for state in ('size', 'idle', 'in_use', 'max_size'):
+            lines.append(
+                f'foodgram_db_pool_connections'
+                f'{{alias="{alias}",state="{state}"}} {stats.pop(state)}'
+            )
+        for event, value in sorted(stats.items()):
+            lines.append(
+                f'foodgram_db_pool_events_total'
+                f'{{alias="{alias}",event="{event}"}} {value}'
+            )
+    return lines
+
+
+def render_worker_stats():
+    from foodgram.workers import stats
+
+    snapshot = stats.snapshot()
+    label = f'pid="{snapshot.pop("pid")}"'
+    lines = []
+    for name, value in snapshot.items():
+        lines.append(f'# TYPE foodgram_worker_{name} gauge')
+        lines.append(f'foodgram_worker_{name}{{{label}}} {value}')
+    return lines
+
+
+registry = MetricsRegistry(settings.PERFORMANCE_METRICS_SAMPLE_SIZE)
+
+_timed_classes = {}
+
+
+def timed_serializer_class(serializer_class):
+    if serializer_class not in _timed_classes:
+        data = serializer_class.data
+
+        def timed_data(serializer):
+            request = serializer.context.get('request')
+            metrics = getattr(request, 'perf_metrics', None)
+            if metrics is None:
+                return data.fget(serializer)
+            started = time.perf_counter()
+            try:
+                return data.fget(serializer)
+            finally:
+                metrics.serializer_time += time.perf_counter() - started
+
+        _timed_classes[serializer_class] = type(
+            serializer_class.__name__,
+            (serializer_class,),
+            {'data': property(timed_data), '__module__': __name__},
+        )
+    return _timed_classes[serializer_class]
+
+
+class InstrumentedViewMixin:
+    """Учёт времени сериализации для PerformanceMiddleware."""
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if getattr(self.request, 'perf_metrics', None) is not None:
+            serializer.__class__ = timed_serializer_class(
+                serializer.__class__
+            )
+        return serializer
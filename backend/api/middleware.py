@@ -0,0 +1,64 @@
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from .metrics import RequestMetrics, registry
+
+
+class PerformanceMiddleware:
+    """Время запроса, запросы к БД, сериализация и размер ответа.
+
+    Включается PERFORMANCE_METRICS; без него Django исключает middleware
+    из цепочки. Метрики отдаются в заголовке Server-Timing и на
+    /api/metrics/ в текстовом формате Prometheus.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PERFORMANCE_METRICS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def get_endpoint(self, request):
+        match = request.resolver_match
+        if match is None:
+            return 'unresolved'
+        view = getattr(match.func, 'cls', match.func)
+        name = getattr(view, '__name__', match.view_name)
+        actions = getattr(match.func, 'actions', None)
+        if actions:
+            action = actions.get(request.method.lower(), 'unknown')
+            return f'{name}.{action}'
+        return name
+
+    def __call__(self, request):
+        metrics = request.perf_metrics = RequestMetrics()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(
+                    connection.execute_wrapper(metrics.execute_wrapper)
+                )
+            response = self.get_response(request)
+        wall_time = time.perf_counter() - started
+        if response.streaming:
+            size = int(response.get('Content-Length', 0))
+        else:
+            size = len(response.content)
+        registry.observe(
+            self.get_endpoint(request),
+            wall_time=wall_time,
+            db_time=metrics.db_time,
+            db_queries=metrics.db_queries,
+            serializer_time=metrics.serializer_time,
+            response_bytes=size,
+        )
+        response['Server-Timing'] = (
+            f'db;dur={metrics.db_time * 1000:.1f};'
+            f'desc="{metrics.db_queries} queries", '
+            f'serialize;dur={metrics.serializer_time * 1000:.1f}, '
+            f'total;dur={wall_time * 1000:.1f}'
+        )
+        return response
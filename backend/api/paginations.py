@@ -1,5 +1,73 @@
-from rest_framework.pagination import PageNumberPagination
+import binascii
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 
 class CustomPagination(PageNumberPagination):
     page_size_query_param = 'limit'
+
+
+class FeedPagination(BasePagination):
+    """Keyset-пагинация по ключам (pub_date, id) от get_feed."""
+
+    page_size = 10
+    page_size_query_param = 'limit'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Неверный курсор.'
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            pub_date, recipe_id = b64decode(
+                encoded.encode('ascii')
+            ).decode('ascii').split(' ')
+            key = parse_datetime(pub_date), int(recipe_id)
+        except (TypeError, ValueError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        if key[0] is None:
+            raise NotFound(self.invalid_cursor_message)
+        return key
+
+    def encode_cursor(self, key):
+        pub_date, recipe_id = key
+        encoded = b64encode(
+            f'{pub_date.isoformat()} {recipe_id}'.encode('ascii')
+        ).decode('ascii')
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encoded
+        )
+
+    def paginate_keys(self, get_keys, request):
+        """get_keys(before, limit) - отсортированные по убыванию ключи."""
+        self.base_url = request.build_absolute_uri()
+        page_size = self.get_page_size(request)
+        keys = get_keys(self.decode_cursor(request), page_size + 1)
+        page = keys[:page_size]
+        self.next = (
+            self.encode_cursor(page[-1]) if len(keys) > page_size else None
+        )
+        return page
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.next),
+            ('results', data),
+        ]))
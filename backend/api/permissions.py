@@ -1,3 +1,4 @@
+from django.conf import settings
 from rest_framework import permissions
 
 from users.models import UserRole
@@ -39,3 +40,15 @@ class RecipePermission(permissions.BasePermission):
         if request.method in permissions.SAFE_METHODS:
             return True
         return False
+
+
+class MetricsPermission(permissions.BasePermission):
+
+    def has_permission(self, request, view):
+        client = (request.META.get('HTTP_X_REAL_IP')
+                  or request.META.get('REMOTE_ADDR'))
+        if client in settings.PERFORMANCE_METRICS_ALLOWED_IPS:
+            return True
+        return request.user.is_authenticated and (
+            request.user.role == UserRole.Admin or request.user.is_superuser
+        )
@@ -1,4 +1,7 @@
-from django.db import transaction
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
 from django.db.models import F
 from django.shortcuts import get_object_or_404
 from djoser.serializers import UserSerializer
@@ -8,8 +11,14 @@ from rest_framework.serializers import (ModelSerializer, SerializerMethodField,
                                         UniqueTogetherValidator,
                                         ValidationError)
 
+from .exceptions import PreconditionFailed
+from .fieldsets import SparseFieldsMixin
 from recipes.models import (Cart, Favorite, Ingredient, IngredientInRecipe,
-                            Recipe, Tag)
+                            MealPlan, Recipe, Tag)
+from recipes.nutrition import TOTALS, totals
+from recipes.pantry import invalidate_index
+from recipes.tasks import (fan_out_recipe, make_thumbnail,
+                           reconcile_user_counters)
 from users.models import Subscription, User
 
 
@@ -35,14 +44,31 @@ class UsersSerializer(UserSerializer):
         )
 
     def get_is_subscribed(self, obj: User):
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         request = self.context.get('request')
-        if not request or request.user.is_anonymous:
+        if not request or request.user.is_anonymous or request.user == obj:
             return False
         return Subscription.objects.filter(
             user=request.user, author=obj
         ).exists()
 
 
+class UserStatsSerializer(UsersSerializer):
+
+    class Meta(UsersSerializer.Meta):
+        fields = UsersSerializer.Meta.fields + (
+            'recipes_count',
+            'followers_count',
+            'favorites_received'
+        )
+        read_only_fields = (
+            'recipes_count',
+            'followers_count',
+            'favorites_received'
+        )
+
+
 class IngredientSerializer(ModelSerializer):
     class Meta:
         fields = '__all__'
@@ -63,7 +89,7 @@ class TagSerializer(ModelSerializer):
         model = Tag
 
 
-class RecipeReadSerializer(ModelSerializer):
+class RecipeReadSerializer(SparseFieldsMixin, ModelSerializer):
     tags = TagSerializer(many=True, read_only=True)
     author = UsersSerializer(read_only=True)
     ingredients = SerializerMethodField()
@@ -81,11 +107,34 @@ class RecipeReadSerializer(ModelSerializer):
             'name',
             'image',
             'text',
-            'cooking_time'
+            'cooking_time',
+            'calories',
+            'proteins',
+            'fats',
+            'carbohydrates',
+            'cost'
         )
         model = Recipe
+        collapsed_fields = {
+            'author': lambda: serializers.PrimaryKeyRelatedField(
+                read_only=True
+            ),
+            'tags': lambda: serializers.PrimaryKeyRelatedField(
+                many=True, read_only=True
+            ),
+            'ingredients': lambda: serializers.PrimaryKeyRelatedField(
+                many=True, read_only=True
+            ),
+        }
 
     def get_ingredients(self, obj):
+        if hasattr(obj, 'ingredient_amounts'):
+            return [{
+                'id': item.ingredient.id,
+                'name': item.ingredient.name,
+                'measurement_unit': item.ingredient.measurement_unit,
+                'amount': item.amount,
+            } for item in obj.ingredient_amounts]
         recipe = obj
         return recipe.ingredients.values(
             'id',
@@ -95,17 +144,25 @@ class RecipeReadSerializer(ModelSerializer):
         )
 
     def get_is_favorited(self, obj):
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         request = self.context['request']
         if not request or request.user.is_anonymous:
             return False
+        if 'favorites' in self.context:
+            return obj.id in self.context['favorites']
         return Favorite.objects.filter(
             user=self.context['request'].user, recipe__id=obj.id
         ).exists()
 
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         request = self.context['request']
         if not request or request.user.is_anonymous:
             return False
+        if 'cart' in self.context:
+            return obj.id in self.context['cart']
         return Cart.objects.filter(
             user=self.context['request'].user, recipe__id=obj.id
         ).exists()
@@ -140,9 +197,10 @@ class RecipeWriteSerializer(ModelSerializer):
             [IngredientInRecipe(
                 recipe=recipe,
                 amount=ingredient['amount'],
-                ingredient=Ingredient.objects.get(id=ingredient['id'])
+                ingredient_id=ingredient['id']
             ) for ingredient in ingredients]
         )
+        invalidate_index()
 
     def validate(self, data):
         list_ingredients = [
@@ -156,6 +214,20 @@ class RecipeWriteSerializer(ModelSerializer):
                 {'IngredientsUniqueError':
                     'Ингредиенты должны быть уникальными'}
             )
+        found = {
+            ingredient['id']: ingredient
+            for ingredient in Ingredient.objects.filter(
+                id__in=list_ingredients
+            ).values('id', 'measurement_unit', *TOTALS.values())
+        }
+        if len(found) != unique_ingredients:
+            raise ValidationError(
+                {'ingredients': 'Ингредиент не найден'}
+            )
+        data.update(totals([
+            (found[ingredient['id']], ingredient['amount'])
+            for ingredient in data['ingredients']
+        ]))
         return data
 
     @transaction.atomic
@@ -169,13 +241,31 @@ class RecipeWriteSerializer(ModelSerializer):
         )
         self.create_ingredients(recipe, ingredients)
         recipe.tags.set(tags)
+        make_thumbnail.delay(recipe.id)
+        fan_out_recipe.delay(recipe.id)
+        reconcile_user_counters.delay(recipe.author_id)
         return recipe
 
+    def set_ingredients(self, recipe, ingredients):
+        current = set(recipe.ingredients_recipe.values_list(
+            'ingredient_id', 'amount'
+        ))
+        if current == {(item['id'], item['amount']) for item in ingredients}:
+            return
+        recipe.ingredients.clear()
+        self.create_ingredients(recipe, ingredients)
+
     @transaction.atomic
     def update(self, instance, validated_data):
-        ingredients = validated_data.pop('ingredients')
-        instance.ingredients.clear()
-        self.create_ingredients(instance, ingredients)
+        version = validated_data.pop('version', instance.version)
+        if not Recipe.objects.filter(pk=instance.pk, version=version).update(
+            version=F('version') + 1
+        ):
+            raise PreconditionFailed()
+        instance.version = version + 1
+        self.set_ingredients(instance, validated_data.pop('ingredients'))
+        if 'image' in validated_data:
+            make_thumbnail.delay(instance.id)
         return super().update(instance, validated_data)
 
     def to_representation(self, instance):
@@ -198,7 +288,7 @@ class ShortRecipe(ModelSerializer):
         model = Recipe
 
 
-class SubscriptionListSerializer(ModelSerializer):
+class SubscriptionListSerializer(SparseFieldsMixin, ModelSerializer):
     is_subscribed = SerializerMethodField(read_only=True)
     recipes = SerializerMethodField()
     recipes_count = SerializerMethodField()
@@ -215,26 +305,43 @@ class SubscriptionListSerializer(ModelSerializer):
             'recipes_count'
         )
         model = User
+        collapsed_fields = {
+            'recipes': lambda: SerializerMethodField(
+                method_name='get_recipe_ids'
+            ),
+        }
 
     def get_is_subscribed(self, author):
+        if hasattr(author, 'is_subscribed'):
+            return author.is_subscribed
         return Subscription.objects.filter(
             user=self.context.get('request').user, author=author
         ).exists()
 
+    def get_recipes_queryset(self, author):
+        if hasattr(author, 'prefetched_recipes'):
+            recipes = author.prefetched_recipes
+        else:
+            recipes = Recipe.objects.filter(author=author)
+        recipes_limit = self.context['request'].query_params.get(
+            'recipes_limit', ''
+        )
+        if not recipes_limit.isdigit():
+            return recipes
+        return recipes[:int(recipes_limit)]
+
+    def get_recipe_ids(self, author):
+        return [recipe.id for recipe in self.get_recipes_queryset(author)]
+
     def get_recipes(self, author):
-        request = self.context.get('request')
-        recipes_limit = request.query_params.get('recipes_limit')
-        if not recipes_limit:
-            return ShortRecipe(
-                Recipe.objects.filter(author=author),
-                many=True, context={'request': request}
-            ).data
         return ShortRecipe(
-            Recipe.objects.filter(author=author)[:int(recipes_limit)],
-            many=True, context={'request': request}
+            self.get_recipes_queryset(author),
+            many=True, context={'request': self.context.get('request')}
         ).data
 
     def get_recipes_count(self, author):
+        if hasattr(author, 'recipes_total'):
+            return author.recipes_total
         return Recipe.objects.filter(author=author).count()
 
 
@@ -314,3 +421,68 @@ class CartSerializer(ModelSerializer):
             instance.recipe,
             context={'request': self.context['request']}
         ).data
+
+
+MEAL_PLAN_EXISTS = {
+    'MealPlan_exists_error': 'Рецепт уже запланирован на эту дату.'
+}
+
+
+class MealPlanSerializer(ModelSerializer):
+
+    class Meta:
+        model = MealPlan
+        fields = ('id', 'date', 'recipe', 'servings')
+
+    def validate(self, data):
+        plans = MealPlan.objects.filter(
+            user=self.context['request'].user,
+            date=data.get('date', getattr(self.instance, 'date', None)),
+            recipe=data.get(
+                'recipe', getattr(self.instance, 'recipe_id', None)
+            )
+        )
+        if self.instance is not None:
+            plans = plans.exclude(pk=self.instance.pk)
+        if plans.exists():
+            raise ValidationError(MEAL_PLAN_EXISTS)
+        return data
+
+    def save(self, **kwargs):
+        # Проверка в validate не спасает от одновременных запросов.
+        try:
+            with transaction.atomic():
+                return super().save(**kwargs)
+        except IntegrityError:
+            raise ValidationError(MEAL_PLAN_EXISTS)
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        data['recipe'] = ShortRecipe(
+            instance.recipe, context={'request': self.context['request']}
+        ).data
+        return data
+
+
+class PeriodSerializer(serializers.Serializer):
+    """Период ?start=&end=, по умолчанию текущая неделя."""
+
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+
+    def validate(self, data):
+        today = date.today()
+        start = data.setdefault(
+            'start', today - timedelta(days=today.weekday())
+        )
+        end = data.setdefault('end', start + timedelta(days=6))
+        if end < start:
+            raise ValidationError(
+                {'end': 'Конец периода раньше начала.'}
+            )
+        if (end - start).days >= settings.MEAL_PLAN_MAX_DAYS:
+            raise ValidationError(
+                {'end': f'Период не длиннее {settings.MEAL_PLAN_MAX_DAYS} '
+                        f'дней.'}
+            )
+        return data
@@ -0,0 +1,59 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.archive import archive_carts
+from recipes.models import ArchivedCart, Cart, Recipe
+from users.models import User
+
+
+class ArchivedCartRestoreTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(
+            email='buyer@example.com', username='buyer',
+            first_name='buyer', last_name='buyer',
+        )
+        cls.token = Token.objects.create(user=cls.user).key
+        cls.recipe = Recipe.objects.create(
+            author=cls.user, name='Каша', text='Текст',
+            image='recipes/images/recipe.png', cooking_time=10,
+        )
+
+    def setUp(self):
+        Cart.objects.create(
+            user=self.user, recipe=self.recipe,
+            created=timezone.now() - timedelta(days=365),
+        )
+        archive_carts(timezone.now() - timedelta(days=180), 100)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token}')
+
+    def assert_restored(self, restored):
+        self.assertEqual(Cart.objects.filter(user=self.user).exists(),
+                         restored)
+        self.assertEqual(ArchivedCart.objects.exists(), not restored)
+
+    def test_safe_reads_do_not_restore(self):
+        for url in ('/api/recipes/', f'/api/recipes/{self.recipe.id}/',
+                    '/api/recipes/?is_in_shopping_cart=0'):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 200)
+                self.assert_restored(False)
+
+    def check_restores(self, url):
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assert_restored(True)
+
+    def test_download_restores(self):
+        self.check_restores('/api/recipes/download_shopping_cart/')
+
+    def test_totals_restore(self):
+        self.check_restores('/api/recipes/shopping_cart_totals/')
+
+    def test_cart_filter_restores(self):
+        self.check_restores('/api/recipes/?is_in_shopping_cart=1')
@@ -0,0 +1,194 @@
+import shutil
+import tempfile
+from datetime import date
+
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.budgets import QueryBudget, QueryBudgetExceeded
+from recipes.models import Cart, Favorite, Ingredient, MealPlan, Recipe, Tag
+from users.models import Subscription, User
+
+MEDIA_ROOT = tempfile.mkdtemp()
+PNG = (
+    'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAA'
+    'DUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=='
+)
+
+
+def create_user(name):
+    return User.objects.create(
+        email=f'{name}@example.com', username=name,
+        first_name=name, last_name=name,
+    )
+
+
+@override_settings(QUERY_BUDGETS='raise', MEDIA_ROOT=MEDIA_ROOT)
+class ActionBudgetTests(TestCase):
+    """Каждое действие с бюджетом укладывается в query_budgets."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('reader')
+        cls.author = create_user('author')
+        cls.token = Token.objects.create(user=cls.user).key
+        cls.tags = [
+            Tag.objects.create(name=name, slug=slug, color=color)
+            for name, slug, color in (
+                ('Завтрак', 'breakfast', '#E26C2D'),
+                ('Обед', 'lunch', '#49B64E'),
+                ('Ужин', 'dinner', '#8775D2'),
+            )
+        ]
+        cls.ingredients = [
+            Ingredient.objects.create(
+                name=name, measurement_unit=unit, calories=100, price=50
+            )
+            for name, unit in (('мука', 'г'), ('молоко', 'мл'), ('яйца', 'шт'))
+        ]
+        cls.recipes = []
+        for number, author in enumerate((cls.author, cls.author, cls.user)):
+            recipe = Recipe.objects.create(
+                author=author, name=f'Рецепт {number}', text='Текст',
+                image='recipes/images/recipe.png', cooking_time=10,
+            )
+            recipe.tags.set(cls.tags)
+            for ingredient in cls.ingredients:
+                recipe.ingredients_recipe.create(
+                    ingredient=ingredient, amount=number + 1
+                )
+            cls.recipes.append(recipe)
+        cls.recipe, cls.other_recipe, cls.own_recipe = cls.recipes
+        Favorite.objects.create(user=cls.user, recipe=cls.other_recipe)
+        Cart.objects.create(user=cls.user, recipe=cls.other_recipe)
+        cls.plan = MealPlan.objects.create(
+            user=cls.user, recipe=cls.recipe, date=date.today(), servings=2
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token}')
+
+    def check(self, method, url, status=200, data=None):
+        response = getattr(self.client, method)(url, data, format='json')
+        self.assertEqual(response.status_code, status, getattr(
+            response, 'data', None
+        ))
+        if hasattr(response, 'streaming_content'):
+            b''.join(response.streaming_content)
+        return response
+
+    def recipe_data(self, **data):
+        return dict({
+            'name': 'Блины', 'text': 'Смешать и пожарить', 'cooking_time': 20,
+            'image': PNG, 'tags': [tag.id for tag in self.tags],
+            'ingredients': [
+                {'id': ingredient.id, 'amount': 100}
+                for ingredient in self.ingredients
+            ],
+        }, **data)
+
+    def test_tags_and_ingredients(self):
+        self.check('get', '/api/tags/')
+        self.check('get', f'/api/tags/{self.tags[0].id}/')
+        self.check('get', '/api/ingredients/?name=мо')
+        self.check('get', f'/api/ingredients/{self.ingredients[0].id}/')
+
+    def test_recipe_reads(self):
+        self.check('get', '/api/recipes/?limit=6')
+        self.check('get', '/api/recipes/?limit=6&is_favorited=1'
+                          '&is_in_shopping_cart=1&tags=breakfast&tags=lunch')
+        self.check('get', f'/api/recipes/?limit=6&author={self.author.id}'
+                          '&tags=breakfast&tags=lunch&tags=dinner')
+        self.check('get', f'/api/recipes/{self.recipe.id}/')
+        self.check('get', f'/api/recipes/{self.recipe.id}/similar/')
+        self.check('get', '/api/recipes/recommended/')
+        self.check('get', '/api/recipes/feed/')
+        self.check('get', '/api/recipes/shopping_cart_totals/')
+        self.check('get', '/api/recipes/download_shopping_cart/')
+
+    def test_recipe_writes(self):
+        response = self.check(
+            'post', '/api/recipes/', 201, self.recipe_data()
+        )
+        url = f'/api/recipes/{response.data["id"]}/'
+        self.check('put', url, data=self.recipe_data(name='Оладьи'))
+        self.check('patch', url, data=self.recipe_data(cooking_time=30))
+        self.check('delete', url, 204)
+
+    def test_favorite_and_shopping_cart(self):
+        for name in ('favorite', 'shopping_cart'):
+            url = f'/api/recipes/{self.recipe.id}/{name}/'
+            self.check('post', url, 201)
+            self.check('delete', url, 204)
+
+    def test_users(self):
+        self.check('get', '/api/users/?limit=6')
+        self.check('get', f'/api/users/{self.author.id}/')
+        self.check('get', '/api/users/me/')
+        url = f'/api/users/{self.author.id}/subscribe/'
+        self.check('post', url, 201)
+        self.check('get', '/api/users/subscriptions/?limit=6&recipes_limit=1')
+        self.check('delete', url, 204)
+        self.assertFalse(Subscription.objects.exists())
+
+    def test_meal_plans(self):
+        self.check('get', '/api/meal_plans/')
+        response = self.check('post', '/api/meal_plans/', 201, {
+            'date': date.today().isoformat(),
+            'recipe': self.other_recipe.id, 'servings': 1,
+        })
+        url = f'/api/meal_plans/{response.data["id"]}/'
+        self.check('get', url)
+        self.check('put', url, data={
+            'date': date.today().isoformat(),
+            'recipe': self.own_recipe.id, 'servings': 3,
+        })
+        self.check('patch', url, data={'servings': 4})
+        self.check('get', '/api/meal_plans/download_shopping_list/')
+        self.check('delete', url, 204)
+
+
+class QueryBudgetTests(TestCase):
+    @override_settings(QUERY_BUDGETS='raise')
+    def test_exceeded_budget_reports_sql_and_stack(self):
+        with self.assertRaises(QueryBudgetExceeded) as context:
+            with QueryBudget(1, 'tags'):
+                list(Tag.objects.all())
+                list(Tag.objects.filter(slug='breakfast'))
+        message = str(context.exception)
+        self.assertIn('tags: 2 запросов к БД при бюджете 1', message)
+        self.assertIn('FROM "recipes_tag"', message)
+        self.assertIn(f'File "{__file__}"', message)
+        self.assertIn("list(Tag.objects.filter(slug='breakfast'))", message)
+
+    @override_settings(QUERY_BUDGETS='raise')
+    def test_decorator_within_budget(self):
+        @QueryBudget(1)
+        def read_tags():
+            return list(Tag.objects.all())
+
+        self.assertEqual(read_tags(), [])
+
+    @override_settings(QUERY_BUDGETS='log')
+    def test_log_mode_reports_overrun_and_repeated_queries(self):
+        with self.assertLogs('api.budgets', 'WARNING') as logs:
+            with QueryBudget(2, 'tags'):
+                for slug in ('a', 'b', 'c'):
+                    list(Tag.objects.filter(slug=slug))
+        output = '\n'.join(logs.output)
+        self.assertIn('tags: возможный N+1', output)
+        self.assertIn('3 x SELECT', output)
+        self.assertIn('tags: 3 запросов к БД при бюджете 2', output)
+
+    @override_settings(QUERY_BUDGETS='off')
+    def test_off_mode_does_not_count(self):
+        with QueryBudget(0, 'tags') as budget:
+            list(Tag.objects.all())
+        self.assertEqual(budget.queries, [])
@@ -0,0 +1,74 @@
+from datetime import date
+from unittest import mock
+
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.serializers import MealPlanSerializer
+from recipes.models import Ingredient, MealPlan, Recipe
+from users.models import User
+
+
+class MealPlanTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(
+            email='planner@example.com', username='planner',
+            first_name='planner', last_name='planner',
+        )
+        cls.token = Token.objects.create(user=cls.user).key
+        cls.recipe = Recipe.objects.create(
+            author=cls.user, name='Блины', text='Текст',
+            image='recipes/images/recipe.png', cooking_time=10,
+        )
+        cls.recipe.ingredients_recipe.create(
+            ingredient=Ingredient.objects.create(
+                name='мука', measurement_unit='г'
+            ),
+            amount=600,
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token}')
+
+    def test_concurrent_duplicate_is_bad_request(self):
+        today = date.today()
+        MealPlan.objects.create(user=self.user, recipe=self.recipe, date=today)
+        # Второй запрос прошёл validate до того, как первый сохранил план.
+        with mock.patch.object(
+            MealPlanSerializer, 'validate', lambda self, data: data
+        ):
+            response = self.client.post('/api/meal_plans/', {
+                'date': today.isoformat(), 'recipe': self.recipe.id,
+            })
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('MealPlan_exists_error', response.data)
+        self.assertEqual(MealPlan.objects.count(), 1)
+
+    def test_shopping_list_is_built_in_view(self):
+        MealPlan.objects.create(
+            user=self.user, recipe=self.recipe, servings=2,
+            date=date.today(),
+        )
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                '/api/meal_plans/download_shopping_list/'
+            )
+        # Строки уже прочитаны во вьюхе, потоком отдаётся только текст.
+        with self.assertNumQueries(0):
+            content = b''.join(response.streaming_content).decode()
+        self.assertIn('- мука (кг) - 1.2', content)
+
+    def test_default_period_is_current_week(self):
+        with mock.patch('api.serializers.date') as today:
+            today.today.return_value = date(2024, 1, 3)
+            response = self.client.get(
+                '/api/meal_plans/download_shopping_list/'
+            )
+        self.assertIn(
+            'Период: 2024-01-01 - 2024-01-07',
+            b''.join(response.streaming_content).decode()
+        )
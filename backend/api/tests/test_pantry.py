@@ -0,0 +1,60 @@
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient, Recipe
+from recipes.pantry import VERSION_NAME, invalidate_index
+from recipes.versions import get_version
+from users.models import User
+
+
+class PantrySearchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create(
+            email='author@example.com', username='author',
+            first_name='author', last_name='author',
+        )
+        cls.ingredient = Ingredient.objects.create(
+            name='соль', measurement_unit='г'
+        )
+        cls.recipe = Recipe.objects.create(
+            author=author, name='Каша', text='Текст',
+            image='recipes/images/recipe.png', cooking_time=10,
+        )
+        cls.recipe.ingredients_recipe.create(
+            ingredient=cls.ingredient, amount=5
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+
+    @override_settings(PANTRY_SEARCH_BACKEND='memory')
+    def test_ingredient_ids_out_of_range_are_bad_request(self):
+        for value in ('-1', '0', '99999999999', '1.5', f'1,{2 ** 31}'):
+            with self.subTest(value=value):
+                response = self.client.get(
+                    '/api/recipes/', {'ingredients': value}
+                )
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('ingredients', response.data)
+
+    @override_settings(PANTRY_SEARCH_BACKEND='memory')
+    def test_memory_search(self):
+        response = self.client.get(
+            '/api/recipes/', {'ingredients': self.ingredient.id, 'limit': 6}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [recipe['id'] for recipe in response.data['results']],
+            [self.recipe.id]
+        )
+
+    def test_sql_backend_does_not_bump_version(self):
+        version = get_version(VERSION_NAME).version
+        with override_settings(PANTRY_SEARCH_BACKEND='sql'):
+            with self.assertNumQueries(0):
+                invalidate_index()
+        with override_settings(PANTRY_SEARCH_BACKEND='memory'):
+            invalidate_index()
+        self.assertEqual(get_version(VERSION_NAME).version, version + 1)
@@ -0,0 +1,192 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from rest_framework.response import Response
+
+from api.throttling import SingleFlight, coalesce
+
+THREADS = 8
+
+
+def run_threads(target, count=THREADS):
+    results = [None] * count
+    errors = [None] * count
+
+    def run(number):
+        try:
+            results[number] = target()
+        except Exception as error:
+            errors[number] = error
+
+    threads = [
+        threading.Thread(target=run, args=(number,))
+        for number in range(count)
+    ]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+
+class Blocking:
+    """Вызываемый объект, который ждёт release и считает вызовы."""
+
+    def __init__(self, result=None, error=None):
+        self.result = result
+        self.error = error
+        self.calls = 0
+        self.release = threading.Event()
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        with self.lock:
+            self.calls += 1
+        self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        return self.result() if callable(self.result) else self.result
+
+
+def finish(threads, func):
+    # Даём всем потокам дойти до ожидания результата первого вызова.
+    time.sleep(0.2)
+    func.release.set()
+    for thread in threads:
+        thread.join(5)
+
+
+@override_settings(COALESCE_TIMEOUT=5)
+class SingleFlightTests(SimpleTestCase):
+    def test_concurrent_calls_run_once(self):
+        flights = SingleFlight()
+        func = Blocking(result=object)
+        threads, results, errors = run_threads(lambda: flights.do('key', func))
+        finish(threads, func)
+        self.assertEqual(func.calls, 1)
+        self.assertEqual(errors, [None] * THREADS)
+        self.assertEqual(len({id(result) for result, _ in results}), 1)
+        self.assertEqual(
+            sorted(shared for _, shared in results),
+            [False] + [True] * (THREADS - 1)
+        )
+        self.assertEqual(flights.calls, {})
+
+    def test_different_keys_run_separately(self):
+        flights = SingleFlight()
+        func = Blocking(result=1)
+        keys = iter(range(THREADS))
+        lock = threading.Lock()
+
+        def call():
+            with lock:
+                key = next(keys)
+            return flights.do(key, func)
+
+        threads, results, errors = run_threads(call)
+        finish(threads, func)
+        self.assertEqual(func.calls, THREADS)
+        self.assertEqual(results, [(1, False)] * THREADS)
+
+    def test_error_is_shared(self):
+        flights = SingleFlight()
+        func = Blocking(error=ValueError('boom'))
+        threads, results, errors = run_threads(lambda: flights.do('key', func))
+        finish(threads, func)
+        self.assertEqual(func.calls, 1)
+        self.assertEqual(results, [None] * THREADS)
+        self.assertTrue(all(
+            isinstance(error, ValueError) and str(error) == 'boom'
+            for error in errors
+        ))
+        self.assertEqual(flights.calls, {})
+        self.assertEqual(flights.do('key', lambda: 2), (2, False))
+
+    @override_settings(COALESCE_TIMEOUT=0.05)
+    def test_waiting_follower_runs_itself_after_timeout(self):
+        flights = SingleFlight()
+        func = Blocking(result=1)
+        leader = threading.Thread(target=flights.do, args=('key', func))
+        leader.start()
+        time.sleep(0.1)
+        self.assertEqual(flights.do('key', lambda: 2), (2, False))
+        func.release.set()
+        leader.join(5)
+        self.assertEqual(func.calls, 1)
+
+
+class View:
+    def __init__(self, func):
+        self.func = func
+
+    @coalesce
+    def get(self, request):
+        return self.func()
+
+
+@override_settings(COALESCE_REQUESTS=True, COALESCE_TIMEOUT=5)
+class CoalesceTests(SimpleTestCase):
+    def setUp(self):
+        self.request = RequestFactory().get('/api/recipes/feed/?limit=5')
+        self.request.user = SimpleNamespace(pk=1)
+
+    def test_concurrent_requests_get_independent_copies(self):
+        func = Blocking(result=lambda: Response(
+            {'results': [1, 2, 3]}, headers={'X-Version': '1'}
+        ))
+        view = View(func)
+        threads, responses, errors = run_threads(
+            lambda: view.get(self.request)
+        )
+        finish(threads, func)
+        self.assertEqual(func.calls, 1)
+        self.assertEqual(errors, [None] * THREADS)
+        self.assertEqual(len({id(response) for response in responses}),
+                         THREADS)
+        for response in responses:
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data, {'results': [1, 2, 3]})
+            self.assertEqual(response['X-Version'], '1')
+        responses[0]['X-Version'] = '2'
+        self.assertTrue(all(
+            response['X-Version'] == '1' for response in responses[1:]
+        ))
+
+    def test_http_responses_are_copied(self):
+        func = Blocking(result=lambda: HttpResponse(
+            'Список покупок', content_type='text/plain; charset=utf-8'
+        ))
+        view = View(func)
+        threads, responses, _ = run_threads(lambda: view.get(self.request))
+        finish(threads, func)
+        self.assertEqual(func.calls, 1)
+        self.assertEqual(len({id(response) for response in responses}),
+                         THREADS)
+        for response in responses:
+            self.assertEqual(response.content.decode(), 'Список покупок')
+            self.assertEqual(
+                response['Content-Type'], 'text/plain; charset=utf-8'
+            )
+
+    def test_error_reaches_every_request(self):
+        func = Blocking(error=ValueError('boom'))
+        view = View(func)
+        threads, responses, errors = run_threads(
+            lambda: view.get(self.request)
+        )
+        finish(threads, func)
+        self.assertEqual(func.calls, 1)
+        self.assertTrue(all(
+            isinstance(error, ValueError) for error in errors
+        ))
+
+    @override_settings(COALESCE_REQUESTS=False)
+    def test_disabled(self):
+        func = Blocking(result=lambda: Response(status=204))
+        func.release.set()
+        view = View(func)
+        threads, _, _ = run_threads(lambda: view.get(self.request))
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(func.calls, THREADS)
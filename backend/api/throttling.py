@@ -0,0 +1,103 @@
+import threading
+from functools import wraps
+
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework.response import Response
+from rest_framework.throttling import BaseThrottle, UserRateThrottle
+
+
+class ShoppingCartThrottle(UserRateThrottle):
+    scope = 'shopping_cart'
+
+
+class FeedThrottle(UserRateThrottle):
+    scope = 'feed'
+
+
+class DeepPageThrottle(UserRateThrottle):
+    """Ограничивает только страницы списка дальше THROTTLE_DEEP_PAGE."""
+
+    scope = 'recipes_deep_pages'
+
+    def allow_request(self, request, view):
+        try:
+            page = int(request.query_params.get('page', 1))
+        except ValueError:
+            page = 1
+        if page <= settings.THROTTLE_DEEP_PAGE:
+            return True
+        return super().allow_request(request, view)
+
+
+class Call:
+    __slots__ = ('done', 'response', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+
+class SingleFlight:
+    """Одинаковые одновременные вызовы ждут результат первого."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+
+    def do(self, key, func):
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = Call()
+        if not leader:
+            if call.done.wait(settings.COALESCE_TIMEOUT):
+                if call.error is not None:
+                    raise call.error
+                return call.response, True
+            return func(), False
+        try:
+            call.response = func()
+        except Exception as error:
+            call.error = error
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call.done.set()
+        return call.response, False
+
+
+flights = SingleFlight()
+
+
+def copy_response(response):
+    if isinstance(response, Response):
+        return Response(
+            response.data, status=response.status_code,
+            headers=dict(response.items())
+        )
+    copy = HttpResponse(response.content, status=response.status_code)
+    for header, value in response.items():
+        copy[header] = value
+    return copy
+
+
+def coalesce(method):
+    """Склеивает одинаковые одновременные запросы одного пользователя."""
+
+    @wraps(method)
+    def wrapper(self, request, *args, **kwargs):
+        if not settings.COALESCE_REQUESTS:
+            return method(self, request, *args, **kwargs)
+        key = (
+            request.user.pk or BaseThrottle().get_ident(request),
+            request.method, request.get_full_path(),
+        )
+        response, shared = flights.do(
+            key, lambda: method(self, request, *args, **kwargs)
+        )
+        return copy_response(response) if shared else response
+    return wrapper
@@ -1,15 +1,18 @@
 from django.urls import include, path
 from rest_framework import routers
 
-from .views import IngredientViewSet, RecipeViewSet, TagViewSet, UsersViewSet
+from .views import (IngredientViewSet, MealPlanViewSet, MetricsView,
+                    RecipeViewSet, TagViewSet, UsersViewSet)
 
 router_v1 = routers.DefaultRouter()
 router_v1.register(r'users', UsersViewSet, basename='users')
 router_v1.register(r'ingredients', IngredientViewSet, basename='ingredients')
 router_v1.register(r'recipes', RecipeViewSet, basename='recipes')
 router_v1.register(r'tags', TagViewSet, basename='tags')
+router_v1.register(r'meal_plans', MealPlanViewSet, basename='meal_plans')
 
 urlpatterns = [
     path('', include(router_v1.urls)),
     path('auth/', include('djoser.urls.authtoken')),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
 ]
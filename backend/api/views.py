@@ -1,7 +1,7 @@
-from datetime import datetime
-
-from django.db.models import Sum
-from django.http import HttpResponse
+from django.conf import settings
+from django.db.models import (BooleanField, Exists, Max, OuterRef, Prefetch, Q,
+                              Subquery, Sum, Value)
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
@@ -9,66 +9,224 @@ from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.permissions import SAFE_METHODS, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
 
+from .budgets import QueryBudgetMixin
+from .caching import HttpCacheMixin, ObjectVersionMixin
+from .exporters import shopping_list_lines
+from .fieldsets import get_fieldset
 from .filters import IngredientSearchFilter, RecipeFilterSet
-from .paginations import CustomPagination
-from .permissions import AdminOrReadOnly, RecipePermission
+from .metrics import InstrumentedViewMixin, registry
+from .paginations import CustomPagination, FeedPagination
+from .permissions import AdminOrReadOnly, MetricsPermission, RecipePermission
 from .serializers import (CartSerializer, FavoriteSerializer,
-                          IngredientSerializer, RecipeReadSerializer,
-                          RecipeWriteSerializer, SubscriptionListSerializer,
-                          SubscriptionSerializer, TagSerializer)
+                          IngredientSerializer, MealPlanSerializer,
+                          PeriodSerializer, RecipeReadSerializer,
+                          RecipeWriteSerializer, ShortRecipe,
+                          SubscriptionListSerializer, SubscriptionSerializer,
+                          TagSerializer, UserStatsSerializer)
+from .throttling import (DeepPageThrottle, FeedThrottle, ShoppingCartThrottle,
+                         coalesce)
+from recipes.archive import restore_archived_cart
+from recipes.expressions import count_by
+from recipes.feed import follow, get_feed, heavy_authors, unfollow
 from recipes.models import (Cart, Favorite, Ingredient, IngredientInRecipe,
                             Recipe, Tag)
+from recipes.nutrition import cart_totals
+from recipes.planner import planned_quantities
+from recipes.tasks import backfill_author_feeds, reconcile_user_counters
+from recipes.units import merged_quantities
+from recipes.user_sets import get_recipe_set
 from users.models import Subscription, User
 
+TRUE = ('1', 'true', 'True')
+RECIPE_COLUMNS = ('author', 'name', 'image', 'text', 'cooking_time',
+                  'calories', 'proteins', 'fats', 'carbohydrates', 'cost')
+USER_COLUMNS = ('email', 'username', 'first_name', 'last_name')
+CART_ACTIONS = ('shopping_cart', 'download_shopping_cart',
+                'shopping_cart_totals')
+
+
+def with_is_subscribed(queryset, user):
+    if user.is_anonymous:
+        return queryset.annotate(is_subscribed=Value(
+            False, output_field=BooleanField()
+        ))
+    return queryset.annotate(is_subscribed=Exists(
+        Subscription.objects.filter(user=user, author=OuterRef('pk'))
+    ))
 
-class IngredientViewSet(ModelViewSet):
+
+class IngredientViewSet(InstrumentedViewMixin, QueryBudgetMixin,
+                        HttpCacheMixin, ModelViewSet):
     queryset = Ingredient.objects.all()
+    content_version = 'ingredients'
     serializer_class = IngredientSerializer
     permission_classes = [AdminOrReadOnly]
     filter_backends = (IngredientSearchFilter,)
     search_fields = ('^name',)
+    query_budgets = {'list': 3, 'retrieve': 3}
 
 
-class TagViewSet(ModelViewSet):
+class TagViewSet(InstrumentedViewMixin, QueryBudgetMixin,
+                 HttpCacheMixin, ModelViewSet):
     queryset = Tag.objects.all()
+    content_version = 'tags'
     permission_classes = [AdminOrReadOnly]
     serializer_class = TagSerializer
+    query_budgets = {'list': 3, 'retrieve': 3}
 
 
-class RecipeViewSet(ModelViewSet):
+class RecipeViewSet(InstrumentedViewMixin, QueryBudgetMixin,
+                    ObjectVersionMixin, ModelViewSet):
     queryset = Recipe.objects.all()
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilterSet
     permission_classes = [RecipePermission]
     pagination_class = CustomPagination
+    query_budgets = {
+        'list': 7,
+        'retrieve': 5,
+        'create': 17,
+        'update': 19,
+        'partial_update': 19,
+        'destroy': 16,
+        'favorite': 7,
+        'shopping_cart': 6,
+        'similar': 3,
+        'recommended': 2,
+        'feed': 5,
+        'shopping_cart_totals': 2,
+        'download_shopping_cart': 2,
+    }
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # Архивная корзина возвращается только при обращении к корзине:
+        # остальные безопасные запросы ничего не пишут. Возврат разовый и
+        # в бюджет запросов действия не входит.
+        if self.action in CART_ACTIONS or (
+                self.action == 'list'
+                and request.query_params.get('is_in_shopping_cart') in TRUE):
+            with self.query_budget.excluded():
+                restore_archived_cart(request.user)
 
     def get_serializer_class(self):
         if self.request.method in SAFE_METHODS:
             return RecipeReadSerializer
         return RecipeWriteSerializer
 
+    def get_queryset(self):
+        if self.request.method not in SAFE_METHODS:
+            return super().get_queryset()
+        return self.select_fields(super().get_queryset())
+
+    def select_fields(self, queryset):
+        fields, expand = get_fieldset(
+            self.request, RecipeReadSerializer.Meta.fields
+        )
+        queryset = queryset.only(
+            'id', 'pub_date', 'version',
+            *(name for name in RECIPE_COLUMNS if name in fields)
+        )
+        if 'author' in fields and 'author' in expand:
+            queryset = queryset.prefetch_related(Prefetch(
+                'author',
+                queryset=with_is_subscribed(
+                    User.objects.all(), self.request.user
+                )
+            ))
+        if 'tags' in fields:
+            queryset = queryset.prefetch_related('tags')
+        if 'ingredients' in fields and 'ingredients' in expand:
+            queryset = queryset.prefetch_related(Prefetch(
+                'ingredients_recipe',
+                queryset=IngredientInRecipe.objects.select_related(
+                    'ingredient'
+                ),
+                to_attr='ingredient_amounts'
+            ))
+        elif 'ingredients' in fields:
+            queryset = queryset.prefetch_related(Prefetch(
+                'ingredients', queryset=Ingredient.objects.only('id')
+            ))
+        return self.annotate_user_flags(queryset, fields)
+
+    def annotate_user_flags(self, queryset, fields):
+        user = self.request.user
+        if user.is_anonymous or settings.USER_RECIPE_SETS:
+            return queryset
+        flags = {
+            'is_favorited': Favorite,
+            'is_in_shopping_cart': Cart,
+        }
+        return queryset.annotate(**{
+            name: Exists(model.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            ))
+            for name, model in flags.items() if name in fields
+        })
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        user = self.request.user
+        if (not settings.USER_RECIPE_SETS or user.is_anonymous
+                or self.request.method not in SAFE_METHODS):
+            return context
+        fields, _ = get_fieldset(
+            self.request, RecipeReadSerializer.Meta.fields
+        )
+        flags = {
+            'is_favorited': 'favorites',
+            'is_in_shopping_cart': 'cart',
+        }
+        context.update({
+            kind: get_recipe_set(kind, user.id)
+            for name, kind in flags.items() if name in fields
+        })
+        return context
+
+    def get_throttles(self):
+        if self.action == 'list':
+            return [DeepPageThrottle()]
+        return super().get_throttles()
+
+    @coalesce
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        reconcile_user_counters.delay(instance.author_id)
+
     def additions(self, request, pk, model, modelserializer):
+        recipe = get_object_or_404(Recipe, pk=pk)
         if request.method != 'POST':
             action_model = get_object_or_404(
                 model,
                 user=request.user,
-                recipe=get_object_or_404(Recipe, pk=pk)
+                recipe=recipe
             )
-            self.perform_destroy(action_model)
+            action_model.delete()
+            self.count_addition(model, recipe)
             return Response(status=status.HTTP_204_NO_CONTENT)
         serializer = modelserializer(
             data={
                 'user': request.user.id,
-                'recipe': get_object_or_404(Recipe, pk=pk).pk
+                'recipe': recipe.pk
             },
             context={'request': request}
         )
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        self.count_addition(model, recipe)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    def count_addition(self, model, recipe):
+        if model is Favorite:
+            reconcile_user_counters.delay(recipe.author_id)
+
     @action(methods=['post', 'delete'], detail=True)
     def favorite(self, request, pk):
         return self.additions(request, pk, Favorite, FavoriteSerializer)
@@ -77,34 +235,156 @@ class RecipeViewSet(ModelViewSet):
     def shopping_cart(self, request, pk):
         return self.additions(request, pk, Cart, CartSerializer)
 
+    def get_recommendations_limit(self, request):
+        try:
+            limit = int(request.query_params.get('limit', 10))
+        except ValueError:
+            limit = 10
+        return max(1, min(limit, settings.RECOMMENDATIONS_MAX_LIMIT))
+
+    @action(detail=True)
+    def similar(self, request, pk):
+        recipe = get_object_or_404(Recipe.objects.only('id'), pk=pk)
+        recipes = Recipe.objects.filter(
+            similar_to__recipe=recipe
+        ).order_by('-similar_to__score')
+        serializer = ShortRecipe(
+            recipes[:self.get_recommendations_limit(request)],
+            many=True, context={'request': request}
+        )
+        return Response(serializer.data)
+
+    @action(detail=False, permission_classes=[IsAuthenticated])
+    def recommended(self, request):
+        recipes = Recipe.objects.filter(
+            Q(similar_to__recipe__in=Favorite.objects.filter(
+                user=request.user).values('recipe'))
+            | Q(similar_to__recipe__in=Cart.objects.filter(
+                user=request.user).values('recipe'))
+        ).exclude(
+            favorite__user=request.user
+        ).exclude(
+            cart__user=request.user
+        ).annotate(
+            score=Sum('similar_to__score'),
+            best=Max('similar_to__score')
+        ).order_by('-score', '-best')
+        serializer = ShortRecipe(
+            recipes[:self.get_recommendations_limit(request)],
+            many=True, context={'request': request}
+        )
+        return Response(serializer.data)
+
+    @action(detail=False, permission_classes=[IsAuthenticated],
+            throttle_classes=[FeedThrottle])
+    @coalesce
+    def feed(self, request):
+        paginator = FeedPagination()
+        keys = paginator.paginate_keys(
+            lambda before, limit: get_feed(request.user, before, limit),
+            request
+        )
+        recipes = self.select_fields(Recipe.objects.all()).in_bulk(
+            [recipe_id for _, recipe_id in keys]
+        )
+        serializer = self.get_serializer(
+            [recipes[recipe_id] for _, recipe_id in keys
+             if recipe_id in recipes],
+            many=True
+        )
+        return paginator.get_paginated_response(serializer.data)
+
     @action(detail=False, permission_classes=[IsAuthenticated])
+    def shopping_cart_totals(self, request):
+        return Response(cart_totals(request.user))
+
+    @action(detail=False, permission_classes=[IsAuthenticated],
+            throttle_classes=[ShoppingCartThrottle])
+    @coalesce
     def download_shopping_cart(self, request):
-        ingredients = IngredientInRecipe.objects.filter(
+        ingredients = merged_quantities(IngredientInRecipe.objects.filter(
             recipe__cart__user=request.user
-        ).values(
-            'ingredient__name',
-            'ingredient__measurement_unit'
-        ).annotate(quantity=Sum('amount'))
-
-        today = datetime.today()
-        shopping = (
-            f'{request.user.username}, Ваш список покупок готов!\n'
-            f'Дата: {today:%Y-%m-%d}\n\n'
-        )
-        shopping += '\n'.join([
-            f'- {ingredient["ingredient__name"]} '
-            f'({ingredient["ingredient__measurement_unit"]})'
-            f' - {ingredient["quantity"]}'
-            for ingredient in ingredients
-        ])
+        ))
         filename = f'{request.user.username}_shopping.txt'
-        response = HttpResponse(shopping, content_type='text/plain')
+        response = HttpResponse(
+            ''.join(shopping_list_lines(request.user, ingredients)),
+            content_type='text/plain'
+        )
         response['Content-Disposition'] = f'attachment; filename={filename}'
         return response
 
 
-class UsersViewSet(UserViewSet):
+class MealPlanViewSet(InstrumentedViewMixin, QueryBudgetMixin, ModelViewSet):
+    serializer_class = MealPlanSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = CustomPagination
+    query_budgets = {
+        'list': 3,
+        'retrieve': 2,
+        'create': 6,
+        'update': 7,
+        'partial_update': 7,
+        'destroy': 4,
+        'download_shopping_list': 2,
+    }
+
+    def get_period(self):
+        serializer = PeriodSerializer(data=self.request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return (
+            serializer.validated_data['start'],
+            serializer.validated_data['end'],
+        )
+
+    def get_queryset(self):
+        plans = self.request.user.meal_plans.select_related('recipe')
+        if self.action == 'list':
+            return plans.filter(date__range=self.get_period())
+        return plans
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+    @action(detail=False, throttle_classes=[ShoppingCartThrottle])
+    def download_shopping_list(self, request):
+        start, end = self.get_period()
+        # Запрос выполняется здесь, а не при отдаче ответа: иначе он не
+        # попадает в бюджет запросов и метрики вьюхи. Потоком отдаётся
+        # только текст.
+        ingredients = list(planned_quantities(request.user, start, end))
+        response = StreamingHttpResponse(
+            shopping_list_lines(request.user, ingredients, (start, end)),
+            content_type='text/plain'
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename={request.user.username}_'
+            f'{start:%Y-%m-%d}_{end:%Y-%m-%d}.txt'
+        )
+        return response
+
+
+class UsersViewSet(InstrumentedViewMixin, QueryBudgetMixin, UserViewSet):
     pagination_class = CustomPagination
+    query_budgets = {
+        'list': 3,
+        'retrieve': 2,
+        'me': 1,
+        'subscriptions': 4,
+        'subscribe': 17,
+    }
+
+    def get_queryset(self):
+        return with_is_subscribed(
+            super().get_queryset(), self.request.user
+        )
+
+    def get_serializer_class(self):
+        if self.action == 'subscriptions':
+            return SubscriptionListSerializer
+        if (self.action in ('list', 'retrieve', 'me')
+                and self.request.query_params.get('with_stats') in TRUE):
+            return UserStatsSerializer
+        return super().get_serializer_class()
 
     @action(['get'], detail=False, permission_classes=[IsAuthenticated])
     def me(self, request, *args, **kwargs):
@@ -113,33 +393,74 @@ class UsersViewSet(UserViewSet):
 
     @action(['get'], detail=False)
     def subscriptions(self, request):
-        all_subscriptions = self.paginate_queryset(User.objects.filter(
-            subscription__user=request.user
-        ))
-        serializer = SubscriptionListSerializer(
-            all_subscriptions,
-            many=True,
-            context={'request': request}
+        fields, expand = get_fieldset(
+            request, SubscriptionListSerializer.Meta.fields
+        )
+        authors = User.objects.filter(subscription__user=request.user).only(
+            'id', *(name for name in USER_COLUMNS if name in fields)
         )
+        if 'recipes' in fields:
+            columns = ShortRecipe.Meta.fields if 'recipes' in expand else ()
+            recipes = Recipe.objects.only('id', 'author', *columns)
+            recipes_limit = request.query_params.get('recipes_limit', '')
+            if recipes_limit.isdigit():
+                # Не больше recipes_limit последних рецептов на автора
+                # прямо в SQL, а не все рецепты с обрезкой в Python.
+                recipes = recipes.filter(id__in=Subquery(
+                    Recipe.objects.filter(
+                        author=OuterRef('author')
+                    ).values('id')[:int(recipes_limit)]
+                ))
+            authors = authors.prefetch_related(Prefetch(
+                'recipes', queryset=recipes, to_attr='prefetched_recipes'
+            ))
+        if 'is_subscribed' in fields:
+            authors = authors.annotate(
+                is_subscribed=Value(True, output_field=BooleanField())
+            )
+        if 'recipes_count' in fields:
+            authors = authors.annotate(
+                recipes_total=count_by(Recipe.objects.all(), 'author')
+            )
+        all_subscriptions = self.paginate_queryset(authors)
+        serializer = self.get_serializer(all_subscriptions, many=True)
         return self.get_paginated_response(serializer.data)
 
     @action(methods=['post', 'delete'], detail=True)
     def subscribe(self, request, id):
+        author = get_object_or_404(User, id=id)
         if request.method != 'POST':
             subscription = get_object_or_404(
                 Subscription,
                 user=request.user,
-                author=get_object_or_404(User, id=id)
+                author=author
             )
             self.perform_destroy(subscription)
+            unfollow(request.user, author)
+            if author.id in heavy_authors():
+                backfill_author_feeds.delay(author.id)
+            reconcile_user_counters.delay(author.id)
             return Response(status=status.HTTP_204_NO_CONTENT)
         serializer = SubscriptionSerializer(
             data={
                 'user': request.user.id,
-                'author': get_object_or_404(User, id=id).id
+                'author': author.id
             },
             context={'request': request}
         )
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        follow(request.user, author)
+        reconcile_user_counters.delay(author.id)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class MetricsView(APIView):
+    permission_classes = [MetricsPermission]
+
+    def get(self, request):
+        if not settings.PERFORMANCE_METRICS:
+            raise Http404
+        return HttpResponse(
+            registry.render(), content_type='text/plain; version=0.0.4'
+        )
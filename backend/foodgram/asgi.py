@@ -0,0 +1,113 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+
+READ_PATHS = (
+    '/api/recipes/',
+    '/api/ingredients/',
+    '/api/tags/',
+)
+READ_METHODS = ('GET', 'HEAD')
+
+
+class LaneInstance(WsgiToAsgiInstance):
+    """Запуск WSGI-приложения в пуле потоков выбранной «полосы».
+
+    Тело запроса целиком читается в event loop, поэтому медленный клиент
+    или долгая загрузка картинки не занимают поток Django.
+    """
+
+    def __init__(self, wsgi_application, executor):
+        super().__init__(wsgi_application)
+        self.executor = executor
+
+    async def run_wsgi_app(self, body):
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(self.executor, self.call_wsgi_app, body)
+
+    def call_wsgi_app(self, body):
+        """Синхронный вызов WSGI-приложения в потоке пула.
+
+        Повторяет WsgiToAsgiInstance.run_wsgi_app через публичные
+        build_environ, start_response и sync_send, без обёртки
+        sync_to_async, чтобы выбрать пул самим.
+        """
+        environ = self.build_environ(self.scope, body)
+        iterable = self.wsgi_application(environ, self.start_response)
+        try:
+            for output in iterable:
+                if not self.response_started:
+                    self.response_started = True
+                    self.sync_send(self.response_start)
+                self.sync_send({
+                    'type': 'http.response.body',
+                    'body': output,
+                    'more_body': True,
+                })
+        finally:
+            if hasattr(iterable, 'close'):
+                iterable.close()
+        if not self.response_started:
+            self.response_started = True
+            self.sync_send(self.response_start)
+        self.sync_send({'type': 'http.response.body'})
+
+
+class LanedWsgiToAsgi(WsgiToAsgi):
+    """ASGI-обёртка с отдельными пулами для чтения и записи.
+
+    Горячие эндпоинты чтения (список и детали рецептов, поиск ингредиентов,
+    теги, скачивание списка покупок) не конкурируют за потоки с
+    тяжёлыми запросами на запись.
+    """
+
+    def __init__(self, wsgi_application, read_threads, write_threads):
+        super().__init__(wsgi_application)
+        self.read_executor = ThreadPoolExecutor(
+            max_workers=read_threads, thread_name_prefix='asgi-read'
+        )
+        self.write_executor = ThreadPoolExecutor(
+            max_workers=write_threads, thread_name_prefix='asgi-write'
+        )
+
+    def get_executor(self, scope):
+        if (scope['method'] in READ_METHODS
+                and scope['path'].startswith(READ_PATHS)):
+            return self.read_executor
+        return self.write_executor
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        else:
+            await LaneInstance(
+                self.wsgi_application, self.get_executor(scope)
+            )(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.read_executor.shutdown(wait=False)
+                self.write_executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+application = LanedWsgiToAsgi(
+    get_wsgi_application(),
+    read_threads=int(os.getenv('ASGI_READ_THREADS', 16)),
+    write_threads=int(os.getenv('ASGI_WRITE_THREADS', 4)),
+)
+
+if settings.STARTUP_WARMUP:
+    from .warmup import warmup
+    warmup()
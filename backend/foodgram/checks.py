@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def local_cache_features():
+    """Что хранит общее состояние в кеше, если кеш в памяти процесса.
+
+    Троттлинг, закрепление чтения за основной БД и наборы рецептов
+    пользователей с таким кешем работают в каждом воркере отдельно.
+    """
+    if settings.CACHES['default']['BACKEND'] not in LOCAL_CACHES:
+        return []
+    features = ['троттлинг']
+    if settings.DATABASE_REPLICAS:
+        features.append('закрепление чтения за основной БД')
+    if settings.USER_RECIPE_SETS:
+        features.append('наборы рецептов пользователей')
+    return features
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    features = local_cache_features()
+    if not features:
+        return []
+    return [Warning(
+        f'Кеш в памяти процесса: {", ".join(features)} - отдельно в '
+        f'каждом воркере.',
+        hint='Задайте CACHE_BACKEND и CACHE_LOCATION общего кеша '
+             '(memcached из docker-compose).',
+        id='foodgram.W001',
+    )]
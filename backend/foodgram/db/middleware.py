@@ -0,0 +1,42 @@
+from hashlib import sha1
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .routers import use_primary
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ReplicaPinningMiddleware:
+    """Read-your-writes для реплик.
+
+    Небезопасные запросы целиком идут в основную БД. После успешной записи
+    клиент (по токену и по IP) ещё REPLICA_STICKY_SECONDS читает из основной
+    БД, пока реплика догоняет изменения.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def get_client_keys(self, request):
+        clients = (
+            request.META.get('HTTP_AUTHORIZATION'),
+            request.META.get('HTTP_X_REAL_IP')
+            or request.META.get('REMOTE_ADDR'),
+        )
+        return [
+            'replica-pin:' + sha1(client.encode('utf-8')).hexdigest()
+            for client in clients if client
+        ]
+
+    def __call__(self, request):
+        keys = self.get_client_keys(request)
+        is_write = request.method not in SAFE_METHODS
+        with use_primary(is_write or bool(cache.get_many(keys))):
+            response = self.get_response(request)
+        if is_write and response.status_code < 400:
+            cache.set_many(
+                dict.fromkeys(keys, True), settings.REPLICA_STICKY_SECONDS
+            )
+        return response
@@ -0,0 +1,155 @@
+import os
+import threading
+import time
+from collections import Counter, deque
+
+from django.db import OperationalError
+from django.dispatch import Signal
+
+# Хук инструментирования: event — checkout, checkin, wait, timeout,
+# connect, reconnect или discard.
+pool_event = Signal(providing_args=['alias', 'event'])
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class ConnectionPool:
+    """Пул соединений внутри процесса (один на воркер gunicorn)."""
+
+    def __init__(self, alias, connect, max_size, timeout, max_lifetime,
+                 health_checks):
+        self.alias = alias
+        self.connect = connect
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.health_checks = health_checks
+        self.pid = os.getpid()
+        self.stats = Counter()
+        self._idle = deque()
+        self._born = {}
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+
+    def record(self, event):
+        self.stats[event] += 1
+        pool_event.send(sender=self.__class__, alias=self.alias, event=event)
+
+    def getconn(self):
+        if not self._slots.acquire(blocking=False):
+            self.record('wait')
+            if not self._slots.acquire(timeout=self.timeout):
+                self.record('timeout')
+                raise OperationalError(
+                    f'Пул соединений {self.alias} исчерпан '
+                    f'({self.max_size}), ожидание {self.timeout} с.'
+                )
+        try:
+            connection = self._checkout()
+        except Exception:
+            self._slots.release()
+            raise
+        self.record('checkout')
+        return connection
+
+    def _checkout(self):
+        while True:
+            with self._lock:
+                connection = self._idle.pop() if self._idle else None
+            if connection is None:
+                connection = self.connect()
+                self._born[connection] = time.monotonic()
+                self.record('connect')
+                return connection
+            if self._is_alive(connection):
+                return connection
+            self._discard(connection)
+            self.record('reconnect')
+
+    def putconn(self, connection, discard=False):
+        try:
+            if not discard and self._is_reusable(connection):
+                with self._lock:
+                    self._idle.append(connection)
+            else:
+                self._discard(connection)
+        finally:
+            self._slots.release()
+        self.record('checkin')
+
+    def _expired(self, connection):
+        born = self._born.get(connection, 0)
+        return time.monotonic() - born > self.max_lifetime
+
+    def _is_alive(self, connection):
+        if connection.closed or self._expired(connection):
+            return False
+        if not self.health_checks:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        except Exception:
+            return False
+        return True
+
+    def _is_reusable(self, connection):
+        if connection.closed or self._expired(connection):
+            return False
+        try:
+            if not connection.autocommit:
+                connection.rollback()
+        except Exception:
+            return False
+        return True
+
+    def _discard(self, connection):
+        self._born.pop(connection, None)
+        try:
+            connection.close()
+        except Exception:
+            pass
+        self.record('discard')
+
+    def get_stats(self):
+        with self._lock:
+            idle = len(self._idle)
+        return dict(
+            self.stats,
+            alias=self.alias,
+            max_size=self.max_size,
+            size=len(self._born),
+            idle=idle,
+            in_use=len(self._born) - idle,
+        )
+
+
+def get_pool(alias, **kwargs):
+    """Пул для алиаса БД; после fork воркера создаётся заново."""
+    pool = _pools.get(alias)
+    if pool is not None and pool.pid == os.getpid():
+        return pool
+    with _pools_lock:
+        pool = _pools.get(alias)
+        if pool is None or pool.pid != os.getpid():
+            _pools[alias] = ConnectionPool(alias, **kwargs)
+        return _pools[alias]
+
+
+def get_pools_stats():
+    return [
+        pool.get_stats() for pool in _pools.values()
+        if pool.pid == os.getpid()
+    ]
+
+
+def close_pools():
+    """Закрывает свободные соединения пулов, например перед fork воркеров."""
+    for pool in list(_pools.values()):
+        if pool.pid != os.getpid():
+            continue
+        with pool._lock:
+            idle, pool._idle = list(pool._idle), deque()
+        for connection in idle:
+            pool._discard(connection)
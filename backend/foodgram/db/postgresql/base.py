@@ -0,0 +1,72 @@
+import time
+
+from django.db.backends.postgresql import base as postgresql
+
+from foodgram.db.pool import get_pool
+
+
+class DatabaseWrapper(postgresql.DatabaseWrapper):
+    """PostgreSQL с проверкой соединений и необязательным пулом.
+
+    CONN_HEALTH_CHECKS: переиспользуемое соединение проверяется перед
+    первым запросом в рамках HTTP-запроса. POOL.MAX_SIZE > 0 включает пул
+    соединений в процессе: в конце запроса соединение возвращается в пул.
+    """
+
+    health_check_done = False
+
+    @property
+    def pool(self):
+        options = self.settings_dict.get('POOL') or {}
+        if not options.get('MAX_SIZE'):
+            return None
+        return get_pool(
+            self.alias,
+            connect=self._connect_direct,
+            max_size=options['MAX_SIZE'],
+            timeout=options.get('TIMEOUT', 10),
+            max_lifetime=options.get('MAX_LIFETIME', 1800),
+            health_checks=self.settings_dict.get('CONN_HEALTH_CHECKS', False),
+        )
+
+    def _connect_direct(self):
+        return super().get_new_connection(self.get_connection_params())
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            return super().get_new_connection(conn_params)
+        connection = pool.getconn()
+        options = self.settings_dict['OPTIONS']
+        self.isolation_level = options.get(
+            'isolation_level', connection.isolation_level
+        )
+        return connection
+
+    def connect(self):
+        super().connect()
+        self.health_check_done = True
+        if self.pool is not None:
+            self.close_at = time.time()
+
+    def _close(self):
+        pool = self.pool
+        if pool is None or self.connection is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            return pool.putconn(
+                self.connection, discard=self.in_atomic_block
+            )
+
+    def ensure_connection(self):
+        if (self.connection is not None
+                and not self.health_check_done
+                and self.settings_dict.get('CONN_HEALTH_CHECKS')):
+            self.health_check_done = True
+            if not self.is_usable():
+                self.close()
+        super().ensure_connection()
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
@@ -0,0 +1,42 @@
+import random
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_state = threading.local()
+
+
+@contextmanager
+def use_primary(pinned=True):
+    """Направить все чтения текущего потока в основную БД."""
+    previous = getattr(_state, 'pinned', False)
+    _state.pinned = previous or pinned
+    try:
+        yield
+    finally:
+        _state.pinned = previous
+
+
+def is_pinned():
+    return (getattr(_state, 'pinned', False)
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block)
+
+
+class ReplicaRouter:
+    """Чтение с реплик из DATABASE_REPLICAS, запись в основную БД."""
+
+    def db_for_read(self, model, **hints):
+        if not settings.DATABASE_REPLICAS or is_pinned():
+            return DEFAULT_DB_ALIAS
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -26,6 +26,7 @@ INSTALLED_APPS = [
     'api',
     'recipes',
     'users',
+    'tasks',
     'colorfield'
 ]
 
@@ -62,12 +63,85 @@ WSGI_APPLICATION = 'foodgram.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': os.getenv('DB_ENGINE', 'django.db.backends.postgresql'),
+        'ENGINE': os.getenv('DB_ENGINE', 'foodgram.db.postgresql'),
         'NAME': os.getenv('POSTGRES_DB'),
         'USER': os.getenv('POSTGRES_USER'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD'),
         'HOST': os.getenv('POSTGRES_HOST'),
-        'PORT': os.getenv('POSTGRES_PORT')
+        'PORT': os.getenv('POSTGRES_PORT'),
+        'CONN_MAX_AGE': int(os.getenv('POSTGRES_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': (
+            os.getenv('POSTGRES_CONN_HEALTH_CHECKS', 'True') == 'True'
+        ),
+        'POOL': {
+            'MAX_SIZE': int(os.getenv('POSTGRES_POOL_MAX_SIZE', 0)),
+            'TIMEOUT': float(os.getenv('POSTGRES_POOL_TIMEOUT', 10)),
+            'MAX_LIFETIME': int(os.getenv('POSTGRES_POOL_MAX_LIFETIME', 1800)),
+        },
+    }
+}
+
+DATABASE_REPLICAS = []
+for number, host in enumerate(
+        filter(None, os.getenv('POSTGRES_REPLICA_HOSTS', '').split(',')), 1):
+    replica_host, _, replica_port = host.strip().partition(':')
+    DATABASE_REPLICAS.append(f'replica_{number}')
+    DATABASES[f'replica_{number}'] = dict(
+        DATABASES['default'],
+        HOST=replica_host,
+        PORT=replica_port or DATABASES['default']['PORT'],
+        TEST={'MIRROR': 'default'},
+    )
+
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', 5))
+
+if DATABASE_REPLICAS:
+    DATABASE_ROUTERS = ['foodgram.db.routers.ReplicaRouter']
+    MIDDLEWARE.insert(0, 'foodgram.db.middleware.ReplicaPinningMiddleware')
+
+PERFORMANCE_METRICS = os.getenv('PERFORMANCE_METRICS', 'False') == 'True'
+PERFORMANCE_METRICS_SAMPLE_SIZE = int(
+    os.getenv('PERFORMANCE_METRICS_SAMPLE_SIZE', 1024)
+)
+PERFORMANCE_METRICS_ALLOWED_IPS = list(
+    filter(None, os.getenv('PERFORMANCE_METRICS_ALLOWED_IPS', '').split(','))
+)
+
+if PERFORMANCE_METRICS:
+    MIDDLEWARE.insert(0, 'api.middleware.PerformanceMiddleware')
+
+RECOMMENDATIONS_MAX_LIMIT = int(os.getenv('RECOMMENDATIONS_MAX_LIMIT', 20))
+
+PANTRY_SEARCH_BACKEND = os.getenv('PANTRY_SEARCH_BACKEND', 'sql')
+PANTRY_MEMORY_MAX_IDS = int(os.getenv('PANTRY_MEMORY_MAX_IDS', 1000))
+
+FEED_FANOUT_LIMIT = int(os.getenv('FEED_FANOUT_LIMIT', 1000))
+FEED_MAX_ITEMS = int(os.getenv('FEED_MAX_ITEMS', 500))
+FEED_HEAVY_AUTHORS_TTL = int(os.getenv('FEED_HEAVY_AUTHORS_TTL', 300))
+
+TASKS_BACKEND = os.getenv('TASKS_BACKEND', 'database')
+TASKS_EAGER = os.getenv('TASKS_EAGER', 'False') == 'True'
+TASKS_REDIS_URL = os.getenv('TASKS_REDIS_URL', 'redis://localhost:6379/0')
+TASKS_MAX_ATTEMPTS = int(os.getenv('TASKS_MAX_ATTEMPTS', 5))
+TASKS_RETRY_DELAY = int(os.getenv('TASKS_RETRY_DELAY', 10))
+TASKS_LOCK_TIMEOUT = int(os.getenv('TASKS_LOCK_TIMEOUT', 600))
+
+RECIPE_THUMBNAIL_SIZE = int(os.getenv('RECIPE_THUMBNAIL_SIZE', 480))
+
+CART_ARCHIVE_DAYS = int(os.getenv('CART_ARCHIVE_DAYS', 180))
+
+USER_RECIPE_SETS = os.getenv('USER_RECIPE_SETS', 'False') == 'True'
+USER_RECIPE_SETS_TTL = int(os.getenv('USER_RECIPE_SETS_TTL', 3600))
+USER_RECIPE_SETS_FILTER_LIMIT = int(
+    os.getenv('USER_RECIPE_SETS_FILTER_LIMIT', 1000)
+)
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
     }
 }
 
@@ -115,7 +189,23 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.TokenAuthentication',
     ],
+    # Цена и стоимость хранятся в DecimalField, но в API остаются числами.
+    'COERCE_DECIMAL_TO_STRING': False,
+    'DEFAULT_THROTTLE_RATES': {
+        'shopping_cart': os.getenv('THROTTLE_SHOPPING_CART', '20/min'),
+        'feed': os.getenv('THROTTLE_FEED', '120/min'),
+        'recipes_deep_pages': os.getenv('THROTTLE_DEEP_PAGES', '60/min'),
+    },
 }
+THROTTLE_DEEP_PAGE = int(os.getenv('THROTTLE_DEEP_PAGE', 10))
+COALESCE_REQUESTS = os.getenv('COALESCE_REQUESTS', 'True') == 'True'
+COALESCE_TIMEOUT = float(os.getenv('COALESCE_TIMEOUT', 30))
+HTTP_CACHE_MAX_AGE = int(os.getenv('HTTP_CACHE_MAX_AGE', 300))
+
+STARTUP_WARMUP = os.getenv('STARTUP_WARMUP', 'False') == 'True'
+WARMUP_URLS = tuple(filter(None, os.getenv(
+    'WARMUP_URLS', '/api/tags/,/api/ingredients/'
+).split(',')))
 
 DJOSER = {
     'HIDE_USERS': False,
@@ -128,3 +218,12 @@ DJOSER = {
         "current_user": "api.serializers.UsersSerializer",
     },
 }
+
+QUERY_BUDGETS = os.getenv('QUERY_BUDGETS', 'log' if DEBUG else 'off')
+QUERY_BUDGETS_REPEAT_THRESHOLD = int(
+    os.getenv('QUERY_BUDGETS_REPEAT_THRESHOLD', 3)
+)
+
+TEST_RUNNER = 'foodgram.test_runner.QueryBudgetRunner'
+
+MEAL_PLAN_MAX_DAYS = int(os.getenv('MEAL_PLAN_MAX_DAYS', 366))
@@ -0,0 +1,13 @@
+"""Настройки тестов: manage.py test подключает их вместо settings."""
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES
+
+# Реплика для foodgram.tests.test_replicas. В тестах это зеркало default,
+# но отдельное соединение: по запросам к нему видно, куда роутер отправил
+# чтение. Роутер и middleware тесты включают сами.
+DATABASES['replica_test'] = dict(
+    DATABASES['default'], TEST={'MIRROR': 'default'}
+)
+
+# Один процесс: кеш в памяти достаточен.
+SILENCED_SYSTEM_CHECKS = ['foodgram.W001']
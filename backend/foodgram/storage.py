@@ -0,0 +1,45 @@
+import hashlib
+import os
+from uuid import uuid4
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Файлы именуются по SHA-256 содержимого: <каталог>/ab/abcd….png.
+
+    Одинаковое содержимое хранится один раз, повторная загрузка того же
+    файла не перезаписывает его. Имена неизменяемы, поэтому файлы можно
+    кешировать навсегда.
+    """
+
+    def hashed_name(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        digest = digest.hexdigest()
+        extension = os.path.splitext(name)[1].lower()
+        return os.path.join(
+            os.path.dirname(name), digest[:2], digest + extension
+        )
+
+    def _save(self, name, content):
+        name = self.hashed_name(name, content)
+        if not self.exists(name):
+            # Файл пишется под временным именем и публикуется жёсткой
+            # ссылкой: недописанный файл никто не увидит, а одновременная
+            # загрузка того же содержимого получит FileExistsError.
+            temporary = super()._save(f'{name}.{uuid4().hex}.tmp', content)
+            try:
+                os.link(self.path(temporary), self.path(name))
+                return name
+            except FileExistsError:
+                pass
+            finally:
+                os.remove(self.path(temporary))
+        # Совпадение: свежее время изменения не даст collect_media удалить
+        # файл, пока ссылка на него ещё не закоммичена.
+        os.utime(self.path(name))
+        return name
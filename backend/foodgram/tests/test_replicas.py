@@ -0,0 +1,143 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.test import TransactionTestCase, modify_settings, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from foodgram.db.routers import ReplicaRouter
+from recipes.models import Ingredient, Recipe, Tag
+from users.models import User
+
+# Псевдоним объявлен в foodgram.settings_test.
+REPLICA = 'replica_test'
+PNG = (
+    'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAA'
+    'DUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=='
+)
+
+
+@override_settings(
+    DATABASE_REPLICAS=[REPLICA],
+    DATABASE_ROUTERS=['foodgram.db.routers.ReplicaRouter'],
+    REPLICA_STICKY_SECONDS=1,
+)
+@modify_settings(MIDDLEWARE={
+    'prepend': 'foodgram.db.middleware.ReplicaPinningMiddleware',
+})
+class ReplicaRoutingTests(TransactionTestCase):
+    databases = {'default', REPLICA}
+    # Версии из миграций нужны бюджетам запросов: без них bump_version
+    # добавляет INSERT.
+    serialized_rollback = True
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(
+            email='reader@a.ru', username='reader',
+            first_name='reader', last_name='reader',
+        )
+        self.author = User.objects.create(
+            email='author@a.ru', username='author',
+            first_name='author', last_name='author',
+        )
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION='Token ' + Token.objects.create(
+                user=self.user
+            ).key
+        )
+        self.tag = Tag.objects.create(
+            name='Завтрак', slug='breakfast', color='#E26C2D'
+        )
+        self.ingredient = Ingredient.objects.create(
+            name='соль', measurement_unit='г'
+        )
+        self.recipe = Recipe.objects.create(
+            author=self.author, name='Каша', text='Сварить',
+            image='recipes/images/kasha.png', cooking_time=10,
+        )
+
+    def request(self, client, method, url, data=None):
+        primary = CaptureQueriesContext(connections['default'])
+        replica = CaptureQueriesContext(connections[REPLICA])
+        with primary, replica:
+            response = getattr(client, method)(url, data, format='json')
+        return response, len(primary), len(replica)
+
+    def assert_reads_from(self, client, database):
+        _, primary, replica = self.request(client, 'get', '/api/recipes/')
+        if database == REPLICA:
+            self.assertEqual(primary, 0)
+            self.assertGreater(replica, 0)
+        else:
+            self.assertGreater(primary, 0)
+            self.assertEqual(replica, 0)
+
+    def test_router(self):
+        router = ReplicaRouter()
+        self.assertEqual(router.db_for_read(Recipe), REPLICA)
+        self.assertEqual(router.db_for_write(Recipe), 'default')
+        self.assertFalse(router.allow_migrate(REPLICA, 'recipes'))
+        with transaction.atomic():
+            self.assertEqual(router.db_for_read(Recipe), 'default')
+
+    def test_safe_reads_go_to_replica(self):
+        self.assert_reads_from(APIClient(), REPLICA)
+
+    def test_writes_go_to_primary(self):
+        response, primary, replica = self.request(
+            self.client, 'post', f'/api/recipes/{self.recipe.id}/favorite/'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+    def test_reads_pinned_after_write(self):
+        writes = {
+            'favorite': f'/api/recipes/{self.recipe.id}/favorite/',
+            'shopping_cart': f'/api/recipes/{self.recipe.id}/shopping_cart/',
+            'subscribe': f'/api/users/{self.author.id}/subscribe/',
+        }
+        for name, url in writes.items():
+            with self.subTest(name):
+                cache.clear()
+                response, _, _ = self.request(self.client, 'post', url)
+                self.assertEqual(response.status_code, 201)
+                self.assert_reads_from(self.client, 'default')
+
+    def test_reads_pinned_after_recipe_create(self):
+        response, _, replica = self.request(
+            self.client, 'post', '/api/recipes/', {
+                'name': 'Омлет', 'text': 'Пожарить', 'cooking_time': 5,
+                'image': PNG, 'tags': [self.tag.id],
+                'ingredients': [{'id': self.ingredient.id, 'amount': 3}],
+            }
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(replica, 0)
+        self.assert_reads_from(self.client, 'default')
+
+    def test_pin_by_ip_covers_anonymous_reads(self):
+        self.request(
+            self.client, 'post', f'/api/recipes/{self.recipe.id}/favorite/'
+        )
+        self.assert_reads_from(APIClient(), 'default')
+
+    def test_failed_write_does_not_pin(self):
+        response, _, _ = self.request(
+            self.client, 'post', '/api/recipes/0/favorite/'
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assert_reads_from(APIClient(), REPLICA)
+
+    def test_pin_expires(self):
+        self.request(
+            self.client, 'post', f'/api/recipes/{self.recipe.id}/favorite/'
+        )
+        self.assert_reads_from(self.client, 'default')
+        time.sleep(settings.REPLICA_STICKY_SECONDS + 0.1)
+        self.assert_reads_from(APIClient(), REPLICA)
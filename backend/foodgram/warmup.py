@@ -0,0 +1,59 @@
+import gc
+import logging
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+from django.utils import translation
+
+from .db.pool import close_pools
+
+logger = logging.getLogger(__name__)
+
+
+def prime_urls(paths):
+    """Загружает URLconf со всеми view и строит таблицы reverse()."""
+    reverse('recipes-list')
+    return [(path, resolve(path)) for path in paths]
+
+
+def read_only(execute, sql, params, many, context):
+    if not sql.lstrip().upper().startswith('SELECT'):
+        raise RuntimeError(f'Прогрев пишет в БД: {sql}')
+    return execute(sql, params, many, context)
+
+
+def prime_views(matches):
+    """Выполняет GET-запросы к view, заполняя ленивые кеши DRF и моделей."""
+    factory = RequestFactory()
+    for path, match in matches:
+        response = match.func(factory.get(path), *match.args, **match.kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+
+
+def warmup():
+    """Прогрев процесса до fork воркеров gunicorn (--preload).
+
+    Всё, что создано здесь, остаётся общим для воркеров благодаря
+    copy-on-write; gc.freeze() убирает эти объекты из обхода сборщика
+    мусора, чтобы он не копировал страницы памяти в каждом воркере.
+    """
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(read_only))
+            with translation.override(settings.LANGUAGE_CODE):
+                prime_views(prime_urls(settings.WARMUP_URLS))
+            if settings.PANTRY_SEARCH_BACKEND == 'memory':
+                from recipes.pantry import get_index
+                get_index()
+    except Exception:
+        logger.exception('Прогрев процесса не выполнен.')
+    finally:
+        connections.close_all()
+        close_pools()
+    gc.collect()
+    gc.freeze()
@@ -0,0 +1,60 @@
+import os
+import resource
+import threading
+import time
+
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+
+
+def current_rss():
+    """Текущий RSS процесса в байтах (пиковый, если нет /proc)."""
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class WorkerStats:
+    """Счётчики воркера gunicorn, обновляются хуками из gunicorn.conf.py."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.pid = os.getpid()
+        self.started = time.time()
+        self.requests = 0
+        self.in_flight = 0
+        self.busy_time = 0.0
+        self.rss = self.max_rss = current_rss()
+
+    def request_started(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def request_finished(self, duration):
+        rss = current_rss()
+        with self._lock:
+            self.in_flight -= 1
+            self.requests += 1
+            self.busy_time += duration
+            self.rss = rss
+            self.max_rss = max(self.max_rss, rss)
+        return rss
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'pid': self.pid,
+                'uptime': time.time() - self.started,
+                'requests': self.requests,
+                'in_flight': self.in_flight,
+                'busy_time': self.busy_time,
+                'rss': self.rss,
+                'max_rss': self.max_rss,
+            }
+
+
+stats = WorkerStats()
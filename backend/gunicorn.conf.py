@@ -0,0 +1,142 @@
+"""Настройки gunicorn.
+
+Число воркеров, класс и потоки подбираются по доступным контейнеру CPU
+(с учётом квоты cgroup) и переопределяются переменными GUNICORN_*.
+Аргументы из GUNICORN_CMD_ARGS и командной строки важнее этого файла.
+"""
+import math
+import multiprocessing
+import os
+import time
+
+from foodgram.workers import stats
+
+WORKER_CLASSES = {
+    'sync': 'sync',
+    'gthread': 'gthread',
+    'gevent': 'gevent',
+    'uvicorn': 'uvicorn.workers.UvicornWorker',
+}
+
+
+def env_int(name, default):
+    return int(os.getenv(name) or default)
+
+
+def cgroup_cpu_quota():
+    """Квота CPU контейнера (docker --cpus) или None без ограничения."""
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as file:
+            quota, period = file.read().split()
+        return None if quota == 'max' else int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        with open('/sys/fs/cgroup/cpu/cpu.cfs_quota_us') as file:
+            quota = int(file.read())
+        with open('/sys/fs/cgroup/cpu/cpu.cfs_period_us') as file:
+            period = int(file.read())
+    except (OSError, ValueError):
+        return None
+    return quota / period if quota > 0 else None
+
+
+def available_cpus():
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = multiprocessing.cpu_count()
+    quota = cgroup_cpu_quota()
+    if quota:
+        cpus = min(cpus, max(1, math.ceil(quota)))
+    return cpus
+
+
+def default_workers(kind, cpus):
+    if kind == 'sync':
+        return 2 * cpus + 1
+    if kind == 'gthread':
+        return cpus + 1
+    return cpus
+
+
+cpus = available_cpus()
+kind = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+worker_class = WORKER_CLASSES.get(kind, kind)
+workers = min(
+    env_int('GUNICORN_WORKERS', default_workers(kind, cpus)),
+    env_int('GUNICORN_MAX_WORKERS', 16),
+)
+threads = env_int('GUNICORN_THREADS', 4 if kind == 'gthread' else 1)
+# Перезапуск воркера после N запросов против роста памяти; разброс, чтобы
+# воркеры не перезапускались одновременно.
+max_requests = env_int('GUNICORN_MAX_REQUESTS', 1000)
+max_requests_jitter = env_int('GUNICORN_MAX_REQUESTS_JITTER', 100)
+max_rss = env_int('GUNICORN_MAX_RSS_MB', 0) * 1024 * 1024
+timeout = env_int('GUNICORN_TIMEOUT', 30)
+graceful_timeout = env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+# Дольше keepalive_timeout nginx для upstream (60 с), чтобы соединение
+# закрывал nginx, а не gunicorn посреди запроса.
+keepalive = env_int('GUNICORN_KEEPALIVE', 75)
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True') == 'True'
+if preload_app:
+    # Прогрев имеет смысл только в мастере до fork: приложение загружается
+    # после чтения этого файла.
+    os.environ.setdefault('STARTUP_WARMUP', 'True')
+slow_request = env_int('GUNICORN_SLOW_REQUEST_MS', 0) / 1000
+worker_tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+accesslog = os.getenv('GUNICORN_ACCESS_LOG') or None
+
+
+def when_ready(server):
+    server.log.info(
+        'CPU: %s, воркеры: %s x %s, класс: %s, max_requests: %s (+%s)',
+        cpus, server.cfg.workers, server.cfg.threads,
+        server.cfg.worker_class_str, server.cfg.max_requests,
+        server.cfg.max_requests_jitter,
+    )
+    from foodgram.checks import local_cache_features
+    features = local_cache_features()
+    if features and server.cfg.workers > 1:
+        server.log.error(
+            'Кеш в памяти процесса при %s воркерах: %s - отдельно в '
+            'каждом воркере. Задайте CACHE_BACKEND и CACHE_LOCATION.',
+            server.cfg.workers, ', '.join(features),
+        )
+
+
+def post_fork(server, worker):
+    stats.reset()
+
+
+def pre_request(worker, req):
+    req.started = time.monotonic()
+    stats.request_started()
+
+
+def post_request(worker, req, environ, resp):
+    duration = time.monotonic() - req.started
+    rss = stats.request_finished(duration)
+    if slow_request and duration > slow_request:
+        worker.log.warning(
+            'Медленный запрос %s %s: %.0f мс', req.method, req.path,
+            duration * 1000,
+        )
+    if max_rss and rss > max_rss and worker.alive:
+        worker.log.info(
+            'Воркер %s: RSS %.0f МБ больше GUNICORN_MAX_RSS_MB, перезапуск',
+            worker.pid, rss / 1024 / 1024,
+        )
+        worker.alive = False
+
+
+def worker_exit(server, worker):
+    snapshot = stats.snapshot()
+    server.log.info(
+        'Воркер %s: %s запросов за %.0f с, занят %.1f с, RSS %.0f МБ '
+        '(пик %.0f МБ)', snapshot['pid'], snapshot['requests'],
+        snapshot['uptime'], snapshot['busy_time'],
+        snapshot['rss'] / 1024 / 1024, snapshot['max_rss'] / 1024 / 1024,
+    )
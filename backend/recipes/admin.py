@@ -1,32 +1,146 @@
 from django.contrib import admin
+from django.core.exceptions import ValidationError
+from django.db.models import F
+from django.forms.models import BaseInlineFormSet
 
-from .models import Cart, Favorite, Ingredient, IngredientInRecipe, Recipe, Tag
+from .expressions import count_by
+from .models import (ArchivedCart, Cart, Favorite, Ingredient,
+                     IngredientInRecipe, MealPlan, Recipe, Tag)
+from .nutrition import TOTALS, update_recipe_totals
+from .pantry import invalidate_index
+from .tasks import refresh_recipe_totals
+from foodgram.paginator import EstimatedCountPaginator
 
 
-class IngredientAdmin(admin.ModelAdmin):
-    list_display = ('id', 'name', 'measurement_unit')
-    list_filter = ('name',)
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
-class RecipeAdmin(admin.ModelAdmin):
+class IngredientAdmin(LargeTableAdmin):
+    list_display = ('id', 'name', 'measurement_unit', 'calories', 'price')
+    list_filter = ('measurement_unit',)
+    search_fields = ('^name',)
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if change and set(form.changed_data) & {
+            'measurement_unit', *TOTALS.values()
+        }:
+            refresh_recipe_totals.delay(obj.id)
+
+
+class IngredientInRecipeFormSet(BaseInlineFormSet):
+    def clean(self):
+        super().clean()
+        ingredients = [
+            form.cleaned_data['ingredient'] for form in self.forms
+            if form.cleaned_data.get('ingredient')
+            and not form.cleaned_data.get('DELETE')
+        ]
+        if len(ingredients) != len(set(ingredients)):
+            raise ValidationError('Ингредиенты должны быть уникальными')
+
+
+class IngredientInRecipeInline(admin.TabularInline):
+    model = IngredientInRecipe
+    formset = IngredientInRecipeFormSet
+    autocomplete_fields = ('ingredient',)
+    extra = 1
+
+
+class RecipeAdmin(LargeTableAdmin):
     list_display = ('name', 'author', 'in_favorite')
-    list_filter = ('name', 'author', 'tags')
+    list_filter = ('tags',)
+    list_select_related = ('author',)
+    search_fields = ('name', 'author__username', 'author__email')
+    raw_id_fields = ('author',)
+    autocomplete_fields = ('tags',)
+    inlines = (IngredientInRecipeInline,)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            favorites_count=count_by(Favorite.objects.all(), 'recipe')
+        )
 
     def in_favorite(self, obj):
-        return obj.favorite.all().count()
+        return obj.favorites_count
+    in_favorite.admin_order_field = 'favorites_count'
+    in_favorite.short_description = 'В избранном'
+
+    def save_model(self, request, obj, form, change):
+        if change:
+            obj.version += 1
+        super().save_model(request, obj, form, change)
+
+    def save_formset(self, request, form, formset, change):
+        if formset.model is IngredientInRecipe:
+            instances = formset.save(commit=False)
+            IngredientInRecipe.objects.filter(
+                id__in=[item.id for item in formset.deleted_objects]
+            ).delete()
+            IngredientInRecipe.objects.bulk_create(
+                [item for item in instances if item.pk is None]
+            )
+            IngredientInRecipe.objects.bulk_update(
+                [item for item in instances if item.pk is not None],
+                ('ingredient', 'amount')
+            )
+            update_recipe_totals(Recipe.objects.filter(pk=form.instance.pk))
+            invalidate_index()
+        else:
+            super().save_formset(request, form, formset, change)
 
 
 class TagAdmin(admin.ModelAdmin):
     list_display = ('name',)
+    search_fields = ('name', 'slug')
+
+
+class IngredientInRecipeAdmin(LargeTableAdmin):
+    list_display = ('id', 'recipe', 'ingredient', 'amount')
+    list_select_related = ('recipe', 'ingredient')
+    raw_id_fields = ('recipe', 'ingredient')
+
+    def refresh_recipes(self, recipe_ids):
+        recipes = Recipe.objects.filter(pk__in=recipe_ids - {None})
+        recipes.update(version=F('version') + 1)
+        update_recipe_totals(recipes)
+        invalidate_index()
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        self.refresh_recipes({obj.recipe_id, form.initial.get('recipe')})
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        self.refresh_recipes({obj.recipe_id})
+
+    def delete_queryset(self, request, queryset):
+        recipe_ids = set(queryset.values_list('recipe', flat=True))
+        super().delete_queryset(request, queryset)
+        self.refresh_recipes(recipe_ids)
+
+
+class MealPlanAdmin(LargeTableAdmin):
+    list_display = ('id', 'user', 'date', 'recipe', 'servings')
+    list_select_related = ('user', 'recipe')
+    raw_id_fields = ('user', 'recipe')
+    date_hierarchy = 'date'
 
 
-class IngredientInRecipeAdmin(admin.ModelAdmin):
-    list_display = ('id', 'recipe')
+class UserRecipeAdmin(LargeTableAdmin):
+    list_display = ('id', 'user', 'recipe')
+    list_select_related = ('user', 'recipe')
+    raw_id_fields = ('user', 'recipe')
+    search_fields = ('user__username', 'recipe__name')
 
 
-admin.site.register(Favorite)
+admin.site.register(Favorite, UserRecipeAdmin)
 admin.site.register(Ingredient, IngredientAdmin)
 admin.site.register(IngredientInRecipe, IngredientInRecipeAdmin)
 admin.site.register(Recipe, RecipeAdmin)
 admin.site.register(Tag, TagAdmin)
-admin.site.register(Cart)
+admin.site.register(Cart, UserRecipeAdmin)
+admin.site.register(ArchivedCart, UserRecipeAdmin)
+admin.site.register(MealPlan, MealPlanAdmin)
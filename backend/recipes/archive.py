@@ -0,0 +1,59 @@
+from django.db import transaction
+from django.db.models import Max
+
+from .models import ArchivedCart, Cart
+from .user_sets import invalidate
+from users.models import User
+
+
+def stale_cart_users(cutoff):
+    """Пользователи, чья корзина не менялась с cutoff."""
+    return Cart.objects.order_by().values('user').annotate(
+        last_added=Max('created')
+    ).filter(last_added__lt=cutoff).values_list('user', flat=True)
+
+
+def archive_carts(cutoff, batch_size):
+    """Переносит корзины, не менявшиеся с cutoff, в ArchivedCart.
+
+    Рецепты, добавленные после cutoff (пользователь вернулся к корзине во
+    время архивации), остаются в recipes_cart.
+    """
+    archived = 0
+    users = list(stale_cart_users(cutoff))
+    for start in range(0, len(users), batch_size):
+        batch = users[start:start + batch_size]
+        with transaction.atomic():
+            rows = Cart.objects.filter(user__in=batch, created__lt=cutoff)
+            ArchivedCart.objects.bulk_create([
+                ArchivedCart(user_id=user_id, recipe_id=recipe_id,
+                             created=created)
+                for user_id, recipe_id, created in rows.values_list(
+                    'user', 'recipe', 'created'
+                )
+            ])
+            archived += rows.delete()[0]
+            User.objects.filter(id__in=batch).update(has_archived_cart=True)
+    return archived
+
+
+@transaction.atomic
+def restore_carts(user):
+    """Возвращает архивную корзину пользователя в recipes_cart."""
+    rows = ArchivedCart.objects.filter(user=user)
+    Cart.objects.bulk_create([
+        Cart(user_id=user_id, recipe_id=recipe_id, created=created)
+        for user_id, recipe_id, created in rows.values_list(
+            'user', 'recipe', 'created'
+        )
+    ], ignore_conflicts=True)
+    invalidate('cart', user.id)
+    User.objects.filter(id=user.id).update(has_archived_cart=False)
+    user.has_archived_cart = False
+    return rows.delete()[0]
+
+
+def restore_archived_cart(user):
+    """Возвращает корзину из архива при первом обращении пользователя."""
+    if user.is_authenticated and user.has_archived_cart:
+        restore_carts(user)
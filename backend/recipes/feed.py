@@ -0,0 +1,155 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, OuterRef, Q, Subquery
+
+from .models import FeedItem, Recipe
+from users.models import Subscription
+
+HEAVY_AUTHORS_KEY = 'feed-heavy-authors'
+
+
+def heavy_authors():
+    """Авторы, чьи рецепты не раскладываются по лентам, а читаются напрямую."""
+    authors = cache.get(HEAVY_AUTHORS_KEY)
+    if authors is None:
+        authors = set(
+            Subscription.objects.order_by().values('author').annotate(
+                followers=Count('id')
+            ).filter(
+                followers__gt=settings.FEED_FANOUT_LIMIT
+            ).values_list('author', flat=True)
+        )
+        cache.set(HEAVY_AUTHORS_KEY, authors, settings.FEED_HEAVY_AUTHORS_TTL)
+    return authors
+
+
+def push(items):
+    FeedItem.objects.bulk_create(items, ignore_conflicts=True)
+
+
+def latest_recipes(author_id):
+    return list(Recipe.objects.filter(
+        author=author_id
+    ).order_by('-pub_date', '-id').values_list(
+        'id', 'pub_date'
+    )[:settings.FEED_MAX_ITEMS])
+
+
+def fan_out(recipe):
+    if recipe.author_id in heavy_authors():
+        return
+    followers = Subscription.objects.filter(
+        author=recipe.author_id
+    ).values_list('user', flat=True)
+    push([
+        FeedItem(user_id=follower, recipe=recipe, pub_date=recipe.pub_date)
+        for follower in followers.iterator()
+    ])
+    trim_feeds(settings.FEED_MAX_ITEMS, followers)
+
+
+def follow(user, author):
+    if author.id in heavy_authors():
+        return
+    push([
+        FeedItem(user=user, recipe_id=recipe_id, pub_date=pub_date)
+        for recipe_id, pub_date in latest_recipes(author.id)
+    ])
+    trim_feeds(settings.FEED_MAX_ITEMS, [user.id])
+
+
+def unfollow(user, author):
+    FeedItem.objects.filter(user=user, recipe__author=author).delete()
+
+
+def backfill(author_id):
+    """Раскладывает рецепты автора, который перестал быть «тяжёлым»."""
+    followers = Subscription.objects.filter(
+        author=author_id
+    ).values_list('user', flat=True)
+    if followers.count() > settings.FEED_FANOUT_LIMIT:
+        return 0
+    cache.delete(HEAVY_AUTHORS_KEY)
+    recipes = latest_recipes(author_id)
+    push([
+        FeedItem(user_id=follower, recipe_id=recipe_id, pub_date=pub_date)
+        for follower in followers.iterator()
+        for recipe_id, pub_date in recipes
+    ])
+    trim_feeds(settings.FEED_MAX_ITEMS, followers)
+    return len(recipes)
+
+
+def after(pub_date, recipe_id, field):
+    return Q(pub_date__lt=pub_date) | Q(
+        pub_date=pub_date, **{f'{field}__lt': recipe_id}
+    )
+
+
+def get_feed(user, before=None, limit=10):
+    """Ключи (pub_date, id) рецептов страницы ленты, раньше ключа before.
+
+    Разложенные записи и рецепты «тяжёлых» авторов читаются отдельными
+    keyset-запросами по своим индексам и сливаются.
+    """
+    items = FeedItem.objects.filter(user=user).order_by(
+        '-pub_date', '-recipe_id'
+    )
+    if before is not None:
+        items = items.filter(after(*before, 'recipe'))
+    keys = set(items.values_list('pub_date', 'recipe')[:limit])
+    heavy = heavy_authors()
+    if heavy:
+        recipes = Recipe.objects.filter(
+            author__in=Subscription.objects.filter(
+                user=user, author__in=heavy
+            ).values('author')
+        ).order_by('-pub_date', '-id')
+        if before is not None:
+            recipes = recipes.filter(after(*before, 'id'))
+        keys.update(recipes.values_list('pub_date', 'id')[:limit])
+    return sorted(keys, reverse=True)[:limit]
+
+
+def trim_feeds(max_items, users=None):
+    """Обрезает ленты до max_items последних рецептов.
+
+    Граница - ключ (pub_date, recipe) записи max_items + 1, как в порядке
+    ленты и курсоре: при одинаковых pub_date лишние записи не удаляются.
+    """
+    items = FeedItem.objects.order_by()
+    if users is not None:
+        items = items.filter(user__in=users)
+    overflowing = items.values('user').annotate(
+        items=Count('id')
+    ).filter(items__gt=max_items).values('user')
+    cutoff = FeedItem.objects.filter(
+        user=OuterRef('user')
+    ).order_by('-pub_date', '-recipe_id')[max_items:max_items + 1]
+    return FeedItem.objects.filter(id__in=FeedItem.objects.filter(
+        user__in=overflowing
+    ).annotate(
+        cutoff_date=Subquery(cutoff.values('pub_date')),
+        cutoff_recipe=Subquery(cutoff.values('recipe')),
+    ).filter(
+        Q(pub_date__lt=F('cutoff_date'))
+        | Q(pub_date=F('cutoff_date'), recipe__lte=F('cutoff_recipe'))
+    ).values('id')).delete()[0]
+
+
+def rebuild_feeds():
+    FeedItem.objects.all().delete()
+    heavy = heavy_authors()
+    for author_id in Subscription.objects.exclude(
+        author__in=heavy
+    ).values_list('author', flat=True).distinct().iterator():
+        recipes = latest_recipes(author_id)
+        push([
+            FeedItem(user_id=follower, recipe_id=recipe_id,
+                     pub_date=pub_date)
+            for follower in Subscription.objects.filter(
+                author_id=author_id
+            ).values_list('user', flat=True)
+            for recipe_id, pub_date in recipes
+        ])
+    trim_feeds(settings.FEED_MAX_ITEMS)
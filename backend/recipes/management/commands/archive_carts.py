@@ -0,0 +1,35 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from recipes.archive import archive_carts, restore_carts
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = ('Перенос корзин, которые не менялись дольше --days дней, из '
+            'recipes_cart в архивную таблицу (или возврат корзины '
+            'пользователя из архива).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int,
+                            default=settings.CART_ARCHIVE_DAYS)
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Пользователей в одной транзакции.')
+        parser.add_argument('--restore', type=int, metavar='USER_ID',
+                            help='Вернуть корзину пользователя из архива.')
+
+    def handle(self, *args, **options):
+        if options['restore'] is not None:
+            restored = restore_carts(
+                User.objects.get(id=options['restore'])
+            )
+            self.stdout.write(f'Возвращено из архива: {restored}')
+            return
+        archived = archive_carts(
+            timezone.now() - timedelta(days=options['days']),
+            options['batch_size']
+        )
+        self.stdout.write(f'Перенесено в архив: {archived}')
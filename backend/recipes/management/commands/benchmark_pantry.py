@@ -0,0 +1,76 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.models import IngredientInRecipe
+from recipes.pantry import MATCH_ALL, MATCH_ANY, MATCH_COVERAGE, sql_recipe_ids
+from recipes.pantry_index import PantryIndex
+
+
+def percentile(values, rank):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(rank / 100 * len(ordered)))]
+
+
+class Command(BaseCommand):
+    help = ('Сравнение поиска рецептов по ингредиентам: инвертированный '
+            'индекс в памяти против GROUP BY/HAVING в БД.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--trials', type=int, default=50)
+        parser.add_argument('--pantry-sizes', type=int, nargs='+',
+                            default=[3, 10, 30])
+        parser.add_argument('--min-coverage', type=float, default=0.8)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        # Кладовая из реально используемых ингредиентов, с учётом частоты.
+        used = list(IngredientInRecipe.objects.values_list(
+            'ingredient_id', flat=True
+        )[:100000])
+        if not used:
+            raise CommandError('Нет данных: запустите generate_dataset.')
+        started = time.perf_counter()
+        index = PantryIndex(version=None)
+        self.stdout.write(
+            f'Построение индекса: {(time.perf_counter() - started) * 1000:.1f}'
+            f' мс, {len(index.postings)} строк, {index.nbytes / 2**20:.1f} МБ'
+        )
+        self.stdout.write(
+            f'{"mode":<9} {"size":>5} {"sql p50":>9} {"sql p95":>9} '
+            f'{"mem p50":>9} {"mem p95":>9} {"found":>7}'
+        )
+        for size in options['pantry_sizes']:
+            pantries = [
+                sorted({rng.choice(used) for _ in range(size)})
+                for _ in range(options['trials'])
+            ]
+            for match in (MATCH_ANY, MATCH_ALL, MATCH_COVERAGE):
+                self.compare(
+                    index, pantries, size, match, options['min_coverage']
+                )
+
+    def compare(self, index, pantries, size, match, min_coverage):
+        sql_timings, memory_timings, found = [], [], 0
+        for pantry in pantries:
+            started = time.perf_counter()
+            expected = set(sql_recipe_ids(
+                pantry, match, min_coverage
+            ).values_list('recipe', flat=True))
+            sql_timings.append((time.perf_counter() - started) * 1000)
+            started = time.perf_counter()
+            result = index.search(pantry, match, min_coverage)
+            memory_timings.append((time.perf_counter() - started) * 1000)
+            if set(result.tolist()) != expected:
+                raise CommandError(f'Результаты различаются: {pantry}')
+            found += len(expected)
+        self.stdout.write(
+            f'{match:<9} {size:>5} '
+            f'{percentile(sql_timings, 50):>9.2f} '
+            f'{percentile(sql_timings, 95):>9.2f} '
+            f'{percentile(memory_timings, 50):>9.3f} '
+            f'{percentile(memory_timings, 95):>9.3f} '
+            f'{found // len(pantries):>7}'
+        )
@@ -0,0 +1,124 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
+
+from recipes.models import Cart, Favorite, Recipe
+from users.models import User
+
+MODELS = {
+    'cart': Cart,
+    'favorite': Favorite,
+}
+CHUNK = 10000
+
+
+def percentile(values, rank):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(rank / 100 * len(ordered)))]
+
+
+class Command(BaseCommand):
+    help = ('Бенчмарк избранного и корзины по мере роста таблиц: таблица '
+            'дополняется синтетическими строками до каждого из --rows, '
+            'после чего замеряются проверка, список рецептов пользователя '
+            'и страница рецептов с флагом. Синтетические строки пишутся в '
+            'транзакции, которая откатывается после прогона. Запускать на '
+            'отдельной базе (generate_dataset), до и после partition_tables '
+            'или archive_carts.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--table', action='append', dest='tables',
+                            choices=tuple(MODELS))
+        parser.add_argument('--rows', type=int, nargs='+',
+                            default=[100000, 1000000, 10000000])
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--limit', type=int, default=6)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        # Миллионы синтетических строк в живых таблицах избранного и
+        # корзины испортили бы данные пользователей: всё откатывается.
+        with transaction.atomic():
+            self.run(options)
+            transaction.set_rollback(True)
+
+    def run(self, options):
+        self.rng = random.Random(options['seed'])
+        self.user_ids = list(User.objects.values_list('id', flat=True))
+        self.recipe_ids = list(Recipe.objects.values_list('id', flat=True))
+        if not self.user_ids or not self.recipe_ids:
+            raise CommandError('Нет данных: запустите generate_dataset.')
+        self.stdout.write(
+            f'{"таблица":>10} {"строк":>10} {"размер,МБ":>10} '
+            f'{"запрос":>8} {"p50,ms":>8} {"p95,ms":>8}'
+        )
+        for name in options['tables'] or MODELS:
+            model = MODELS[name]
+            for rows in sorted(options['rows']):
+                count = self.grow(model, rows)
+                for query, timings in self.measure(
+                    model, options['queries'], options['limit']
+                ):
+                    self.stdout.write(
+                        f'{name:>10} {count:>10} {self.size(model):>10} '
+                        f'{query:>8} {percentile(timings, 50):>8.2f} '
+                        f'{percentile(timings, 95):>8.2f}'
+                    )
+
+    def grow(self, model, rows):
+        count = model.objects.count()
+        while count < rows:
+            for start in range(count, rows, CHUNK):
+                model.objects.bulk_create([
+                    model(user_id=self.rng.choice(self.user_ids),
+                          recipe_id=self.rng.choice(self.recipe_ids))
+                    for _ in range(min(CHUNK, rows - start))
+                ], ignore_conflicts=True)
+            previous, count = count, model.objects.count()
+            if count == previous:
+                raise CommandError(
+                    f'{model.__name__}: не хватает пар пользователь-рецепт '
+                    f'для {rows} строк.'
+                )
+        return count
+
+    def size(self, model):
+        if connection.vendor != 'postgresql':
+            return '-'
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT sum(pg_total_relation_size(relid)) '
+                'FROM pg_partition_tree(%s) WHERE isleaf',
+                [model._meta.db_table]
+            )
+            return f'{cursor.fetchone()[0] / 1024 / 1024:.0f}'
+
+    def measure(self, model, queries, limit):
+        related = model._meta.get_field('recipe').related_query_name()
+        samples = [
+            (self.rng.choice(self.user_ids), self.rng.choice(self.recipe_ids))
+            for _ in range(queries)
+        ]
+        checks = {
+            'exists': lambda user, recipe: model.objects.filter(
+                user=user, recipe=recipe
+            ).exists(),
+            'list': lambda user, recipe: list(Recipe.objects.filter(**{
+                f'{related}__user': user
+            }).values_list('id', flat=True)[:limit]),
+            'page': lambda user, recipe: list(Recipe.objects.annotate(
+                flag=Exists(model.objects.filter(
+                    user=user, recipe=OuterRef('pk')
+                ))
+            ).values_list('id', 'flag')[:limit]),
+        }
+        for query, check in checks.items():
+            timings = []
+            for user, recipe in samples:
+                started = time.perf_counter()
+                check(user, recipe)
+                timings.append((time.perf_counter() - started) * 1000)
+            yield query, timings
@@ -0,0 +1,102 @@
+import random
+import sys
+import time
+from array import array
+from itertools import groupby
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Exists, OuterRef
+
+from recipes.models import Recipe
+from recipes.user_sets import MODELS, RecipeSet, get_recipe_set
+from users.models import User
+
+PER_USERS = 100000
+
+
+def percentile(values, rank):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(rank / 100 * len(ordered)))]
+
+
+class Command(BaseCommand):
+    help = ('Объём памяти наборов избранного и корзины (массив id рецептов '
+            'на пользователя) в пересчёте на 100 тыс. пользователей и '
+            'время флагов is_favorited/is_in_shopping_cart для страницы: '
+            'подзапрос EXISTS против проверки по набору.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000,
+                            help='Пользователей в выборке для замера памяти.')
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--limit', type=int, default=6)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        user_ids = list(User.objects.values_list('id', flat=True))
+        if not user_ids:
+            raise CommandError('Нет данных: запустите generate_dataset.')
+        sample = sorted(rng.sample(user_ids, min(len(user_ids),
+                                                 options['users'])))
+        self.stdout.write(
+            f'{"набор":>10} {"id/польз.":>10} {"кеш, МБ":>10} '
+            f'{"array, МБ":>10} {"set, МБ":>10}   на {PER_USERS} польз.'
+        )
+        for kind in MODELS:
+            self.report_memory(kind, sample)
+        self.stdout.write(f'\n{"флаги":>10} {"p50,ms":>8} {"p95,ms":>8}')
+        self.report_flags(rng, user_ids, options['queries'], options['limit'])
+
+    def report_memory(self, kind, sample):
+        rows = MODELS[kind].objects.filter(user__in=sample).order_by(
+            'user', 'recipe'
+        ).values_list('user', 'recipe').iterator()
+        ids = cached = objects = python_sets = 0
+        for _, group in groupby(rows, key=lambda row: row[0]):
+            recipes = array('I', (recipe for _, recipe in group))
+            ids += len(recipes)
+            cached += len(recipes.tobytes())
+            objects += sys.getsizeof(recipes) + sys.getsizeof(
+                RecipeSet(recipes)
+            )
+            python_sets += sys.getsizeof(set(recipes)) + 28 * len(recipes)
+        scale = PER_USERS / len(sample) / 1024 / 1024
+        self.stdout.write(
+            f'{kind:>10} {ids / len(sample):>10.1f} {cached * scale:>10.1f} '
+            f'{objects * scale:>10.1f} {python_sets * scale:>10.1f}'
+        )
+
+    def report_flags(self, rng, user_ids, queries, limit):
+        recipes = list(Recipe.objects.values_list('id', flat=True)[:limit])
+        users = [rng.choice(user_ids) for _ in range(queries)]
+
+        def exists(user):
+            flags = {
+                f'in_{kind}': Exists(model.objects.filter(
+                    user=user, recipe=OuterRef('pk')
+                )) for kind, model in MODELS.items()
+            }
+            return list(Recipe.objects.filter(id__in=recipes).annotate(
+                **flags
+            ).values_list('id', *flags))
+
+        def sets(user):
+            found = [get_recipe_set(kind, user) for kind in MODELS]
+            return [
+                (recipe, *(recipe in ids for ids in found))
+                for recipe in recipes
+            ]
+
+        for user in users:
+            sets(user)
+        for name, resolve in (('exists', exists), ('sets', sets)):
+            timings = []
+            for user in users:
+                started = time.perf_counter()
+                resolve(user)
+                timings.append((time.perf_counter() - started) * 1000)
+            self.stdout.write(
+                f'{name:>10} {percentile(timings, 50):>8.2f} '
+                f'{percentile(timings, 95):>8.2f}'
+            )
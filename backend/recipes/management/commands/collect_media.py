@@ -0,0 +1,53 @@
+import os
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from recipes.models import Recipe
+from recipes.tasks import thumbnail_name
+
+DIRECTORIES = ('recipes/images', 'recipes/thumbnails')
+
+
+def walk(storage, path):
+    if not storage.exists(path):
+        return
+    directories, files = storage.listdir(path)
+    for name in files:
+        yield os.path.join(path, name)
+    for directory in directories:
+        yield from walk(storage, os.path.join(path, directory))
+
+
+class Command(BaseCommand):
+    help = ('Удаление картинок рецептов и миниатюр, на которые не ссылается '
+            'ни один рецепт.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-age', type=int, default=24,
+                            help='Не трогать файлы моложе N часов '
+                                 '(загрузки в незавершённых транзакциях).')
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        images = set(Recipe.objects.exclude(image='').values_list(
+            'image', flat=True
+        ))
+        referenced = images | {thumbnail_name(image) for image in images}
+        cutoff = timezone.now() - timedelta(hours=options['min_age'])
+        storage = Recipe._meta.get_field('image').storage
+        removed = freed = 0
+        for directory in DIRECTORIES:
+            for name in walk(storage, directory):
+                if (name in referenced
+                        or storage.get_modified_time(name) > cutoff):
+                    continue
+                removed += 1
+                freed += storage.size(name)
+                if not options['dry_run']:
+                    storage.delete(name)
+        self.stdout.write(
+            f'{"Будет удалено" if options["dry_run"] else "Удалено"} '
+            f'файлов: {removed}, {freed / 1024 / 1024:.1f} МБ'
+        )
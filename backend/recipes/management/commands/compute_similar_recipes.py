@@ -0,0 +1,154 @@
+from datetime import timedelta
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Max
+from scipy import sparse
+
+from recipes.models import (Cart, Favorite, IngredientInRecipe, Recipe,
+                            RecipeSimilarity)
+
+
+def binary_matrix(pairs, recipe_ids):
+    """Разреженная матрица признак x рецепт из пар (признак, рецепт)."""
+    pairs = np.unique(np.asarray(pairs, dtype=np.int64).reshape(-1, 2), axis=0)
+    features, rows = np.unique(pairs[:, 0], return_inverse=True)
+    columns = np.searchsorted(recipe_ids, pairs[:, 1])
+    return sparse.csr_matrix(
+        (np.ones(len(pairs), dtype=np.float32), (rows, columns)),
+        shape=(len(features), len(recipe_ids))
+    )
+
+
+def normalize_columns(matrix):
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=0))).ravel()
+    norms[norms == 0] = 1
+    return matrix @ sparse.diags(1 / norms)
+
+
+class Command(BaseCommand):
+    help = ('Расчёт top-K похожих рецептов по совместным избранным/корзинам '
+            'и общим ингредиентам.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=20)
+        parser.add_argument(
+            '--alpha', type=float, default=0.7,
+            help='Вес совместных избранных/корзин против ингредиентов.'
+        )
+        parser.add_argument('--chunk-size', type=int, default=512)
+        parser.add_argument(
+            '--incremental', action='store_true',
+            help='Пересчитать только новые рецепты, рецепты с новыми '
+                 'избранными и корзинами и их соседей. Удаления из '
+                 'избранного и корзин учитывает полный пересчёт.'
+        )
+
+    def handle(self, *args, **options):
+        self.top_k = options['top_k']
+        self.chunk_size = options['chunk_size']
+        self.recipe_ids = np.fromiter(
+            Recipe.objects.order_by('id').values_list('id', flat=True),
+            dtype=np.int64
+        )
+        if not len(self.recipe_ids):
+            print('Нет рецептов.')
+            return
+        self.matrix = self.build_matrix(options['alpha'])
+        if options['incremental']:
+            targets = self.dirty_positions()
+            targets = np.union1d(targets, self.neighbour_positions(targets))
+        else:
+            targets = np.arange(len(self.recipe_ids))
+        with transaction.atomic():
+            self.store(targets, full=not options['incremental'])
+        print(f'Похожие рецепты пересчитаны: {len(targets)}.')
+
+    def build_matrix(self, alpha):
+        interactions = binary_matrix(
+            list(Favorite.objects.values_list('user_id', 'recipe_id'))
+            + list(Cart.objects.values_list('user_id', 'recipe_id')),
+            self.recipe_ids
+        )
+        ingredients = binary_matrix(
+            list(IngredientInRecipe.objects.values_list(
+                'ingredient_id', 'recipe_id'
+            )),
+            self.recipe_ids
+        )
+        # X^T X = alpha * cos(избранное и корзины)
+        #       + (1 - alpha) * cos(ингредиенты).
+        return sparse.vstack([
+            np.sqrt(alpha) * normalize_columns(interactions),
+            np.sqrt(1 - alpha) * normalize_columns(ingredients),
+        ]).tocsc()
+
+    def dirty_positions(self):
+        last_run = RecipeSimilarity.objects.aggregate(
+            Max('computed_at')
+        )['computed_at__max']
+        ids = set(
+            Recipe.objects.annotate(neighbours_count=Count('neighbours'))
+            .filter(neighbours_count__lt=self.top_k)
+            .values_list('id', flat=True)
+        )
+        if last_run is not None:
+            since = last_run - timedelta(minutes=1)
+            ids.update(Recipe.objects.filter(
+                pub_date__gte=since
+            ).values_list('id', flat=True))
+            for model in (Favorite, Cart):
+                ids.update(model.objects.filter(
+                    created__gte=since
+                ).values_list('recipe_id', flat=True).distinct())
+        ids = np.intersect1d(
+            np.fromiter(ids, dtype=np.int64, count=len(ids)), self.recipe_ids
+        )
+        return np.searchsorted(self.recipe_ids, ids)
+
+    def neighbour_positions(self, positions):
+        neighbours = set()
+        for _, columns, _ in self.top_neighbours(positions):
+            neighbours.update(columns.tolist())
+        return np.fromiter(neighbours, dtype=np.int64)
+
+    def top_neighbours(self, positions):
+        for start in range(0, len(positions), self.chunk_size):
+            chunk = positions[start:start + self.chunk_size]
+            scores = (self.matrix[:, chunk].T @ self.matrix).tocsr()
+            for row, position in enumerate(chunk):
+                begin, end = scores.indptr[row], scores.indptr[row + 1]
+                columns = scores.indices[begin:end]
+                values = scores.data[begin:end]
+                keep = (columns != position) & (values > 0)
+                columns, values = columns[keep], values[keep]
+                if len(values) > self.top_k:
+                    best = np.argpartition(-values, self.top_k)[:self.top_k]
+                    columns, values = columns[best], values[best]
+                yield position, columns, values
+
+    def store(self, positions, full):
+        if full:
+            RecipeSimilarity.objects.all().delete()
+        else:
+            for start in range(0, len(positions), self.chunk_size):
+                chunk = positions[start:start + self.chunk_size]
+                RecipeSimilarity.objects.filter(
+                    recipe_id__in=self.recipe_ids[chunk].tolist()
+                ).delete()
+        batch = []
+        for position, columns, values in self.top_neighbours(positions):
+            recipe_id = int(self.recipe_ids[position])
+            batch.extend(
+                RecipeSimilarity(
+                    recipe_id=recipe_id,
+                    similar_id=int(similar_id),
+                    score=float(score),
+                )
+                for similar_id, score in zip(self.recipe_ids[columns], values)
+            )
+            if len(batch) >= 10000:
+                RecipeSimilarity.objects.bulk_create(batch)
+                batch = []
+        RecipeSimilarity.objects.bulk_create(batch)
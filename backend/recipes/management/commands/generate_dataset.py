@@ -0,0 +1,186 @@
+import base64
+import csv
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+
+from recipes.feed import rebuild_feeds
+from recipes.models import (Cart, Favorite, Ingredient, IngredientInRecipe,
+                            Recipe, Tag)
+from recipes.tasks import reconcile_user_counters
+from users.models import Subscription, User
+
+IMAGE_NAME = 'recipes/images/synthetic.png'
+IMAGE = base64.b64decode(
+    'iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+M9QDwADhg'
+    'GAWjR9awAAAABJRU5ErkJggg=='
+)
+TAGS = (
+    ('Завтрак', '#E26C2D', 'breakfast'),
+    ('Обед', '#49B64E', 'lunch'),
+    ('Ужин', '#8775D2', 'dinner'),
+)
+
+
+class Command(BaseCommand):
+    help = ('Генерация синтетических данных заданного масштаба '
+            'на основе data/ingredients.csv.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=5000)
+        parser.add_argument('--ingredients-per-recipe', type=int, default=8)
+        parser.add_argument('--favorites', type=int, default=20,
+                            help='Избранных рецептов на пользователя.')
+        parser.add_argument('--carts', type=int, default=5,
+                            help='Рецептов в корзине на пользователя.')
+        parser.add_argument('--subscriptions', type=int, default=10,
+                            help='Подписок на пользователя.')
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        with transaction.atomic():
+            ingredient_ids = self.create_ingredients()
+            tag_ids = self.create_tags()
+            user_ids = self.create_users(options['users'])
+            recipe_ids, author_ids = self.create_recipes(
+                options['recipes'], user_ids
+            )
+            self.create_recipe_relations(
+                recipe_ids, ingredient_ids, tag_ids,
+                options['ingredients_per_recipe']
+            )
+            self.create_user_relations(
+                Favorite, 'recipe_id', user_ids, recipe_ids,
+                options['favorites']
+            )
+            self.create_user_relations(
+                Cart, 'recipe_id', user_ids, recipe_ids, options['carts']
+            )
+            self.create_user_relations(
+                Subscription, 'author_id', user_ids, author_ids,
+                options['subscriptions']
+            )
+            # bulk_create не шлёт сигналов: счётчики пользователей и ленты
+            # подписчиков заполняются здесь.
+            reconcile_user_counters()
+            rebuild_feeds()
+        print('Синтетические данные загружены.')
+
+    def bulk_create(self, model, objects):
+        model.objects.bulk_create(
+            objects, batch_size=self.batch_size, ignore_conflicts=True
+        )
+        print(f'{model.__name__}: {len(objects)}')
+
+    def new_ids(self, model, last_id):
+        return list(
+            model.objects.filter(id__gt=last_id or 0)
+            .order_by('id').values_list('id', flat=True)
+        )
+
+    def skewed_sample(self, population, count, exclude=None):
+        count = min(count, len(population) - (exclude is not None))
+        sample = set()
+        for _ in range(count * 20):
+            if len(sample) >= count:
+                return sample
+            index = int(self.rng.paretovariate(1.2)) - 1
+            sample.add(population[index % len(population)])
+            sample.discard(exclude)
+        rest = [item for item in population
+                if item not in sample and item != exclude]
+        sample.update(self.rng.sample(rest, count - len(sample)))
+        return sample
+
+    def create_ingredients(self):
+        if not Ingredient.objects.exists():
+            with open('./data/ingredients.csv', newline='',
+                      encoding='utf-8') as f:
+                rows = {tuple(row[:2]) for row in csv.reader(f)}
+            self.bulk_create(Ingredient, [
+                Ingredient(name=name, measurement_unit=unit)
+                for name, unit in sorted(rows)
+            ])
+        return list(Ingredient.objects.values_list('id', flat=True))
+
+    def create_tags(self):
+        for name, color, slug in TAGS:
+            Tag.objects.get_or_create(
+                slug=slug, defaults={'name': name, 'color': color}
+            )
+        return list(Tag.objects.values_list('id', flat=True))
+
+    def create_users(self, count):
+        last_id = User.objects.aggregate(Max('id'))['id__max']
+        start = (last_id or 0) + 1
+        password = make_password('synthetic-password')
+        self.bulk_create(User, [
+            User(
+                username=f'synthetic_{number}',
+                email=f'synthetic_{number}@example.com',
+                first_name='Пользователь',
+                last_name=str(number),
+                password=password,
+            ) for number in range(start, start + count)
+        ])
+        return self.new_ids(User, last_id)
+
+    def create_recipes(self, count, user_ids):
+        # Одна картинка на все рецепты; хранилище адресует файлы по
+        # содержимому, поэтому повторный запуск не создаёт копию.
+        image = Recipe._meta.get_field('image').storage.save(
+            IMAGE_NAME, ContentFile(IMAGE)
+        )
+        authors = list(user_ids)
+        self.rng.shuffle(authors)
+        last_id = Recipe.objects.aggregate(Max('id'))['id__max']
+        self.bulk_create(Recipe, [
+            Recipe(
+                author_id=self.skewed_sample(authors, 1).pop(),
+                name=f'Рецепт {number}',
+                text='Синтетический рецепт.',
+                image=image,
+                cooking_time=self.rng.randint(5, 180),
+            ) for number in range(count)
+        ])
+        recipes = self.new_ids(Recipe, last_id)
+        self.rng.shuffle(recipes)
+        return recipes, authors
+
+    def create_recipe_relations(self, recipe_ids, ingredient_ids, tag_ids,
+                                per_recipe):
+        amounts = []
+        tags = []
+        for recipe_id in recipe_ids:
+            for ingredient_id in self.rng.sample(ingredient_ids, per_recipe):
+                amounts.append(IngredientInRecipe(
+                    recipe_id=recipe_id,
+                    ingredient_id=ingredient_id,
+                    amount=self.rng.randint(1, 500),
+                ))
+            for tag_id in self.rng.sample(
+                    tag_ids, self.rng.randint(1, len(tag_ids))):
+                tags.append(Recipe.tags.through(
+                    recipe_id=recipe_id, tag_id=tag_id
+                ))
+        self.bulk_create(IngredientInRecipe, amounts)
+        self.bulk_create(Recipe.tags.through, tags)
+
+    def create_user_relations(self, model, field, user_ids, targets,
+                              per_user):
+        self.bulk_create(model, [
+            model(user_id=user_id, **{field: target})
+            for user_id in user_ids
+            for target in self.skewed_sample(
+                targets, self.rng.randint(0, per_user * 2),
+                exclude=user_id if field == 'author_id' else None
+            )
+        ])
@@ -1,23 +1,76 @@
 import csv
 
-from django.core.management.base import BaseCommand
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 
 from recipes.models import Ingredient
+from recipes.nutrition import (TOTALS, recipes_with_ingredients,
+                               update_recipe_totals)
+from recipes.versions import bump_version
+
+NUTRITION_FIELDS = tuple(TOTALS.values())
+BATCH_SIZE = 1000
+
+
+def parse_value(name, value):
+    """Число для поля ингредиента: float для КБЖУ, Decimal для цены."""
+    value = value.strip().replace(',', '.')
+    if not value:
+        return None
+    return Ingredient._meta.get_field(name).clean(value, None)
 
 
 class Command(BaseCommand):
+    help = ('Загрузка ингредиентов из CSV: название, единица измерения и '
+            'необязательные калории, белки, жиры, углеводы, цена (на 100 г '
+            'или 100 мл, для остальных единиц - на одну единицу). '
+            'Итоги рецептов с изменёнными ингредиентами пересчитываются.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', default='./data/ingredients.csv')
 
     def handle(self, *args, **options):
-        self.import_ingredients()
-        print('Ингредиенты загружены.')
-
-    def import_ingredients(self, file='ingredients.csv'):
-        print(f'Загрузка {file}...')
-        file_path = f'./data/{file}'
-        with open(file_path, newline='', encoding='utf-8') as f:
-            reader = csv.reader(f)
-            for row in reader:
-                status, created = Ingredient.objects.update_or_create(
-                    name=row[0],
-                    measurement_unit=row[1]
+        print(f'Загрузка {options["file"]}...')
+        with open(options['file'], newline='', encoding='utf-8') as f:
+            rows = list(csv.reader(f))
+        existing = {
+            (ingredient.name, ingredient.measurement_unit): ingredient
+            for ingredient in Ingredient.objects.all()
+        }
+        created, changed = {}, []
+        for number, row in enumerate(rows, 1):
+            if not row:
+                continue
+            try:
+                values = {
+                    name: parse_value(name, value)
+                    for name, value in zip(NUTRITION_FIELDS, row[2:])
+                }
+            except ValidationError:
+                raise CommandError(f'Строка {number}: не число в {row}.')
+            ingredient = existing.get((row[0], row[1]))
+            if ingredient is None:
+                created[row[0], row[1]] = Ingredient(
+                    name=row[0], measurement_unit=row[1], **values
                 )
+            elif any(getattr(ingredient, name) != value
+                     for name, value in values.items()):
+                for name, value in values.items():
+                    setattr(ingredient, name, value)
+                changed.append(ingredient)
+        with transaction.atomic():
+            Ingredient.objects.bulk_create(
+                created.values(), batch_size=BATCH_SIZE
+            )
+            Ingredient.objects.bulk_update(
+                changed, NUTRITION_FIELDS, batch_size=BATCH_SIZE
+            )
+            recipes = update_recipe_totals(recipes_with_ingredients(
+                [ingredient.id for ingredient in changed]
+            )) if changed else 0
+            # bulk_create и bulk_update не шлют post_save.
+            if created or changed:
+                bump_version('ingredients')
+        print(f'Ингредиенты загружены: новых {len(created)}, '
+              f'обновлено {len(changed)}, пересчитано рецептов {recipes}.')
@@ -0,0 +1,124 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from recipes.models import Cart, Favorite
+
+MODELS = {
+    'cart': Cart,
+    'favorite': Favorite,
+}
+
+
+class Command(BaseCommand):
+    help = ('PostgreSQL: перевод recipes_cart и recipes_favorite на '
+            'декларативное секционирование по хешу user_id. Модели Django '
+            'не меняются: первичный ключ становится (id, user_id), '
+            'ограничения и индексы пересоздаются с прежними именами.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--table', action='append', dest='tables',
+                            choices=tuple(MODELS))
+        parser.add_argument('--partitions', type=int, default=16)
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Только вывести SQL.')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Секционирование доступно только в PostgreSQL.')
+        for name in options['tables'] or MODELS:
+            table = MODELS[name]._meta.db_table
+            if self.is_partitioned(table):
+                self.stdout.write(f'{table}: уже секционирована')
+                continue
+            statements = self.statements(table, options['partitions'])
+            if options['dry_run']:
+                self.stdout.write(';\n'.join(statements) + ';')
+                continue
+            started = time.perf_counter()
+            with transaction.atomic(), connection.cursor() as cursor:
+                for statement in statements:
+                    cursor.execute(statement)
+            self.stdout.write(
+                f'{table}: {options["partitions"]} секций за '
+                f'{time.perf_counter() - started:.1f} с'
+            )
+
+    def is_partitioned(self, table):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT 1 FROM pg_partitioned_table '
+                'WHERE partrelid = to_regclass(%s)', [table]
+            )
+            return cursor.fetchone() is not None
+
+    def statements(self, table, partitions):
+        quote = connection.ops.quote_name
+        old = f'{table}_unpartitioned'
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(
+                cursor, table
+            )
+            cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [table])
+            sequence = cursor.fetchone()[0]
+        statements = [
+            f'ALTER TABLE {quote(table)} RENAME TO {quote(old)}',
+            f'CREATE TABLE {quote(table)} (LIKE {quote(old)} INCLUDING '
+            f'DEFAULTS INCLUDING CONSTRAINTS) PARTITION BY HASH (user_id)',
+        ]
+        statements.extend(
+            f'CREATE TABLE {quote(f"{table}_p{remainder}")} PARTITION OF '
+            f'{quote(table)} FOR VALUES WITH (MODULUS {partitions}, '
+            f'REMAINDER {remainder})'
+            for remainder in range(partitions)
+        )
+        statements.append(
+            f'INSERT INTO {quote(table)} SELECT * FROM {quote(old)}'
+        )
+        if sequence:
+            statements.append(
+                f'ALTER SEQUENCE {sequence} OWNED BY {quote(table)}.id'
+            )
+        statements.append(f'DROP TABLE {quote(old)}')
+        statements.extend(self.constraint_statements(table, constraints))
+        statements.append(f'ANALYZE {quote(table)}')
+        return statements
+
+    def constraint_statements(self, table, constraints):
+        """Ограничения и индексы исходной таблицы для секционированной.
+
+        Первичный ключ и уникальные ограничения секционированной таблицы
+        должны включать ключ секционирования, поэтому к ним добавляется
+        user_id. CHECK-ограничения копирует LIKE ... INCLUDING CONSTRAINTS.
+        """
+        quote = connection.ops.quote_name
+        statements = []
+        for name, info in sorted(constraints.items()):
+            columns = list(info['columns'])
+            if info['primary_key'] or info['unique']:
+                if 'user_id' not in columns:
+                    columns.append('user_id')
+                kind = 'PRIMARY KEY' if info['primary_key'] else 'UNIQUE'
+                statements.append(
+                    f'ALTER TABLE {quote(table)} ADD CONSTRAINT {quote(name)} '
+                    f'{kind} ({", ".join(map(quote, columns))})'
+                )
+            elif info['foreign_key']:
+                target, target_column = info['foreign_key']
+                statements.append(
+                    f'ALTER TABLE {quote(table)} ADD CONSTRAINT {quote(name)} '
+                    f'FOREIGN KEY ({quote(columns[0])}) REFERENCES '
+                    f'{quote(target)} ({quote(target_column)}) '
+                    f'DEFERRABLE INITIALLY DEFERRED'
+                )
+            elif info['index']:
+                orders = info.get('orders') or [''] * len(columns)
+                statements.append(
+                    f'CREATE INDEX {quote(name)} ON {quote(table)} ('
+                    + ', '.join(
+                        f'{quote(column)} {order}'.strip()
+                        for column, order in zip(columns, orders)
+                    ) + ')'
+                )
+        return statements
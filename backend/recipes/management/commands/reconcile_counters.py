@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from recipes.tasks import reconcile_user_counters
+
+
+class Command(BaseCommand):
+    help = ('Пересчёт счётчиков пользователей: рецептов, подписчиков и '
+            'добавлений в избранное.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('user_ids', nargs='*', type=int)
+
+    def handle(self, *args, **options):
+        updated = reconcile_user_counters(*options['user_ids'])
+        print(f'Счётчики пересчитаны: {updated}.')
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from recipes.feed import rebuild_feeds, trim_feeds
+
+
+class Command(BaseCommand):
+    help = 'Обрезка лент подписок до FEED_MAX_ITEMS последних рецептов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-items', type=int,
+                            default=settings.FEED_MAX_ITEMS)
+        parser.add_argument('--rebuild', action='store_true',
+                            help='Пересобрать ленты из подписок.')
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            rebuild_feeds()
+            print('Ленты пересобраны.')
+        print(f'Удалено записей: {trim_feeds(options["max_items"])}.')
@@ -0,0 +1,44 @@
+# Generated by Django 2.2.16 on 2026-10-19 11:44
+
+from django.db import migrations, models
+
+INGREDIENT_NAME_INDEX = 'recipes_ingredient_upper_name_like_idx'
+
+
+def create_ingredient_name_index(apps, schema_editor):
+    # istartswith (поиск ингредиентов) сравнивает UPPER(name) LIKE 'X%'.
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {INGREDIENT_NAME_INDEX} '
+            'ON recipes_ingredient (UPPER(name) varchar_pattern_ops)'
+        )
+
+
+def drop_ingredient_name_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {INGREDIENT_NAME_INDEX}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_auto_20221223_1358'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ingredientinrecipe',
+            index=models.Index(fields=['recipe', 'ingredient', 'amount'], name='ingredient_recipe_amount_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-pub_date'], name='recipe_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['author', '-pub_date'], name='recipe_author_pub_date_idx'),
+        ),
+        migrations.RunPython(
+            create_ingredient_name_index, drop_ingredient_name_index
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 2.2.16 on 2026-10-19 11:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_recipesimilarity'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ingredientinrecipe',
+            index=models.Index(fields=['ingredient', 'recipe'], name='ingredient_recipe_lookup_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 2.2.16 on 2026-10-19 12:15
+
+from django.db import migrations, models
+import foodgram.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0014_cart_archive'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='image',
+            field=models.ImageField(storage=foodgram.storage.ContentAddressedStorage(), upload_to='recipes/images', verbose_name='Картинка'),
+        ),
+    ]
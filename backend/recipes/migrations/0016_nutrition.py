@@ -0,0 +1,75 @@
+# Generated by Django 2.2.16 on 2026-10-19 12:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0015_content_addressed_images'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingredient',
+            name='calories',
+            field=models.FloatField(blank=True, help_text='На 100 г или 100 мл (для единиц, которые приводятся к граммам и миллилитрам), иначе на одну единицу.', null=True, verbose_name='Калории, ккал'),
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='carbohydrates',
+            field=models.FloatField(blank=True, help_text='На 100 г или 100 мл (для единиц, которые приводятся к граммам и миллилитрам), иначе на одну единицу.', null=True, verbose_name='Углеводы, г'),
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='fats',
+            field=models.FloatField(blank=True, help_text='На 100 г или 100 мл (для единиц, которые приводятся к граммам и миллилитрам), иначе на одну единицу.', null=True, verbose_name='Жиры, г'),
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='price',
+            field=models.FloatField(blank=True, help_text='На 100 г или 100 мл (для единиц, которые приводятся к граммам и миллилитрам), иначе на одну единицу.', null=True, verbose_name='Цена, руб.'),
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='proteins',
+            field=models.FloatField(blank=True, help_text='На 100 г или 100 мл (для единиц, которые приводятся к граммам и миллилитрам), иначе на одну единицу.', null=True, verbose_name='Белки, г'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='calories',
+            field=models.FloatField(editable=False, null=True, verbose_name='Калории, ккал'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='carbohydrates',
+            field=models.FloatField(editable=False, null=True, verbose_name='Углеводы, г'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='cost',
+            field=models.FloatField(editable=False, null=True, verbose_name='Стоимость, руб.'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='fats',
+            field=models.FloatField(editable=False, null=True, verbose_name='Жиры, г'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='proteins',
+            field=models.FloatField(editable=False, null=True, verbose_name='Белки, г'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['calories'], name='recipe_calories_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['proteins'], name='recipe_proteins_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['cost'], name='recipe_cost_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 2.2.16 on 2026-10-19 12:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0018_favorite_created'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='feeditem',
+            options={'ordering': ('user', '-pub_date', '-recipe'), 'verbose_name': 'Рецепт в ленте', 'verbose_name_plural': 'Лента подписок'},
+        ),
+        migrations.RemoveIndex(
+            model_name='feeditem',
+            name='feed_item_user_pub_date_idx',
+        ),
+        migrations.AddIndex(
+            model_name='feeditem',
+            index=models.Index(fields=['user', '-pub_date', '-recipe'], name='feed_item_user_pub_date_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+from django.db import migrations
+
+VERSION_NAMES = ('tags', 'ingredients', 'pantry')
+
+
+def seed_versions(apps, schema_editor):
+    ContentVersion = apps.get_model('recipes', 'ContentVersion')
+    for name in VERSION_NAMES:
+        ContentVersion.objects.get_or_create(name=name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0019_feed_item_keyset'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_versions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 2.2.16 on 2026-10-19 12:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0020_seed_content_versions'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ingredient',
+            name='price',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text='На 100 г или 100 мл (для единиц, которые приводятся к граммам и миллилитрам), иначе на одну единицу.', max_digits=10, null=True, verbose_name='Цена, руб.'),
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='cost',
+            field=models.DecimalField(decimal_places=2, editable=False, max_digits=12, null=True, verbose_name='Стоимость, руб.'),
+        ),
+    ]
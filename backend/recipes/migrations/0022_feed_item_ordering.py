@@ -0,0 +1,17 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:11
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0021_decimal_prices'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='feeditem',
+            options={'ordering': ('user', '-pub_date', '-recipe_id'), 'verbose_name': 'Рецепт в ленте', 'verbose_name_plural': 'Лента подписок'},
+        ),
+    ]
@@ -1,10 +1,14 @@
 from colorfield.fields import ColorField
 from django.core.validators import MinValueValidator
 from django.db import models
+from django.utils import timezone
 
+from foodgram.storage import ContentAddressedStorage
 from users.models import User
 
 NUMBER_LIST = 6
+NUTRITION_BASIS = ('На 100 г или 100 мл (для единиц, которые приводятся к '
+                   'граммам и миллилитрам), иначе на одну единицу.')
 
 
 class Tag(models.Model):
@@ -35,6 +39,38 @@ class Ingredient(models.Model):
     measurement_unit = models.CharField(
         verbose_name='Единица измерения',
         max_length=10)
+    calories = models.FloatField(
+        verbose_name='Калории, ккал',
+        help_text=NUTRITION_BASIS,
+        blank=True,
+        null=True
+    )
+    proteins = models.FloatField(
+        verbose_name='Белки, г',
+        help_text=NUTRITION_BASIS,
+        blank=True,
+        null=True
+    )
+    fats = models.FloatField(
+        verbose_name='Жиры, г',
+        help_text=NUTRITION_BASIS,
+        blank=True,
+        null=True
+    )
+    carbohydrates = models.FloatField(
+        verbose_name='Углеводы, г',
+        help_text=NUTRITION_BASIS,
+        blank=True,
+        null=True
+    )
+    price = models.DecimalField(
+        verbose_name='Цена, руб.',
+        max_digits=10,
+        decimal_places=2,
+        help_text=NUTRITION_BASIS,
+        blank=True,
+        null=True
+    )
 
     class Meta:
         verbose_name = 'Ингредиент'
@@ -61,7 +97,8 @@ class Recipe(models.Model):
     )
     image = models.ImageField(
         verbose_name='Картинка',
-        upload_to='recipes/images'
+        upload_to='recipes/images',
+        storage=ContentAddressedStorage()
     )
     ingredients = models.ManyToManyField(
         Ingredient,
@@ -84,9 +121,51 @@ class Recipe(models.Model):
         verbose_name='Дата публикации',
         auto_now_add=True
     )
+    version = models.PositiveIntegerField(
+        verbose_name='Версия',
+        default=1,
+        editable=False
+    )
+    calories = models.FloatField(
+        verbose_name='Калории, ккал',
+        null=True,
+        editable=False
+    )
+    proteins = models.FloatField(
+        verbose_name='Белки, г',
+        null=True,
+        editable=False
+    )
+    fats = models.FloatField(
+        verbose_name='Жиры, г',
+        null=True,
+        editable=False
+    )
+    carbohydrates = models.FloatField(
+        verbose_name='Углеводы, г',
+        null=True,
+        editable=False
+    )
+    cost = models.DecimalField(
+        verbose_name='Стоимость, руб.',
+        max_digits=12,
+        decimal_places=2,
+        null=True,
+        editable=False
+    )
 
     class Meta:
         ordering = ('-pub_date',)
+        indexes = (
+            models.Index(fields=('-pub_date',), name='recipe_pub_date_idx'),
+            models.Index(
+                fields=('author', '-pub_date'),
+                name='recipe_author_pub_date_idx'
+            ),
+            models.Index(fields=('calories',), name='recipe_calories_idx'),
+            models.Index(fields=('proteins',), name='recipe_proteins_idx'),
+            models.Index(fields=('cost',), name='recipe_cost_idx'),
+        )
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
 
@@ -120,6 +199,16 @@ class IngredientInRecipe(models.Model):
                 check=models.Q(amount__gte=1),
                 name='amount_gte_1'),
         )
+        indexes = (
+            models.Index(
+                fields=('recipe', 'ingredient', 'amount'),
+                name='ingredient_recipe_amount_idx'
+            ),
+            models.Index(
+                fields=('ingredient', 'recipe'),
+                name='ingredient_recipe_lookup_idx'
+            ),
+        )
         verbose_name = 'Ингредиент в рецепте'
         verbose_name_plural = 'Ингредиенты в рецепте'
 
@@ -140,6 +229,10 @@ class Favorite(models.Model):
         on_delete=models.CASCADE,
         verbose_name='Избранный рецепт'
     )
+    created = models.DateTimeField(
+        verbose_name='Дата добавления',
+        default=timezone.now
+    )
 
     class Meta:
         ordering = ('user',)
@@ -167,6 +260,10 @@ class Cart(models.Model):
         on_delete=models.CASCADE,
         verbose_name='Рецепт в корзине'
     )
+    created = models.DateTimeField(
+        verbose_name='Дата добавления',
+        default=timezone.now
+    )
 
     class Meta:
         verbose_name = 'Рецепт в корзине'
@@ -180,3 +277,174 @@ class Cart(models.Model):
 
     def __str__(self):
         return f'{self.recipe} планирует приготовить {self.user}'
+
+
+class MealPlan(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='meal_plans',
+        verbose_name='Пользователь'
+    )
+    date = models.DateField(verbose_name='Дата')
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='meal_plans',
+        verbose_name='Рецепт'
+    )
+    servings = models.PositiveSmallIntegerField(
+        validators=[MinValueValidator(1)],
+        default=1,
+        verbose_name='Порций',
+        help_text='Во сколько раз умножить количества рецепта.'
+    )
+
+    class Meta:
+        ordering = ('date', 'id')
+        verbose_name = 'План питания'
+        verbose_name_plural = 'Планы питания'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'date', 'recipe'),
+                name='meal_plan_is_unique'
+            ),
+            models.CheckConstraint(
+                check=models.Q(servings__gte=1),
+                name='servings_gte_1'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.recipe} на {self.date} для {self.user}'
+
+
+class ArchivedCart(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_carts',
+        verbose_name='Пользователь'
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='archived_carts',
+        verbose_name='Рецепт'
+    )
+    created = models.DateTimeField(verbose_name='Дата добавления')
+    archived = models.DateTimeField(
+        verbose_name='Дата архивации',
+        auto_now_add=True
+    )
+
+    class Meta:
+        verbose_name = 'Рецепт из архивной корзины'
+        verbose_name_plural = 'Архивные корзины'
+        indexes = (
+            models.Index(fields=('user',), name='archived_cart_user_idx'),
+        )
+
+    def __str__(self):
+        return f'{self.recipe} в архивной корзине {self.user}'
+
+
+class RecipeSimilarity(models.Model):
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='neighbours',
+        verbose_name='Рецепт'
+    )
+    similar = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='similar_to',
+        verbose_name='Похожий рецепт'
+    )
+    score = models.FloatField(verbose_name='Сходство')
+    computed_at = models.DateTimeField(
+        verbose_name='Дата расчёта',
+        auto_now=True
+    )
+
+    class Meta:
+        ordering = ('recipe', '-score')
+        constraints = (
+            models.UniqueConstraint(
+                fields=('recipe', 'similar'),
+                name='recipe_similarity_unique'
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('recipe', '-score'),
+                name='recipe_similarity_score_idx'
+            ),
+        )
+        verbose_name = 'Похожий рецепт'
+        verbose_name_plural = 'Похожие рецепты'
+
+    def __str__(self):
+        return f'{self.similar} похож на {self.recipe}: {self.score:.3f}'
+
+
+class FeedItem(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed',
+        verbose_name='Подписчик'
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='feed_items',
+        verbose_name='Рецепт'
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+
+    class Meta:
+        # recipe_id, а не recipe: иначе сортировка идёт по Meta.ordering
+        # рецепта (его pub_date), а не по ключу индекса и курсора.
+        ordering = ('user', '-pub_date', '-recipe_id')
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'recipe'),
+                name='feed_item_unique'
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('user', '-pub_date', '-recipe'),
+                name='feed_item_user_pub_date_idx'
+            ),
+        )
+        verbose_name = 'Рецепт в ленте'
+        verbose_name_plural = 'Лента подписок'
+
+    def __str__(self):
+        return f'{self.recipe} в ленте {self.user}'
+
+
+class ContentVersion(models.Model):
+    name = models.CharField(
+        verbose_name='Набор данных',
+        max_length=50,
+        primary_key=True
+    )
+    version = models.PositiveIntegerField(
+        verbose_name='Версия',
+        default=1
+    )
+    updated = models.DateTimeField(
+        verbose_name='Изменён',
+        auto_now=True
+    )
+
+    class Meta:
+        verbose_name = 'Версия данных'
+        verbose_name_plural = 'Версии данных'
+
+    def __str__(self):
+        return f'{self.name} v{self.version}'
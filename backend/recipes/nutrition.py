@@ -0,0 +1,78 @@
+from decimal import Decimal
+
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+
+from .models import IngredientInRecipe, Recipe
+from .units import basis_amount, basis_factor
+
+# Поле рецепта -> поле ингредиента.
+TOTALS = {
+    'calories': 'calories',
+    'proteins': 'proteins',
+    'fats': 'fats',
+    'carbohydrates': 'carbohydrates',
+    'cost': 'price',
+}
+CENTS = Decimal('0.01')
+
+
+def recipe_total(name):
+    """Сумма по ингредиентам рецепта; NULL, если данных нет ни у одного."""
+    output_field = Recipe._meta.get_field(name).clone()
+    return Subquery(
+        IngredientInRecipe.objects.filter(
+            recipe=OuterRef('pk')
+        ).order_by().values('recipe').annotate(
+            total=Sum(
+                basis_amount(output_field=output_field)
+                * F(f'ingredient__{TOTALS[name]}'),
+                output_field=output_field
+            )
+        ).values('total'),
+        output_field=output_field
+    )
+
+
+def ingredient_total(ingredient, field, amount):
+    factor = basis_factor(ingredient['measurement_unit'])
+    if isinstance(ingredient[field], Decimal):
+        factor = Decimal(str(factor))
+    return factor * amount * ingredient[field]
+
+
+def totals(amounts):
+    """Итоги по парам (ингредиент из values(), количество) без запроса.
+
+    Стоимость считается в Decimal и округляется до копеек, как в БД.
+    """
+    result = {}
+    for name, field in TOTALS.items():
+        values = [
+            ingredient_total(ingredient, field, amount)
+            for ingredient, amount in amounts
+            if ingredient[field] is not None
+        ]
+        total = sum(values) if values else None
+        if isinstance(total, Decimal):
+            total = total.quantize(CENTS)
+        result[name] = total
+    return result
+
+
+def update_recipe_totals(recipes):
+    """Пересчёт итогов одним UPDATE для рецептов из queryset."""
+    return recipes.update(**{
+        name: recipe_total(name) for name in TOTALS
+    })
+
+
+def recipes_with_ingredients(ingredient_ids):
+    return Recipe.objects.filter(id__in=IngredientInRecipe.objects.filter(
+        ingredient__in=ingredient_ids
+    ).values('recipe'))
+
+
+def cart_totals(user):
+    return Recipe.objects.filter(cart__user=user).aggregate(
+        recipes=Count('id'), **{name: Sum(name) for name in TOTALS}
+    )
@@ -0,0 +1,79 @@
+import threading
+
+from django.conf import settings
+from django.db.models import Count, F, Q
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import IngredientInRecipe, Recipe
+from .versions import bump_version, get_version
+
+MATCH_ANY = 'any'
+MATCH_ALL = 'all'
+MATCH_COVERAGE = 'coverage'
+MATCH_CHOICES = (
+    (MATCH_ANY, 'Любой из ингредиентов'),
+    (MATCH_ALL, 'Все ингредиенты'),
+    (MATCH_COVERAGE, 'Доля ингредиентов рецепта не ниже min_coverage'),
+)
+VERSION_NAME = 'pantry'
+
+
+def sql_recipe_ids(ingredient_ids, match, min_coverage):
+    """Подзапрос id рецептов: GROUP BY/HAVING по ингредиентам рецептов."""
+    rows = IngredientInRecipe.objects.order_by()
+    matched = rows.filter(ingredient__in=ingredient_ids)
+    if match == MATCH_ANY:
+        return matched.values('recipe')
+    if match == MATCH_ALL:
+        return matched.values('recipe').annotate(
+            matched=Count('ingredient')
+        ).filter(matched=len(ingredient_ids)).values('recipe')
+    return rows.filter(
+        recipe__in=matched.values('recipe')
+    ).values('recipe').annotate(
+        total=Count('id'),
+        matched=Count('id', filter=Q(ingredient__in=ingredient_ids)),
+    ).filter(matched__gte=F('total') * min_coverage).values('recipe')
+
+
+_indexes = {}
+_lock = threading.Lock()
+
+
+def get_index():
+    # Версия в БД, а не в локальном кэше: индекс есть в каждом процессе,
+    # а ингредиенты рецептов меняют другие процессы и воркер задач.
+    version = get_version(VERSION_NAME).version
+    index = _indexes.get('default')
+    if index is None or index.version != version:
+        with _lock:
+            index = _indexes.get('default')
+            if index is None or index.version != version:
+                # NumPy загружается только для PANTRY_SEARCH_BACKEND=memory.
+                from .pantry_index import PantryIndex
+                _indexes['default'] = PantryIndex(version)
+    return _indexes['default']
+
+
+def invalidate_index():
+    # С PANTRY_SEARCH_BACKEND=sql индекса нет, и лишняя запись в общую
+    # строку версии в каждой транзакции рецепта не нужна.
+    if settings.PANTRY_SEARCH_BACKEND == 'memory':
+        bump_version(VERSION_NAME)
+
+
+@receiver(post_delete, sender=Recipe)
+def invalidate_deleted_recipe(sender, **kwargs):
+    invalidate_index()
+
+
+def filter_recipes(queryset, ingredient_ids, match, min_coverage):
+    if settings.PANTRY_SEARCH_BACKEND == 'memory':
+        recipe_ids = get_index().search(ingredient_ids, match, min_coverage)
+        # Длинный список id в IN дороже подзапроса, который выполнит сама БД.
+        if len(recipe_ids) <= settings.PANTRY_MEMORY_MAX_IDS:
+            return queryset.filter(id__in=recipe_ids.tolist())
+    return queryset.filter(
+        id__in=sql_recipe_ids(ingredient_ids, match, min_coverage)
+    )
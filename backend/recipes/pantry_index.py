@@ -0,0 +1,68 @@
+import numpy as np
+
+from .models import IngredientInRecipe
+from .pantry import MATCH_ALL, MATCH_ANY
+
+
+class PantryIndex:
+    """Инвертированный индекс ингредиент -> отсортированный массив рецептов.
+
+    Постинги хранятся подряд в одном массиве uint32 (как CSR), поэтому
+    пересечение и подсчёт покрытия выполняются векторно в NumPy.
+    """
+
+    def __init__(self, version):
+        self.version = version
+        pairs = np.fromiter(
+            (value for pair in IngredientInRecipe.objects.order_by(
+                'ingredient_id', 'recipe_id'
+            ).values_list('ingredient_id', 'recipe_id').iterator(
+                chunk_size=10000
+            ) for value in pair),
+            dtype=np.uint32
+        ).reshape(-1, 2)
+        self.ingredients, starts = np.unique(pairs[:, 0], return_index=True)
+        self.offsets = np.append(starts, len(pairs))
+        self.postings = pairs[:, 1].copy()
+        self.recipes, self.totals = np.unique(
+            self.postings, return_counts=True
+        )
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for array in (
+            self.ingredients, self.offsets, self.postings,
+            self.recipes, self.totals,
+        ))
+
+    def postings_for(self, ingredient_ids):
+        positions = np.searchsorted(self.ingredients, ingredient_ids)
+        lists = []
+        for ingredient_id, position in zip(ingredient_ids, positions):
+            if (position < len(self.ingredients)
+                    and self.ingredients[position] == ingredient_id):
+                lists.append(self.postings[
+                    self.offsets[position]:self.offsets[position + 1]
+                ])
+            else:
+                lists.append(self.postings[:0])
+        return lists
+
+    def search(self, ingredient_ids, match, min_coverage):
+        ingredient_ids = np.unique(np.asarray(ingredient_ids, np.uint32))
+        lists = self.postings_for(ingredient_ids)
+        if match == MATCH_ALL:
+            lists.sort(key=len)
+            result = lists[0] if lists else self.postings[:0]
+            for postings in lists[1:]:
+                if not len(result):
+                    break
+                result = np.intersect1d(result, postings, assume_unique=True)
+            return result
+        recipes, matched = np.unique(
+            np.concatenate(lists or [self.postings[:0]]), return_counts=True
+        )
+        if match == MATCH_ANY:
+            return recipes
+        totals = self.totals[np.searchsorted(self.recipes, recipes)]
+        return recipes[matched >= totals * min_coverage]
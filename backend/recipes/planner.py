@@ -0,0 +1,15 @@
+from django.db.models import F
+
+from .models import IngredientInRecipe
+from .units import merged_quantities
+
+
+def planned_quantities(user, start, end):
+    """Список покупок по плану за период одним агрегирующим запросом."""
+    return merged_quantities(
+        IngredientInRecipe.objects.filter(
+            recipe__meal_plans__user=user,
+            recipe__meal_plans__date__range=(start, end),
+        ),
+        amount=F('amount') * F('recipe__meal_plans__servings')
+    )
@@ -0,0 +1,70 @@
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image
+
+from .expressions import count_by
+from .feed import backfill, fan_out
+from .models import Favorite, Recipe
+from .nutrition import recipes_with_ingredients, update_recipe_totals
+from tasks.queue import task
+from users.models import Subscription, User
+
+
+def thumbnail_name(image_name):
+    return os.path.join('recipes/thumbnails', os.path.basename(image_name))
+
+
+@task
+def make_thumbnail(recipe_id):
+    recipe = Recipe.objects.filter(id=recipe_id).only('image').first()
+    if recipe is None or not recipe.image:
+        return
+    name = thumbnail_name(recipe.image.name)
+    if default_storage.exists(name):
+        return
+    buffer = BytesIO()
+    with recipe.image.open('rb') as file, Image.open(file) as image:
+        image_format = image.format
+        image.thumbnail(
+            (settings.RECIPE_THUMBNAIL_SIZE, settings.RECIPE_THUMBNAIL_SIZE)
+        )
+        image.save(buffer, format=image_format)
+    default_storage.save(name, ContentFile(buffer.getvalue()))
+
+
+@task
+def fan_out_recipe(recipe_id):
+    recipe = Recipe.objects.filter(id=recipe_id).first()
+    if recipe is not None:
+        fan_out(recipe)
+
+
+@task
+def backfill_author_feeds(author_id):
+    return backfill(author_id)
+
+
+@task
+def reconcile_user_counters(*user_ids):
+    users = User.objects.all()
+    if user_ids:
+        users = users.filter(id__in=user_ids)
+    return users.update(
+        recipes_count=count_by(Recipe.objects.all(), 'author'),
+        followers_count=count_by(Subscription.objects.all(), 'author'),
+        favorites_received=count_by(
+            Favorite.objects.all(), 'recipe__author'
+        ),
+    )
+
+
+@task
+def refresh_recipe_totals(*ingredient_ids):
+    recipes = Recipe.objects.all()
+    if ingredient_ids:
+        recipes = recipes_with_ingredients(ingredient_ids)
+    return update_recipe_totals(recipes)
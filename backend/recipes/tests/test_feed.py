@@ -0,0 +1,76 @@
+from django.test import TestCase
+from django.utils import timezone
+
+from recipes.feed import get_feed, trim_feeds
+from recipes.models import FeedItem, Recipe
+from users.models import User
+
+
+class FeedTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create(
+            email='reader@example.com', username='reader',
+            first_name='reader', last_name='reader',
+        )
+        author = User.objects.create(
+            email='author@example.com', username='author',
+            first_name='author', last_name='author',
+        )
+        cls.recipes = [
+            Recipe.objects.create(
+                author=author, name=f'Рецепт {number}', text='Текст',
+                image='recipes/images/recipe.png', cooking_time=10,
+            )
+            for number in range(5)
+        ]
+
+
+class TrimFeedsTests(FeedTestCase):
+
+    def test_tied_pub_dates_keep_exactly_max_items(self):
+        # Как у сгенерированных пачкой данных: у всех одна дата.
+        pub_date = timezone.now()
+        FeedItem.objects.bulk_create([
+            FeedItem(user=self.reader, recipe=recipe, pub_date=pub_date)
+            for recipe in self.recipes
+        ])
+        self.assertEqual(trim_feeds(3), 2)
+        self.assertEqual(
+            list(FeedItem.objects.filter(user=self.reader).values_list(
+                'recipe', flat=True
+            )),
+            [recipe.id for recipe in reversed(self.recipes)][:3]
+        )
+
+    def test_short_feeds_are_untouched(self):
+        FeedItem.objects.bulk_create([
+            FeedItem(user=self.reader, recipe=recipe,
+                     pub_date=recipe.pub_date)
+            for recipe in self.recipes
+        ])
+        self.assertEqual(trim_feeds(5), 0)
+        self.assertEqual(trim_feeds(4), 1)
+        self.assertFalse(FeedItem.objects.filter(
+            recipe=self.recipes[0]
+        ).exists())
+
+
+class GetFeedTests(FeedTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        pub_date = timezone.now()
+        FeedItem.objects.bulk_create([
+            FeedItem(user=cls.reader, recipe=recipe, pub_date=pub_date)
+            for recipe in cls.recipes
+        ])
+
+    def test_pages_follow_recipe_id_on_tied_pub_dates(self):
+        ids = [recipe.id for recipe in reversed(self.recipes)]
+        first = get_feed(self.reader, limit=2)
+        self.assertEqual([recipe_id for _, recipe_id in first], ids[:2])
+        second = get_feed(self.reader, before=first[-1], limit=2)
+        self.assertEqual([recipe_id for _, recipe_id in second], ids[2:4])
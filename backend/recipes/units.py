@@ -0,0 +1,90 @@
+from django.db.models import (Case, CharField, F, FloatField, IntegerField, Q,
+                              Sum, Value, When)
+
+# Единицы из data/ingredients.csv, которые приводятся к базовой:
+# единица -> (базовая единица, множитель). Остальные (шт., пучок,
+# по вкусу и т.п.) суммируются как есть.
+CONVERSIONS = {
+    'г': ('г', 1),
+    'кг': ('г', 1000),
+    'мл': ('мл', 1),
+    'л': ('мл', 1000),
+    'ч. л.': ('мл', 5),
+    'ст. л.': ('мл', 15),
+    'стакан': ('мл', 250),
+}
+# Базовая единица -> (крупная единица, множитель) для вывода.
+LARGER_UNITS = {
+    'г': ('кг', 1000),
+    'мл': ('л', 1000),
+}
+
+
+def canonical_unit(field='ingredient__measurement_unit'):
+    return Case(
+        *[When(**{field: unit}, then=Value(canonical))
+          for unit, (canonical, _) in CONVERSIONS.items()],
+        default=F(field),
+        output_field=CharField()
+    )
+
+
+def canonical_amount(field='ingredient__measurement_unit', amount='amount'):
+    if isinstance(amount, str):
+        amount = F(amount)
+    return Case(
+        *[When(**{field: unit}, then=amount * factor)
+          for unit, (_, factor) in CONVERSIONS.items() if factor != 1],
+        default=amount,
+        output_field=IntegerField()
+    )
+
+
+def basis_factor(unit):
+    if unit in CONVERSIONS:
+        return CONVERSIONS[unit][1] / 100
+    return 1
+
+
+def basis_amount(field='ingredient__measurement_unit', amount='amount',
+                 output_field=None):
+    """Количество в единицах, на которые заданы КБЖУ и цена ингредиента.
+
+    С DecimalField в output_field множители передаются как Decimal, чтобы
+    цена считалась в numeric, а не в float.
+    """
+    output_field = output_field or FloatField()
+    return Case(
+        *[When(**{field: unit},
+               then=F(amount) * Value(output_field.to_python(factor / 100)))
+          for unit, (_, factor) in CONVERSIONS.items()],
+        default=F(amount),
+        output_field=output_field
+    )
+
+
+def merged_quantities(ingredients, amount='amount'):
+    """Суммы по названию и базовой единице с выбором единицы для вывода."""
+    return ingredients.values('ingredient__name').annotate(
+        unit=canonical_unit(),
+    ).values('ingredient__name', 'unit').annotate(
+        total=Sum(canonical_amount(amount=amount)),
+    ).annotate(
+        measurement_unit=Case(
+            *[When(Q(unit=unit, total__gte=factor), then=Value(larger))
+              for unit, (larger, factor) in LARGER_UNITS.items()],
+            default=F('unit'),
+            output_field=CharField()
+        ),
+        quantity=Case(
+            *[When(Q(unit=unit, total__gte=factor),
+                   then=F('total') / Value(float(factor)))
+              for unit, (_, factor) in LARGER_UNITS.items()],
+            default=F('total'),
+            output_field=FloatField()
+        ),
+    ).order_by('ingredient__name')
+
+
+def format_quantity(quantity):
+    return f'{round(quantity, 2):g}'
@@ -0,0 +1,78 @@
+import time
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Cart, Favorite
+
+MODELS = {
+    'favorites': Favorite,
+    'cart': Cart,
+}
+
+
+class RecipeSet:
+    """Отсортированный массив id рецептов пользователя (4 байта на id)."""
+
+    __slots__ = ('ids',)
+
+    def __init__(self, ids):
+        self.ids = ids
+
+    def __contains__(self, recipe_id):
+        position = bisect_left(self.ids, recipe_id)
+        return position < len(self.ids) and self.ids[position] == recipe_id
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        return iter(self.ids)
+
+
+def version_key(kind, user_id):
+    return f'user-recipes-version:{kind}:{user_id}'
+
+
+def get_recipe_set(kind, user_id):
+    """Набор рецептов пользователя из кеша; пересобирается из БД.
+
+    Ключ включает версию, которую изменение увеличивает после коммита,
+    поэтому набор, собранный одновременно с изменением, не будет прочитан.
+    """
+    cache.add(version_key(kind, user_id), time.time(), None)
+    version = cache.get(version_key(kind, user_id))
+    key = f'user-recipes:{kind}:{user_id}:{version}'
+    data = cache.get(key)
+    ids = array('I')
+    if data is None:
+        ids.extend(sorted(MODELS[kind].objects.filter(
+            user_id=user_id
+        ).values_list('recipe_id', flat=True)))
+        cache.set(key, ids.tobytes(), settings.USER_RECIPE_SETS_TTL)
+    else:
+        ids.frombytes(data)
+    return RecipeSet(ids)
+
+
+def invalidate(kind, user_id):
+    transaction.on_commit(
+        lambda: cache.set(version_key(kind, user_id), time.time(), None)
+    )
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+def invalidate_favorites(sender, instance, **kwargs):
+    invalidate('favorites', instance.user_id)
+
+
+@receiver(post_save, sender=Cart)
+@receiver(post_delete, sender=Cart)
+def invalidate_cart(sender, instance, **kwargs):
+    invalidate('cart', instance.user_id)
@@ -0,0 +1,42 @@
+from datetime import datetime
+
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import ContentVersion, Ingredient, Tag
+
+VERSIONED_MODELS = {
+    Tag: 'tags',
+    Ingredient: 'ingredients',
+}
+
+
+def get_version(name):
+    # Строки версий создаёт миграция 0020, чтение никогда не пишет в БД.
+    return ContentVersion.objects.filter(name=name).first() or ContentVersion(
+        name=name, version=0,
+        updated=datetime.fromtimestamp(0, timezone.utc)
+    )
+
+
+def bump_version(name):
+    """Новая версия набора данных.
+
+    Сигналы post_save и post_delete не срабатывают для bulk_create,
+    bulk_update, update() и delete() без загрузки объектов, поэтому такой
+    код должен сам вызвать bump_version в той же транзакции.
+    """
+    updated = ContentVersion.objects.filter(name=name).update(
+        version=F('version') + 1, updated=timezone.now()
+    )
+    if not updated:
+        ContentVersion.objects.get_or_create(name=name)
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def bump_model_version(sender, **kwargs):
+    if sender in VERSIONED_MODELS:
+        bump_version(VERSIONED_MODELS[sender])
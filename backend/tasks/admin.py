@@ -0,0 +1,16 @@
+from django.contrib import admin
+
+from .models import Job
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'status', 'attempts', 'run_at', 'created')
+    list_filter = ('status', 'name')
+    actions = ('retry',)
+
+    def retry(self, request, queryset):
+        queryset.update(status=Job.PENDING, attempts=0, locked_at=None)
+    retry.short_description = 'Перезапустить'
+
+
+admin.site.register(Job, JobAdmin)
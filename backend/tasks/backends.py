@@ -0,0 +1,118 @@
+import json
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+
+class DatabaseBackend:
+    """Очередь в таблице Job; задачи разбираются через SKIP LOCKED."""
+
+    def push(self, name, args, kwargs):
+        Job.objects.create(
+            name=name, payload=json.dumps({'args': args, 'kwargs': kwargs})
+        )
+
+    def claim(self, batch_size):
+        now = timezone.now()
+        stale = now - timedelta(seconds=settings.TASKS_LOCK_TIMEOUT)
+        with transaction.atomic():
+            queue = Job.objects.select_for_update(skip_locked=True)
+            jobs = list(queue.filter(
+                status=Job.PENDING, run_at__lte=now
+            ).order_by('run_at')[:batch_size])
+            jobs += list(queue.filter(
+                status=Job.RUNNING, locked_at__lt=stale
+            )[:batch_size - len(jobs)])
+            Job.objects.filter(id__in=[job.id for job in jobs]).update(
+                status=Job.RUNNING, locked_at=now
+            )
+        return [
+            (job, job.name, json.loads(job.payload), job.attempts)
+            for job in jobs
+        ]
+
+    def complete(self, job):
+        job.delete()
+
+    def retry(self, job, error, run_at):
+        Job.objects.filter(id=job.id).update(
+            status=Job.PENDING, attempts=job.attempts + 1, run_at=run_at,
+            locked_at=None, last_error=error
+        )
+
+    def fail(self, job, error):
+        Job.objects.filter(id=job.id).update(
+            status=Job.FAILED, attempts=job.attempts + 1, locked_at=None,
+            last_error=error
+        )
+
+
+class RedisBackend:
+    """Очередь в sorted set Redis: score — время запуска."""
+
+    queue_key = 'tasks:queue'
+    failed_key = 'tasks:failed'
+
+    def __init__(self):
+        try:
+            import redis
+        except ImportError:
+            raise ImproperlyConfigured(
+                'Для TASKS_BACKEND=redis нужен пакет redis.'
+            )
+        self.client = redis.Redis.from_url(settings.TASKS_REDIS_URL)
+
+    def push(self, name, args, kwargs, attempts=0, run_at=None):
+        message = json.dumps({
+            'id': uuid.uuid4().hex, 'name': name, 'attempts': attempts,
+            'payload': {'args': args, 'kwargs': kwargs},
+        })
+        self.client.zadd(self.queue_key, {
+            message: (run_at or timezone.now()).timestamp()
+        })
+
+    def claim(self, batch_size):
+        messages = self.client.zrangebyscore(
+            self.queue_key, 0, timezone.now().timestamp(),
+            start=0, num=batch_size
+        )
+        jobs = []
+        for message in messages:
+            # Задачу получает тот воркер, чей ZREM удалил её из очереди.
+            if self.client.zrem(self.queue_key, message):
+                job = json.loads(message)
+                jobs.append(
+                    (job, job['name'], job['payload'], job['attempts'])
+                )
+        return jobs
+
+    def complete(self, job):
+        pass
+
+    def retry(self, job, error, run_at):
+        self.push(
+            job['name'], job['payload']['args'], job['payload']['kwargs'],
+            attempts=job['attempts'] + 1, run_at=run_at
+        )
+
+    def fail(self, job, error):
+        self.client.lpush(self.failed_key, json.dumps(dict(job, error=error)))
+
+
+BACKENDS = {
+    'database': 'tasks.backends.DatabaseBackend',
+    'redis': 'tasks.backends.RedisBackend',
+}
+
+
+def get_backend():
+    return import_string(
+        BACKENDS.get(settings.TASKS_BACKEND, settings.TASKS_BACKEND)
+    )()
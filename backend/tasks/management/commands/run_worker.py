@@ -0,0 +1,36 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from tasks.backends import get_backend
+from tasks.queue import run_pending
+
+
+class Command(BaseCommand):
+    help = 'Воркер фоновых задач с повторами и экспоненциальной паузой.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10)
+        parser.add_argument('--sleep', type=float, default=1.0,
+                            help='Пауза, когда очередь пуста, секунд.')
+        parser.add_argument('--once', action='store_true',
+                            help='Разобрать очередь и завершиться.')
+
+    def handle(self, *args, **options):
+        self.running = True
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        backend = get_backend()
+        while self.running:
+            close_old_connections()
+            processed = run_pending(backend, options['batch_size'])
+            if not processed:
+                if options['once']:
+                    break
+                time.sleep(options['sleep'])
+        close_old_connections()
+
+    def stop(self, signum, frame):
+        self.running = False
@@ -0,0 +1,54 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField(verbose_name='Задача', max_length=200)
+    payload = models.TextField(verbose_name='Аргументы (JSON)')
+    status = models.CharField(
+        verbose_name='Статус',
+        max_length=16,
+        choices=STATUSES,
+        default=PENDING
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name='Попыток',
+        default=0
+    )
+    run_at = models.DateTimeField(
+        verbose_name='Запустить не раньше',
+        default=timezone.now
+    )
+    locked_at = models.DateTimeField(
+        verbose_name='Взята в работу',
+        null=True,
+        blank=True
+    )
+    last_error = models.TextField(verbose_name='Последняя ошибка', blank=True)
+    created = models.DateTimeField(
+        verbose_name='Создана',
+        auto_now_add=True
+    )
+
+    class Meta:
+        ordering = ('run_at',)
+        indexes = (
+            models.Index(
+                fields=('status', 'run_at'),
+                name='job_status_run_at_idx'
+            ),
+        )
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+
+    def __str__(self):
+        return f'{self.name} ({self.get_status_display()})'
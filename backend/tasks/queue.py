@@ -0,0 +1,55 @@
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .backends import get_backend
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+
+
+def task(func):
+    """Регистрирует функцию как фоновую задачу: func.delay(*args)."""
+    name = f'{func.__module__}.{func.__name__}'
+    registry[name] = func
+    func.delay = lambda *args, **kwargs: enqueue(name, *args, **kwargs)
+    return func
+
+
+def enqueue(name, *args, **kwargs):
+    if settings.TASKS_EAGER:
+        registry[name](*args, **kwargs)
+        return
+    # Воркер не должен увидеть задачу раньше, чем данные, на которые она
+    # ссылается, будут закоммичены.
+    transaction.on_commit(
+        lambda: get_backend().push(name, list(args), kwargs)
+    )
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=settings.TASKS_RETRY_DELAY * 2 ** attempts)
+
+
+def run_pending(backend, batch_size):
+    jobs = backend.claim(batch_size)
+    for job, name, payload, attempts in jobs:
+        try:
+            registry[name](*payload['args'], **payload['kwargs'])
+        except Exception:
+            error = traceback.format_exc()
+            logger.warning('Задача %s завершилась ошибкой:\n%s', name, error)
+            if attempts + 1 >= settings.TASKS_MAX_ATTEMPTS:
+                backend.fail(job, error)
+            else:
+                backend.retry(
+                    job, error, timezone.now() + retry_delay(attempts)
+                )
+        else:
+            backend.complete(job)
+    return len(jobs)
@@ -1,6 +1,7 @@
 from django.contrib import admin
 
 from .models import Subscription, User
+from foodgram.paginator import EstimatedCountPaginator
 
 
 class UserAdmin(admin.ModelAdmin):
@@ -9,10 +10,24 @@ class UserAdmin(admin.ModelAdmin):
         'username',
         'first_name',
         'last_name',
-        'email'
+        'email',
+        'recipes_count',
+        'followers_count'
     )
-    list_filter = ('email', 'username')
+    list_filter = ('role', 'is_staff', 'is_active')
+    search_fields = ('^username', '^email', 'first_name', 'last_name')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class SubscriptionAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'author')
+    list_select_related = ('user', 'author')
+    raw_id_fields = ('user', 'author')
+    search_fields = ('user__username', 'author__username')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 admin.site.register(User, UserAdmin)
-admin.site.register(Subscription)
+admin.site.register(Subscription, SubscriptionAdmin)
@@ -0,0 +1,54 @@
+# Generated by Django 2.2.16 on 2026-10-19 11:55
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_by(queryset, field):
+    return Coalesce(Subquery(
+        queryset.filter(**{field: OuterRef('pk')}).order_by().values(
+            field
+        ).annotate(count=Count('id')).values('count')
+    ), 0)
+
+
+def fill_counters(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    Recipe = apps.get_model('recipes', 'Recipe')
+    Favorite = apps.get_model('recipes', 'Favorite')
+    Subscription = apps.get_model('users', 'Subscription')
+    User.objects.update(
+        recipes_count=count_by(Recipe.objects.all(), 'author'),
+        followers_count=count_by(Subscription.objects.all(), 'author'),
+        favorites_received=count_by(
+            Favorite.objects.all(), 'recipe__author'
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_auto_20221223_1358'),
+        ('users', '0007_auto_20221222_1716'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='favorites_received',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Добавлений рецептов в избранное'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Подписчиков'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='recipes_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Рецептов'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 2.2.16 on 2026-10-19 12:44
+
+from django.db import migrations, models
+
+
+def mark_archived_carts(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    ArchivedCart = apps.get_model('recipes', 'ArchivedCart')
+    User.objects.filter(
+        id__in=ArchivedCart.objects.values('user')
+    ).update(has_archived_cart=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0014_cart_archive'),
+        ('users', '0008_user_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='has_archived_cart',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Корзина в архиве'),
+        ),
+        migrations.RunPython(mark_archived_carts, migrations.RunPython.noop),
+    ]
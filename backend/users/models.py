@@ -23,6 +23,26 @@ class User(AbstractUser):
     first_name = models.CharField(max_length=150)
     last_name = models.CharField(max_length=150)
     email = models.EmailField(unique=True, max_length=254)
+    recipes_count = models.PositiveIntegerField(
+        verbose_name='Рецептов',
+        default=0,
+        editable=False
+    )
+    followers_count = models.PositiveIntegerField(
+        verbose_name='Подписчиков',
+        default=0,
+        editable=False
+    )
+    favorites_received = models.PositiveIntegerField(
+        verbose_name='Добавлений рецептов в избранное',
+        default=0,
+        editable=False
+    )
+    has_archived_cart = models.BooleanField(
+        verbose_name='Корзина в архиве',
+        default=False,
+        editable=False
+    )
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'first_name', 'last_name']
 